@@ -0,0 +1,70 @@
+"""
+Cold start benchmark of ``import smfmodel``.
+
+Every repeat imports smfmodel in a fresh interpreter, measures the import time and checks that
+no heavy dependency was loaded on the way. Exits with status 1 if the median import time is
+above the target or a heavy dependency was loaded.
+
+    python benchmarks/bench_import.py --target-ms 50 --output import.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["matplotlib", "seaborn", "torch", "statsmodels", "scanpy", "anndata", "pandas", "scipy", "sklearn"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import smfmodel
+{access}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(m for m in {heavy} if m in sys.modules)}}))
+"""
+
+def probe(access, repeats):
+    """Time a statement after import smfmodel in fresh interpreters."""
+    env = dict(os.environ)
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env["PYTHONPATH"] = os.pathsep.join([src, env.get("PYTHONPATH", "")])
+    code = PROBE.format(access=access, heavy=HEAVY_MODULES)
+    runs = [json.loads(subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True).stdout) for _ in range(repeats)]
+    return {
+        "median_ms": 1000 * statistics.median(run["seconds"] for run in runs),
+        "min_ms": 1000 * min(run["seconds"] for run in runs),
+        "loaded_heavy_modules": runs[0]["modules"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=50.0, help="Maximum median time of import smfmodel.")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = {
+        "import smfmodel": probe("", args.repeats),
+        # A worker that only solves steady states should not pay for the other subpackages
+        "smfmodel.mm.solve_steady_state": probe("smfmodel.mm.solve_steady_state", args.repeats)
+    }
+    failures = []
+    if results["import smfmodel"]["median_ms"] > args.target_ms:
+        failures.append(f"import smfmodel took {results['import smfmodel']['median_ms']:.1f} ms, above the {args.target_ms} ms target")
+    for name, result in results.items():
+        forbidden = [module for module in result["loaded_heavy_modules"] if name == "import smfmodel" or module in ["matplotlib", "seaborn", "torch", "statsmodels", "scanpy"]]
+        if forbidden:
+            failures.append(f"{name} loaded {', '.join(forbidden)}")
+    results["failures"] = failures
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Benchmarks of the smfmodel hot paths at several scales.
+
+Every case is timed over a few repeats (best time kept), then run once more under tracemalloc
+for its peak memory. Results are written as JSON and can be compared to a previous run to
+catch regressions:
+
+    python benchmarks/run_benchmarks.py --scales small medium --output current.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --max-slowdown 1.25
+
+The comparison exits with status 1 if a case is slower, or uses more memory, than the baseline
+by more than the allowed factor.
+"""
+import os
+
+os.environ.setdefault("TQDM_DISABLE", "1")  # Keep progress bars out of the timings
+
+import argparse
+import fnmatch
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import numpy as np
+
+import synthetic
+
+SCALES = ["small", "medium", "large"]
+CASES = []
+
+def case(name, scales, items):
+    """
+    Register a benchmark case.
+
+    Parameters:
+        name (str): The case name.
+        scales (dict): Maps scale names to the size parameter passed to the case.
+        items (callable): Maps the size parameter to the number of items processed, for throughput.
+    """
+    def register(function):
+        for scale, size in scales.items():
+            CASES.append({"name": name, "scale": scale, "size": size, "items": items(size), "function": function})
+        return function
+    return register
+
+# Markov models
+
+@case("solve_steady_state_batch", {"small": 1_000, "medium": 100_000, "large": 1_000_000}, lambda n: n)
+def bench_solve_steady_state_batch(n):
+    import smfmodel
+    Ts = synthetic.transition_matrices(n)
+    return lambda: smfmodel.mm.solve_steady_state_batch(Ts)
+
+@case("solve_steady_state", {"small": 100, "medium": 1_000, "large": 10_000}, lambda n: n)
+def bench_solve_steady_state(n):
+    import smfmodel
+    Ts = synthetic.transition_matrices(n)
+    return lambda: [smfmodel.mm.solve_steady_state(T) for T in Ts]
+
+@case("random_transition_matrix", {"small": 1_000, "medium": 100_000, "large": 1_000_000}, lambda n: n)
+def bench_random_transition_matrix(n):
+    import smfmodel
+    rng = np.random.default_rng(0)
+    return lambda: smfmodel.mm.random_transition_matrix(4, allow_self_transitions=True, n_matrices=n, rng=rng)
+
+@case("generate_transition_matrix_solutions[threshold=0.2]", {"small": 1_000, "medium": 10_000, "large": 100_000}, lambda n: n)
+def bench_generate_high_acceptance(n):
+    return _generate(n, 0.2)
+
+@case("generate_transition_matrix_solutions[threshold=0.1]", {"small": 1_000, "medium": 10_000, "large": 100_000}, lambda n: n)
+def bench_generate_medium_acceptance(n):
+    return _generate(n, 0.1)
+
+@case("generate_transition_matrix_solutions[threshold=0.05]", {"small": 100, "medium": 1_000, "large": 10_000}, lambda n: n)
+def bench_generate_low_acceptance(n):
+    return _generate(n, 0.05)
+
+def _generate(n, threshold):
+    import smfmodel
+    observed = np.array([0.4, 0.3, 0.2, 0.1])
+    params = {"total_matrices": n, "allow_self_transitions": True, "batch_size": 4096, "seed": 0, "return_array": True}
+    return lambda: smfmodel.mm.generate_transition_matrix_solutions(observed, np.full(4, threshold), "benchmark", params)
+
+@case("abc_smc_transition_matrix_solutions[threshold=0.05]", {"small": 100, "medium": 1_000, "large": 10_000}, lambda n: n)
+def bench_abc_smc(n):
+    import smfmodel
+    observed = np.array([0.4, 0.3, 0.2, 0.1])
+    params = {"total_matrices": n, "allow_self_transitions": True, "batch_size": 4096, "seed": 0}
+    return lambda: smfmodel.mm.abc_smc_transition_matrix_solutions(observed, np.full(4, 0.05), "benchmark", params)
+
+@case("entropy_production_batch", {"small": 1_000, "medium": 100_000, "large": 1_000_000}, lambda n: n)
+def bench_entropy_production_batch(n):
+    import smfmodel
+    Ts = synthetic.transition_matrices(n)
+    return lambda: smfmodel.mm.entropy_production_batch(Ts)
+
+@case("propagate_distribution_batch[100 times]", {"small": 1_000, "medium": 10_000, "large": 100_000}, lambda n: n)
+def bench_propagate_distribution_batch(n):
+    import smfmodel
+    Qs = smfmodel.mm.rate_matrix_batch(synthetic.transition_matrices(n))
+    times = np.linspace(0, 10, 100)
+    return lambda: smfmodel.mm.propagate_distribution_batch(Qs, np.full(Qs.shape[-1], 1 / Qs.shape[-1]), times)
+
+@case("load_transitions_into_adata", {"small": 10_000, "medium": 100_000, "large": 1_000_000}, lambda n: n)
+def bench_load_transitions_into_adata(n):
+    import smfmodel
+    stacks = [synthetic.transition_matrices(n // 2, seed=k) for k in range(2)]
+    return lambda: smfmodel.mm.load_transitions_into_adata(stacks, synthetic.TRANSITION_NAMES, ["WT", "KO"])
+
+# Statistics
+
+@case("permutation_test", {"small": 1_000, "medium": 10_000, "large": 100_000}, lambda n: n)
+def bench_permutation_test(n):
+    import smfmodel
+    condition_1 = synthetic.proportions(500, 16, seed=1)
+    condition_2 = synthetic.proportions(500, 16, seed=2, shift=0.1)
+    return lambda: smfmodel.stats.permutation_test(condition_1, condition_2, apply_clr_transform=True, n_permutations=n, seed=0)
+
+@case("manova_test", {"small": 4, "medium": 16}, lambda n: n)
+def bench_manova_test(n):
+    import smfmodel
+    condition_1 = synthetic.proportions(2_000, n, seed=1)
+    condition_2 = synthetic.proportions(2_000, n, seed=2, shift=0.1)
+    return lambda: smfmodel.stats.manova_test(condition_1, condition_2, range(n))
+
+@case("manova_statistics", {"small": 4, "medium": 16, "large": 64}, lambda n: n)
+def bench_manova_statistics(n):
+    import smfmodel
+    condition_1 = synthetic.proportions(2_000, n, seed=1)
+    condition_2 = synthetic.proportions(2_000, n, seed=2, shift=0.1)
+    return lambda: smfmodel.stats.manova_statistics(condition_1, condition_2)
+
+@case("perform_anovas", {"small": 4, "medium": 16}, lambda n: n)
+def bench_perform_anovas(n):
+    import smfmodel
+    condition_1 = synthetic.proportions(2_000, n, seed=1)
+    condition_2 = synthetic.proportions(2_000, n, seed=2, shift=0.1)
+    return lambda: smfmodel.stats.perform_anovas(condition_1, condition_2, range(n))
+
+@case("perform_anovas_vectorized", {"small": 4, "medium": 16, "large": 64}, lambda n: n)
+def bench_perform_anovas_vectorized(n):
+    import smfmodel
+    condition_1 = synthetic.proportions(2_000, n, seed=1)
+    condition_2 = synthetic.proportions(2_000, n, seed=2, shift=0.1)
+    return lambda: smfmodel.stats.perform_anovas_vectorized(condition_1, condition_2, range(n))
+
+@case("clr_transform", {"small": 100_000, "medium": 1_000_000, "large": 4_000_000}, lambda n: n)
+def bench_clr_transform(n):
+    import smfmodel
+    data = synthetic.proportions(n, 16)
+    return lambda: smfmodel.stats.clr_transform(data)
+
+@case("clr_transform[float32,chunked]", {"small": 100_000, "medium": 1_000_000, "large": 4_000_000}, lambda n: n)
+def bench_clr_transform_chunked(n):
+    import smfmodel
+    data = synthetic.proportions(n, 16)
+    return lambda: smfmodel.stats.clr_transform(data, dtype="float32", zero_replacement="multiplicative", chunk_size=65_536)
+
+# Plotting density paths
+
+@case("binned_kde_2d", {"small": 100_000, "medium": 1_000_000, "large": 10_000_000}, lambda n: n)
+def bench_binned_kde_2d(n):
+    import smfmodel
+    rng = np.random.default_rng(0)
+    x, y = rng.random(n), rng.random(n)
+    return lambda: smfmodel.pl.binned_kde_2d(x, y, extent=((0, 1), (0, 1)))
+
+@case("transition_pair_densities", {"small": 10_000, "medium": 100_000, "large": 1_000_000}, lambda n: n // 2)
+def bench_transition_pair_densities(n):
+    import smfmodel
+    adata = synthetic.transition_adata(n)
+    return lambda: smfmodel.pl.transition_pair_densities(adata, "WT")
+
+@case("hist_summaries", {"small": 100_000, "medium": 1_000_000, "large": 10_000_000}, lambda n: 2 * n)
+def bench_hist_summaries(n):
+    import smfmodel
+    arrays = [synthetic.signed_values(n, seed=1), synthetic.signed_values(n, seed=2)]
+    return lambda: smfmodel.pl.hist_summaries(arrays, {"n_bins": 100, "window_size": 5})
+
+def run_case(benchmark, repeats):
+    """Time a case and measure its peak traced memory."""
+    run = benchmark["function"](benchmark["size"])
+    run()  # Warm up imports and caches
+    seconds = np.inf
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "name": benchmark["name"],
+        "scale": benchmark["scale"],
+        "size": benchmark["size"],
+        "seconds": seconds,
+        "items_per_second": benchmark["items"] / seconds,
+        "peak_memory_bytes": peak_memory
+    }
+
+def compare(results, baseline, max_slowdown):
+    """List the cases slower or heavier than the baseline by more than max_slowdown."""
+    reference = {(result["name"], result["scale"]): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        previous = reference.get((result["name"], result["scale"]))
+        if previous is None:
+            continue
+        for key in ["seconds", "peak_memory_bytes"]:
+            ratio = result[key] / max(previous[key], 1e-12)
+            if ratio > max_slowdown:
+                regressions.append({"name": result["name"], "scale": result["scale"], "metric": key, "ratio": ratio})
+    return regressions
+
+def main():
+    from smfmodel._version import __version__
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", nargs="+", default=["small"], choices=SCALES)
+    parser.add_argument("--filter", default="*", help="Only run the cases whose name matches this glob.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this path.")
+    parser.add_argument("--baseline", default=None, help="JSON results of a previous run to compare against.")
+    parser.add_argument("--max-slowdown", type=float, default=1.25)
+    args = parser.parse_args()
+
+    results = []
+    for benchmark in CASES:
+        if benchmark["scale"] not in args.scales or not fnmatch.fnmatch(benchmark["name"], args.filter):
+            continue
+        result = run_case(benchmark, args.repeats)
+        results.append(result)
+        print(f"{result['name']:<55} {result['scale']:<7} {result['seconds'] * 1000:10.2f} ms {result['items_per_second']:14.1f} /s {result['peak_memory_bytes'] / 2**20:10.1f} MiB", file=sys.stderr)
+
+    report = {
+        "metadata": {
+            "smfmodel": __version__,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "results": results
+    }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(results, json.load(f), args.max_slowdown)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    sys.exit(1 if report.get("regressions") else 0)
+
+if __name__ == "__main__":
+    main()
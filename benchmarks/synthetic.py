@@ -0,0 +1,33 @@
+"""
+Seeded synthetic data for the benchmarks. Nothing here reads files or the network.
+"""
+import numpy as np
+
+TRANSITION_NAMES = [f"{i}_{j}" for i in range(4) for j in range(4)]
+
+def transition_matrices(n_matrices, size=4, seed=0):
+    """Random row-stochastic matrices with self transitions, shape (n_matrices, size, size)."""
+    rng = np.random.default_rng(seed)
+    Ts = rng.random((n_matrices, size, size))
+    return Ts / Ts.sum(axis=-1, keepdims=True)
+
+def proportions(n_samples, n_classes, seed=0, shift=0.0):
+    """Dirichlet distributed compositions, with the first part inflated by shift."""
+    rng = np.random.default_rng(seed)
+    alpha = np.ones(n_classes)
+    alpha[0] += shift
+    return rng.dirichlet(alpha, size=n_samples)
+
+def signed_values(n_values, seed=0):
+    """Values around zero, like dissipations or detailed balance deviations."""
+    rng = np.random.default_rng(seed)
+    return rng.standard_t(5, size=n_values) * 0.1
+
+def transition_adata(n_matrices, conditions=("WT", "KO"), seed=0):
+    """An AnnData of flattened transition matrices split over conditions, as the notebooks build it."""
+    import smfmodel
+
+    stacks = [transition_matrices(n_matrices // len(conditions), seed=seed + k) for k in range(len(conditions))]
+    adata = smfmodel.mm.load_transitions_into_adata(stacks, TRANSITION_NAMES, list(conditions))
+    adata.uns["Transition_array_state_map"] = {name: i for i, name in enumerate(TRANSITION_NAMES)}
+    return adata
@@ -1,9 +1,16 @@
 """smfmodel"""
 
-from . import markov_models as mm
-from . import neural_networks as nn
-from . import plotting as pl
-from . import stats
+from ._lazy import attach
+
+# Subpackages load on first access, so importing smfmodel does not import their dependencies
+__getattr__, __dir__ = attach(__name__, submodules={
+    "mm": "markov_models",
+    "nn": "neural_networks",
+    "pl": "plotting",
+    "stats": "stats",
+    "tl": "tools",
+    "instrumentation": "instrumentation"
+})
 
 package_name = "smfmodel"
 
@@ -11,5 +18,7 @@ __all__ = [
     "mm",
     "nn",
     "pl",
-    "stats"
-]
\ No newline at end of file
+    "stats",
+    "tl",
+    "instrumentation"
+]
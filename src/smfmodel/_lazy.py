@@ -0,0 +1,52 @@
+# _lazy
+import importlib
+import sys
+from types import ModuleType
+
+class _LazyModule(ModuleType):
+    """
+    Package module whose lazily exported functions are not shadowed by their submodules.
+
+    Importing a submodule binds it as an attribute of its package. When the function a package
+    exports has the name of the submodule defining it, e.g. markov_models.solve_steady_state,
+    that binding would replace the function with the module, so it is replaced by the function.
+    """
+    def __setattr__(self, name, value):
+        functions = self.__dict__.get('_lazy_functions', {})
+        if isinstance(value, ModuleType) and functions.get(name) == name and hasattr(value, name):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+def attach(module_name, submodules=None, functions=None):
+    """
+    Make the submodules and functions of a package load on first attribute access (PEP 562).
+
+    Parameters:
+        module_name (str): The __name__ of the package.
+        submodules (dict): Maps attribute names to submodule names, e.g. {'mm': 'markov_models'}.
+        functions (dict): Maps function names to the submodule that defines them.
+
+    Returns:
+        __getattr__ (callable): The module level __getattr__ of the package.
+        __dir__ (callable): The module level __dir__ of the package.
+    """
+    submodules = submodules or {}
+    functions = functions or {}
+    module = sys.modules[module_name]
+    module.__class__ = _LazyModule
+    module._lazy_functions = functions
+
+    def __getattr__(name):
+        if name in submodules:
+            value = importlib.import_module(f'{module_name}.{submodules[name]}')
+        elif name in functions:
+            value = getattr(importlib.import_module(f'{module_name}.{functions[name]}'), name)
+        else:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        setattr(module, name, value)  # Later lookups skip __getattr__
+        return value
+
+    def __dir__():
+        return sorted(set(module.__dict__) | set(submodules) | set(functions))
+
+    return __getattr__, __dir__
@@ -0,0 +1,145 @@
+# instrumentation
+import time
+from contextlib import contextmanager
+
+class RunStats:
+    """
+    Stage timings, counters and histograms of an instrumented run.
+
+    Pass an instance as the instrument of generate_transition_matrix_solutions (params['instrument']),
+    permutation_test or the MANOVA/ANOVA functions and read it after the call. The callback is
+    called as callback(event, stats) at every progress event, and with a logger every event is
+    logged as a structured record (the stats dict in extra['smfmodel_stats']).
+
+    Parameters:
+        name (str): Name of the run, used in the log records.
+        callback (callable): Called as callback(event, stats) with the event name and this object.
+        logger (logging.Logger): Logger of the events. Progress events go to DEBUG, the final event to INFO.
+    """
+    enabled = True
+
+    def __init__(self, name=None, callback=None, logger=None):
+        self.name = name
+        self.callback = callback
+        self.logger = logger
+        self.timings = {}
+        self.counters = {}
+        self.histograms = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Add the wall time of the with block to the timing of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, value=1):
+        """Add value to a counter."""
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def histogram(self, name, counts):
+        """Add an array of counts to a histogram, e.g. the rejections of every state."""
+        import numpy as np
+
+        counts = np.asarray(counts, dtype=np.int64)
+        if name in self.histograms:
+            self.histograms[name] = self.histograms[name] + counts
+        else:
+            self.histograms[name] = counts
+
+    def merge(self, other):
+        """Add the timings, counters and histograms of another RunStats or of its as_dict(), e.g. from a worker process."""
+        if isinstance(other, RunStats):
+            other = other.as_dict()
+        for name, seconds in other.get('timings', {}).items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+        for name, value in other.get('counters', {}).items():
+            self.count(name, value)
+        for name, counts in other.get('histograms', {}).items():
+            self.histogram(name, counts)
+
+    def event(self, event, final=False):
+        """Report a progress event to the callback and the logger."""
+        if self.callback is not None:
+            self.callback(event, self)
+        if self.logger is not None:
+            import logging
+            level = logging.INFO if final else logging.DEBUG
+            if self.logger.isEnabledFor(level):
+                self.logger.log(level, "%s %s %s", self.name, event, self.counters, extra={'smfmodel_stats': self.as_dict()})
+
+    def rates(self):
+        """
+        Derived rates: the acceptance rate, and the throughput of every counter over the 'total'
+        stage, or over the sum of the stages if there is none.
+        """
+        rates = {}
+        if self.counters.get('candidates'):
+            rates['acceptance_rate'] = self.counters.get('accepted', 0) / self.counters['candidates']
+        total_seconds = self.timings.get('total', sum(self.timings.values()))
+        if total_seconds > 0:
+            for name, value in self.counters.items():
+                rates[f'{name}_per_second'] = value / total_seconds
+        return rates
+
+    def as_dict(self):
+        """A picklable, JSON friendly copy of the stats."""
+        return {
+            'name': self.name,
+            'timings': dict(self.timings),
+            'counters': dict(self.counters),
+            'histograms': {name: counts.tolist() for name, counts in self.histograms.items()},
+            'rates': self.rates()
+        }
+
+    def __repr__(self):
+        return f"RunStats(name={self.name!r}, timings={self.timings}, counters={self.counters})"
+
+class _NullStats:
+    """Stand-in for RunStats when instrumentation is off. Every hook is a no-op."""
+    enabled = False
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def count(self, name, value=1):
+        pass
+
+    def histogram(self, name, counts):
+        pass
+
+    def merge(self, other):
+        pass
+
+    def event(self, event, final=False):
+        pass
+
+NULL_STATS = _NullStats()
+
+def resolve_instrument(instrument, name=None):
+    """
+    Turn the instrument argument of an instrumented function into a stats object.
+
+    Parameters:
+        instrument: None or False for no instrumentation, a RunStats to record into, a callable
+            used as the callback of a new RunStats, or True to log to the 'smfmodel' logger.
+        name (str): Name of a newly created RunStats.
+
+    Returns:
+        stats (RunStats or _NullStats): The stats object to record into.
+    """
+    if instrument is None or instrument is False:
+        return NULL_STATS
+    if isinstance(instrument, (RunStats, _NullStats)):
+        if isinstance(instrument, RunStats) and instrument.name is None:
+            instrument.name = name
+        return instrument
+    if instrument is True:
+        import logging
+        return RunStats(name, logger=logging.getLogger('smfmodel'))
+    if callable(instrument):
+        return RunStats(name, callback=instrument)
+    raise TypeError(f"instrument must be None, a bool, a RunStats or a callable, not {type(instrument).__name__}.")
@@ -1,17 +1,66 @@
-from .check_detailed_balance import check_detailed_balance
-from .detailed_balance_deviation import detailed_balance_deviation
-from .generate_transition_matrix_solutions import generate_transition_matrix_solutions
-from .load_transitions_into_adata import load_transitions_into_adata
-from .random_transition_matrix import random_transition_matrix
-from .solve_steady_state import solve_steady_state
-from .energy_dissipation import energy_dissipation
+from .._lazy import attach
+
+# Functions load with their module on first access
+__getattr__, __dir__ = attach(__name__, functions={
+    "abc_smc_transition_matrix_solutions": "abc_smc_transition_matrix_solutions",
+    "append_transitions_to_h5ad": "append_transitions_to_h5ad",
+    "cached_transition_matrix_solutions": "cached_transition_matrix_solutions",
+    "check_detailed_balance": "check_detailed_balance",
+    "check_detailed_balance_batch": "check_detailed_balance_batch",
+    "constructive_transition_matrix_solutions": "constructive_transition_matrix_solutions",
+    "cycle_affinities_batch": "cycle_affinities_batch",
+    "cycle_fluxes_batch": "cycle_fluxes_batch",
+    "detailed_balance_deviation": "detailed_balance_deviation",
+    "entropy_production_batch": "entropy_production_batch",
+    "fundamental_cycle_basis": "fundamental_cycle_basis",
+    "generate_transition_matrix_solutions": "generate_transition_matrix_solutions",
+    "load_transitions_into_adata": "load_transitions_into_adata",
+    "net_flux_batch": "net_flux_batch",
+    "random_transition_matrix": "random_transition_matrix",
+    "solve_steady_state": "solve_steady_state",
+    "solve_steady_state_batch": "solve_steady_state_batch",
+    "transition_mask": "transition_mask",
+    "transition_logits": "transition_logits",
+    "transition_matrices_from_logits": "transition_logits",
+    "mean_first_passage_times_batch": "mean_first_passage_times_batch",
+    "propagate_distribution_batch": "propagate_distribution_batch",
+    "rate_eigendecomposition_batch": "rate_eigendecomposition_batch",
+    "rate_matrix_batch": "rate_matrix_batch",
+    "relaxation_spectrum_batch": "relaxation_spectrum_batch",
+    "convert_h5ad_to_transition_parameters": "convert_h5ad_to_transition_parameters",
+    "load_transition_parameters": "save_transition_parameters",
+    "save_transition_parameters": "save_transition_parameters",
+    "energy_dissipation": "energy_dissipation"
+})
 
 __all__ = [
+    "abc_smc_transition_matrix_solutions",
+    "append_transitions_to_h5ad",
+    "cached_transition_matrix_solutions",
     "check_detailed_balance",
+    "check_detailed_balance_batch",
+    "constructive_transition_matrix_solutions",
+    "cycle_affinities_batch",
+    "cycle_fluxes_batch",
     "detailed_balance_deviation",
+    "entropy_production_batch",
+    "fundamental_cycle_basis",
     "generate_transition_matrix_solutions",
     "load_transitions_into_adata",
+    "net_flux_batch",
     "random_transition_matrix",
     "solve_steady_state",
+    "solve_steady_state_batch",
+    "transition_logits",
+    "transition_mask",
+    "transition_matrices_from_logits",
+    "mean_first_passage_times_batch",
+    "propagate_distribution_batch",
+    "rate_eigendecomposition_batch",
+    "rate_matrix_batch",
+    "relaxation_spectrum_batch",
+    "convert_h5ad_to_transition_parameters",
+    "load_transition_parameters",
+    "save_transition_parameters",
     "energy_dissipation"
 ]
\ No newline at end of file
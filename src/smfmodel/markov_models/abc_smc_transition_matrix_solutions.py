@@ -0,0 +1,239 @@
+#abc_smc_transition_matrix_solutions
+
+def _abc_distances(Ts, observed_proportions, variance_threshold):
+    """
+    Distance of the steady states of a stack of matrices to the observed proportions.
+
+    The distance is max_i |pi_i - observed_i| / threshold_i, so a matrix lies inside the
+    variance threshold box of generate_transition_matrix_solutions exactly when its distance is below 1.
+    Ill-conditioned matrices are at an infinite distance.
+
+    Returns:
+        distances (np.ndarray): (N,) distances.
+    """
+    import numpy as np
+    from .solve_steady_state_batch import solve_steady_state_batch
+
+    steady_states, ill_conditioned = solve_steady_state_batch(Ts)
+    distances = np.max(np.abs(steady_states - observed_proportions) / variance_threshold, axis=1)
+    distances[ill_conditioned | ~np.isfinite(distances)] = np.inf
+    return distances
+
+def _log_prior(Ts, mask, alpha):
+    """
+    Log density of the Dirichlet(alpha) row prior in ALR logit coordinates, up to a constant.
+
+    The Jacobian of the map from a row to its logits is the product of the row entries, which
+    turns the Dirichlet log density sum((alpha - 1) * log(x)) into sum(alpha * log(x)).
+    """
+    import numpy as np
+
+    with np.errstate(divide='ignore'):
+        log_T = np.log(Ts)
+    return np.where(mask, alpha * log_T, 0).sum(axis=(-2, -1))
+
+def _log_kernel_mixture(logits, particles, log_weights, cholesky, chunk_size=1024):
+    """
+    Log density of the weighted Gaussian perturbation kernel mixture at a batch of logits, up to a constant.
+
+    Parameters:
+        logits (np.ndarray): (B, d) points to evaluate.
+        particles (np.ndarray): (N, d) centres of the kernels, the previous population.
+        log_weights (np.ndarray): (N,) normalized log weights of the previous population.
+        cholesky (np.ndarray): (d, d) lower Cholesky factor of the kernel covariance.
+        chunk_size (int): Number of points evaluated at once.
+
+    Returns:
+        log_density (np.ndarray): (B,) log densities.
+    """
+    import numpy as np
+    from scipy.linalg import solve_triangular
+    from scipy.special import logsumexp
+
+    # Whiten both sets so the Mahalanobis distances become Euclidean
+    whitened_particles = solve_triangular(cholesky, particles.T, lower=True).T
+    whitened = solve_triangular(cholesky, logits.T, lower=True).T
+    particle_norms = (whitened_particles ** 2).sum(axis=1)
+
+    log_density = np.empty(len(logits))
+    for start in range(0, len(logits), chunk_size):
+        block = whitened[start:start + chunk_size]
+        squared_distances = (block ** 2).sum(axis=1)[:, None] + particle_norms[None, :] - 2 * block @ whitened_particles.T
+        log_density[start:start + chunk_size] = logsumexp(log_weights[None, :] - 0.5 * np.clip(squared_distances, 0, None), axis=1)
+    return log_density
+
+def abc_smc_transition_matrix_solutions(observed_proportions, variance_threshold, condition, params):
+    """
+    Samples transition matrices for observed proportions with sequential Monte Carlo ABC.
+
+    generate_transition_matrix_solutions is rejection ABC with one fixed tolerance, the variance
+    threshold box. Here a population of total_matrices particles is moved through a sequence of
+    shrinking tolerances instead. The distance of a matrix is max_i |pi_i - observed_i| / threshold_i,
+    so tolerance 1 is the variance threshold box. The first population is drawn from the prior,
+    and every next tolerance is the params['quantile'] quantile of the distances of the current
+    population, down to 1. Each round resamples particles by weight, perturbs them with a Gaussian
+    kernel of twice their weighted covariance in ALR logit coordinates (see transition_logits) and
+    keeps the perturbed particles within the tolerance. The importance weight of a kept particle is
+    its prior density over the kernel mixture density of the previous population.
+
+    The prior draws the rows of the matrices on the mask from a Dirichlet(dirichlet_alpha)
+    distribution, a flat distribution on the simplex of every row by default. Without
+    dirichlet_alpha this differs from the normalized uniform rates of random_transition_matrix.
+
+    If max_rounds or max_simulations run out before the tolerance reaches 1, the last complete
+    population is returned with a RuntimeWarning. Its particles are within the final tolerance
+    but not necessarily inside the variance threshold box.
+
+    Parameters:
+        observed_proportions (np.ndarray): The observed steady-state proportions.
+        variance_threshold (np.ndarray): Threshold of variance, the final tolerance box.
+        condition (str): The condition metadata id, also gives the tqdm progress context.
+        params (dict): Map of addtional parameters to pass.
+            total_matrices (int): Number of particles in the population. Defaults to 1000.
+            size, allow_self_transitions, constrain_transitions_to_adjacent, mask: The transition mask, as in generate_transition_matrix_solutions.
+            dirichlet_alpha (float or np.ndarray): Concentration of the Dirichlet row prior. Defaults to 1.
+            quantile (float): Quantile of the population distances that sets the next tolerance. Defaults to 0.5.
+            batch_size (int): Number of proposals simulated at once. Defaults to 1024.
+            max_rounds (int): Maximum number of rounds. Defaults to 50.
+            max_simulations (int): Stop once this many steady states have been solved, returning the last complete
+                population. Defaults to None.
+            seed (int): Seed for the random generator. Defaults to None.
+            transition_names (list): Var names of the output. Defaults to 'i_j'.
+            instrument (RunStats, callable or bool): Record the stage timings and simulation counters,
+                see smfmodel.instrumentation.RunStats. Defaults to None.
+
+    Returns:
+        adata (AnnData): The final population, with the importance weights in obs['abc_weight'] and the distances
+            in obs['abc_distance']. uns['abc_smc'] holds the 'tolerance', 'simulations', 'accepted' and
+            'effective_sample_size' of every round, the 'final_tolerance' and whether the run 'converged'
+            to the variance threshold box.
+    """
+    import warnings
+    import numpy as np
+    from tqdm import tqdm
+    from ..instrumentation import resolve_instrument
+    from .load_transitions_into_adata import load_transitions_into_adata
+    from .random_transition_matrix import random_transition_matrix
+    from .transition_logits import transition_logits, transition_matrices_from_logits
+    from .transition_mask import transition_mask
+
+    total_matrices = params.get('total_matrices', 1000)
+    size = params.get('size', 4)
+    allow_self_transitions = params.get('allow_self_transitions', False)
+    constrain_transitions_to_adjacent = params.get('constrain_transitions_to_adjacent', True)
+    mask = params.get('mask', None)
+    dirichlet_alpha = params.get('dirichlet_alpha', None)
+    quantile = params.get('quantile', 0.5)
+    batch_size = params.get('batch_size', 1024)
+    max_rounds = params.get('max_rounds', 50)
+    max_simulations = params.get('max_simulations', None)
+    seed = params.get('seed', None)
+    transition_names = params.get('transition_names', None)
+    stats = resolve_instrument(params.get('instrument', None), name=f'abc_smc_transition_matrix_solutions[{condition}]')
+
+    if mask is None:
+        mask = transition_mask(size, allow_self_transitions, constrain_transitions_to_adjacent)
+    elif not isinstance(mask, np.ndarray):
+        mask = transition_mask(graph=mask)
+    mask = mask.astype(bool)
+    size = mask.shape[0]
+    alpha = np.broadcast_to(1.0 if dirichlet_alpha is None else np.asarray(dirichlet_alpha, dtype=float), mask.shape)
+    if transition_names is None:
+        transition_names = [f'{i}_{j}' for i in range(size) for j in range(size)]
+
+    observed_proportions = np.asarray(observed_proportions, dtype=float)
+    variance_threshold = np.asarray(variance_threshold, dtype=float)
+    rng = np.random.default_rng(seed)
+
+    rounds = {'tolerance': [], 'simulations': [], 'accepted': [], 'effective_sample_size': []}
+    total_simulations = 0
+    tolerance = np.inf
+    particles = weights = distances = None
+
+    with stats.stage('total'):
+        for round_index in range(max_rounds):
+            if particles is not None:
+                # Shrink the tolerance to a quantile of the current distances, but not below the threshold box
+                tolerance = max(float(np.quantile(distances, quantile)), 1.0)
+                covariance = 2 * np.atleast_2d(np.cov(particles, rowvar=False, aweights=weights))
+                cholesky = np.linalg.cholesky(covariance + 1e-12 * np.eye(len(covariance)))
+                log_weights = np.log(weights)
+
+            accepted_logits = []
+            accepted_distances = []
+            n_accepted = 0
+            simulations = 0
+            with tqdm(total=total_matrices, desc=f"ABC-SMC round {round_index} (tolerance {tolerance:.3g}) for {condition}") as pbar:
+                while n_accepted < total_matrices:
+                    with stats.stage('propose'):
+                        if particles is None:
+                            # The first population comes straight from the prior
+                            Ts = random_transition_matrix(n_matrices=batch_size, rng=rng, mask=mask, dirichlet_alpha=alpha)
+                            logits = transition_logits(Ts, mask)
+                        else:
+                            ancestors = rng.choice(len(particles), size=batch_size, p=weights)
+                            logits = particles[ancestors] + rng.standard_normal((batch_size, particles.shape[1])) @ cholesky.T
+                            Ts = transition_matrices_from_logits(logits, mask)
+                    with stats.stage('solve_steady_state'):
+                        batch_distances = _abc_distances(Ts, observed_proportions, variance_threshold)
+                    simulations += batch_size
+
+                    within_tolerance = (batch_distances < tolerance) & np.all(np.isfinite(logits), axis=1)
+                    taken = np.flatnonzero(within_tolerance)[:total_matrices - n_accepted]
+                    accepted_logits.append(logits[taken])
+                    accepted_distances.append(batch_distances[taken])
+                    n_accepted += len(taken)
+                    pbar.update(len(taken))
+
+                    if max_simulations is not None and total_simulations + simulations >= max_simulations:
+                        break
+
+            total_simulations += simulations
+            stats.count('candidates', simulations)
+            stats.count('accepted', n_accepted)
+            if n_accepted < total_matrices:
+                break  # Out of simulations, keep the last complete population
+
+            new_particles = np.concatenate(accepted_logits)
+            with stats.stage('weights'):
+                if particles is None:
+                    new_weights = np.full(total_matrices, 1 / total_matrices)
+                else:
+                    log_new_weights = _log_prior(transition_matrices_from_logits(new_particles, mask), mask, alpha)
+                    log_new_weights -= _log_kernel_mixture(new_particles, particles, log_weights, cholesky)
+                    new_weights = np.exp(log_new_weights - log_new_weights.max())
+                    new_weights /= new_weights.sum()
+            particles, weights, distances = new_particles, new_weights, np.concatenate(accepted_distances)
+
+            rounds['tolerance'].append(tolerance)
+            rounds['simulations'].append(simulations)
+            rounds['accepted'].append(n_accepted)
+            rounds['effective_sample_size'].append(float(1 / np.sum(weights ** 2)))
+            stats.count('rounds')
+            stats.event('round')
+
+            if tolerance <= 1:
+                break
+
+    stats.event('finish', final=True)
+
+    if particles is None:
+        raise ValueError(f"max_simulations={max_simulations} is too small to draw a first population for {condition}.")
+
+    final_tolerance = rounds['tolerance'][-1]
+    converged = final_tolerance <= 1
+    if not converged:
+        warnings.warn(
+            f"ABC-SMC for {condition} stopped at tolerance {final_tolerance:.3g} after {len(rounds['tolerance'])} rounds and "
+            f"{total_simulations} simulations, before reaching the variance threshold box. Increase max_rounds or max_simulations.",
+            RuntimeWarning
+        )
+
+    adata = load_transitions_into_adata(transition_matrices_from_logits(particles, mask), transition_names, condition)
+    adata.obs['abc_weight'] = weights
+    adata.obs['abc_distance'] = distances
+    adata.uns['abc_smc'] = {key: np.asarray(values) for key, values in rounds.items()}
+    adata.uns['abc_smc']['final_tolerance'] = final_tolerance
+    adata.uns['abc_smc']['converged'] = converged
+
+    return adata
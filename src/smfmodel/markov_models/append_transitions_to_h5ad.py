@@ -0,0 +1,164 @@
+# append_transitions_to_h5ad
+
+def _set_encoding(element, encoding_type, encoding_version):
+    """Tag an HDF5 element with its AnnData on-disk encoding."""
+    element.attrs['encoding-type'] = encoding_type
+    element.attrs['encoding-version'] = encoding_version
+
+def _create_h5ad_store(f, n_transitions, transition_names, dtype, chunk_size):
+    """
+    Lay out an empty AnnData store whose X, obs names and condition codes can grow along the obs axis.
+
+    Parameters:
+        f (h5py.File): The open, empty HDF5 file.
+        n_transitions (int): The number of flattened transitions (columns of X).
+        transition_names (list): The var names.
+        dtype (np.dtype): The dtype of X.
+        chunk_size (int): The number of rows per HDF5 chunk.
+    """
+    import h5py
+    import numpy as np
+
+    _set_encoding(f, 'anndata', '0.1.0')
+    string_dtype = h5py.string_dtype()
+
+    X = f.create_dataset('X', shape=(0, n_transitions), maxshape=(None, n_transitions), chunks=(chunk_size, n_transitions), dtype=dtype)
+    _set_encoding(X, 'array', '0.2.0')
+
+    obs = f.create_group('obs')
+    _set_encoding(obs, 'dataframe', '0.2.0')
+    obs.attrs['_index'] = '_index'
+    obs.attrs['column-order'] = np.array(['condition'], dtype=object)
+    obs_names = obs.create_dataset('_index', shape=(0,), maxshape=(None,), chunks=(chunk_size,), dtype=string_dtype)
+    _set_encoding(obs_names, 'string-array', '0.2.0')
+    condition = obs.create_group('condition')
+    _set_encoding(condition, 'categorical', '0.2.0')
+    condition.attrs['ordered'] = False
+    codes = condition.create_dataset('codes', shape=(0,), maxshape=(None,), chunks=(chunk_size,), dtype=np.int8)
+    _set_encoding(codes, 'array', '0.2.0')
+    categories = condition.create_dataset('categories', data=np.array([], dtype=object), dtype=string_dtype)
+    _set_encoding(categories, 'string-array', '0.2.0')
+
+    var = f.create_group('var')
+    _set_encoding(var, 'dataframe', '0.2.0')
+    var.attrs['_index'] = '_index'
+    var.attrs['column-order'] = np.array([], dtype=float)
+    var_names = var.create_dataset('_index', data=np.array(transition_names, dtype=object), dtype=string_dtype)
+    _set_encoding(var_names, 'string-array', '0.2.0')
+
+    for key in ['layers', 'obsm', 'obsp', 'uns', 'varm', 'varp']:
+        _set_encoding(f.create_group(key), 'dict', '0.1.0')
+
+def _widen_codes(condition_group, n_categories, chunk_size):
+    """
+    Rewrite the condition codes with a wider integer dtype once the categories outgrow the current one.
+
+    Codes start as int8, the dtype anndata uses for fewer than 128 categories, and move up to
+    int16 and int32 as categories are added.
+    """
+    import numpy as np
+
+    codes = condition_group['codes']
+    if n_categories - 1 <= np.iinfo(codes.dtype).max:
+        return
+    dtype = next(dtype for dtype in (np.int16, np.int32) if n_categories - 1 <= np.iinfo(dtype).max)
+    values = codes[:]
+    del condition_group['codes']
+    codes = condition_group.create_dataset('codes', data=values.astype(dtype), maxshape=(None,), chunks=(chunk_size,), dtype=dtype)
+    _set_encoding(codes, 'array', '0.2.0')
+
+def _read_generation_state(path, condition):
+    """
+    Read the resume state of a condition from a store written by append_transitions_to_h5ad.
+
+    Parameters:
+        path (str): Path to the h5ad file.
+        condition (str): The condition metadata id.
+
+    Returns:
+        state (dict): The stored generation state, or None if the file or condition has none.
+    """
+    import os
+    import h5py
+
+    if not os.path.exists(path):
+        return None
+    with h5py.File(path, 'r') as f:
+        key = f'uns/generation_state/{condition}'
+        if key not in f:
+            return None
+        return {name: dataset[()].item() for name, dataset in f[key].items()}
+
+def _write_generation_state(f, condition, generation_state):
+    """Store the resume state of a condition in uns['generation_state'][condition]."""
+    if 'generation_state' not in f['uns']:
+        _set_encoding(f['uns'].create_group('generation_state'), 'dict', '0.1.0')
+    states = f['uns/generation_state']
+    if condition in states:
+        del states[condition]
+    state = states.create_group(condition)
+    _set_encoding(state, 'dict', '0.1.0')
+    for name, value in generation_state.items():
+        _set_encoding(state.create_dataset(name, data=value), 'numeric-scalar', '0.2.0')
+
+def append_transitions_to_h5ad(path, transition_matrices, condition, transition_names=None, generation_state=None, dtype='float64', chunk_size=4096):
+    """
+    Appends a chunk of transition matrices to an on-disk AnnData (h5ad) store.
+
+    The store is created on the first call. X, the obs names and the condition codes are
+    resizable HDF5 datasets, so chunks are written as they come and the file can be opened
+    at any point with ad.read_h5ad(path, backed='r').
+
+    Parameters:
+        path (str): Path to the h5ad file.
+        transition_matrices (np.ndarray): An (N, n, n) array (or list) of transition matrices.
+        condition (str): The condition metadata id of the chunk.
+        transition_names (list): A list of strings corresponding to the transition names. Used when the store is created. Defaults to 'i_j'.
+        generation_state (dict): Integer state stored in uns['generation_state'][condition], used to resume an interrupted run.
+        dtype (str): The dtype of X. Used when the store is created.
+        chunk_size (int): The number of rows per HDF5 chunk. Used when the store is created.
+
+    Returns:
+        n_obs (int): The number of observations in the store after the append.
+    """
+    import h5py
+    import numpy as np
+
+    transition_matrices = np.asarray(transition_matrices)
+    n_new = transition_matrices.shape[0]
+    size = transition_matrices.shape[-1]
+    rows = transition_matrices.reshape(n_new, -1)
+
+    with h5py.File(path, 'a') as f:
+        if 'X' not in f:
+            if transition_names is None:
+                transition_names = [f'{i}_{j}' for i in range(size) for j in range(size)]
+            _create_h5ad_store(f, rows.shape[1], transition_names, dtype, chunk_size)
+
+        # Register the condition as a category if it is new
+        condition_group = f['obs/condition']
+        categories = [category.decode() if isinstance(category, bytes) else category for category in condition_group['categories'][:]]
+        if condition not in categories:
+            categories.append(condition)
+            del condition_group['categories']
+            categories_dataset = condition_group.create_dataset('categories', data=np.array(categories, dtype=object), dtype=h5py.string_dtype())
+            _set_encoding(categories_dataset, 'string-array', '0.2.0')
+            _widen_codes(condition_group, len(categories), condition_group['codes'].chunks[0])
+        code = categories.index(condition)
+
+        # Grow the obs axis and write the chunk
+        X = f['X']
+        n_obs = X.shape[0]
+        X.resize(n_obs + n_new, axis=0)
+        X[n_obs:] = rows
+        obs_names = f['obs/_index']
+        obs_names.resize(n_obs + n_new, axis=0)
+        obs_names[n_obs:] = np.arange(n_obs, n_obs + n_new).astype(str).astype(object)
+        codes = condition_group['codes']
+        codes.resize(n_obs + n_new, axis=0)
+        codes[n_obs:] = code
+
+        if generation_state is not None:
+            _write_generation_state(f, condition, generation_state)
+
+        return n_obs + n_new
@@ -0,0 +1,193 @@
+#cached_transition_matrix_solutions
+
+def _default_cache_dir():
+    """The cache directory, $SMFMODEL_CACHE_DIR or ~/.cache/smfmodel/transition_matrix_solutions."""
+    import os
+
+    root = os.environ.get('SMFMODEL_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'smfmodel'))
+    return os.path.join(root, 'transition_matrix_solutions')
+
+def _cache_key(observed_proportions, variance_threshold, mask, params, seed):
+    """
+    Hash everything that determines the sequence of accepted matrices.
+
+    total_matrices is left out on purpose: for a given seed the accepted matrices of a shorter
+    run are a prefix of those of a longer one, so every length shares one entry. n_jobs and the
+    output options do not change the result either.
+
+    Returns:
+        key (str): Hex sha256 digest of the inputs and the library version.
+    """
+    import hashlib
+    import json
+    import numpy as np
+    from .._version import __version__
+
+    inputs = {
+        'version': __version__,
+        'observed_proportions': np.asarray(observed_proportions, dtype=float).tolist(),
+        'variance_threshold': np.asarray(variance_threshold, dtype=float).tolist(),
+        'mask': np.asarray(mask, dtype=bool).astype(int).tolist(),
+        'generate_T_function': params.get('generate_T_function', 'random_transition_matrix'),
+        'dirichlet_alpha': None if params.get('dirichlet_alpha', None) is None else np.asarray(params['dirichlet_alpha'], dtype=float).tolist(),
+        'batch_size': params.get('batch_size', 1024),
+        'seed': seed
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+def _evict(cache_dir, max_bytes, keep, stale_seconds=3600):
+    """
+    Delete the least recently used entries until the cache fits in max_bytes.
+
+    The modification time of an entry's .json file is its last use. The entry keep is never deleted.
+    Temporary files that have not been written to for stale_seconds are left over from crashed
+    runs and are deleted too.
+    """
+    import os
+    import time
+
+    entries = []
+    total_bytes = 0
+    for name in os.listdir(cache_dir):
+        if name.endswith('.tmp'):
+            path = os.path.join(cache_dir, name)
+            try:
+                if time.time() - os.path.getmtime(path) > stale_seconds:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass  # Finished or removed by its own run meanwhile
+            continue
+        if not name.endswith('.json'):
+            continue
+        key = name[:-len('.json')]
+        paths = [os.path.join(cache_dir, key + '.json'), os.path.join(cache_dir, key + '.npy')]
+        n_bytes = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+        entries.append((os.path.getmtime(paths[0]), key, paths, n_bytes))
+        total_bytes += n_bytes
+
+    for _, key, paths, n_bytes in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        if key == keep:
+            continue
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        total_bytes -= n_bytes
+
+def cached_transition_matrix_solutions(observed_proportions, variance_threshold, condition, params):
+    """
+    Memoized generate_transition_matrix_solutions, backed by a content-addressed cache on disk.
+
+    Entries are keyed on a sha256 hash of the observed proportions, the variance threshold, the
+    transition mask, the sampling parameters, the seed and the library version. Each entry is an
+    .npy file with every accepted matrix so far and a .json file with the (block, offset) at which
+    the search stopped. A hit is loaded with np.load(mmap_mode='r'), so it is returned without
+    reading the matrices into memory. If the entry holds fewer than total_matrices matrices, the
+    search resumes where it stopped and only the missing matrices are generated and appended.
+
+    The least recently used entries are evicted once the cache exceeds params['cache_max_bytes'].
+    Runs without a seed are not reproducible and bypass the cache.
+
+    Parameters:
+        observed_proportions (np.ndarray): The observed steady-state proportions.
+        variance_threshold (np.ndarray): Threshold of variance to determine success.
+        condition (str): String to give the tqdm progress context.
+        params (dict): The parameters of generate_transition_matrix_solutions, and:
+            cache_dir (str): Directory of the cache. Defaults to $SMFMODEL_CACHE_DIR or ~/.cache/smfmodel.
+            cache_max_bytes (int): Size bound of the cache directory. Defaults to 10 GiB.
+
+    Returns:
+        transition_matrix_solutions (list): List of successful transition matrices, read-only memory-mapped views of the cache entry.
+    """
+    import json
+    import os
+    from tqdm import tqdm
+    import numpy as np
+    from ..instrumentation import resolve_instrument
+    from .generate_transition_matrix_solutions import generate_transition_matrix_solutions, _block_sampler, _search_blocks
+    from .transition_mask import transition_mask
+
+    total_matrices = params.get('total_matrices', 1000)
+    size = params.get('size', 4)
+    allow_self_transitions = params.get('allow_self_transitions', False)
+    constrain_transitions_to_adjacent = params.get('constrain_transitions_to_adjacent', True)
+    mask = params.get('mask', None)
+    seed = params.get('seed', None)
+    n_jobs = params.get('n_jobs', 1)
+    return_array = params.get('return_array', False)
+    cache_dir = params.get('cache_dir', None) or _default_cache_dir()
+    cache_max_bytes = params.get('cache_max_bytes', 10 * 2**30)
+    stats = resolve_instrument(params.get('instrument', None), name=f'cached_transition_matrix_solutions[{condition}]')
+
+    if seed is None:
+        return generate_transition_matrix_solutions(observed_proportions, variance_threshold, condition, params)
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+
+    # Resolve the mask so that equivalent specifications share an entry
+    if mask is None:
+        mask = transition_mask(size, allow_self_transitions, constrain_transitions_to_adjacent)
+    elif not isinstance(mask, np.ndarray):
+        mask = transition_mask(graph=mask)
+    size = mask.shape[0]
+
+    key = _cache_key(observed_proportions, variance_threshold, mask, params, seed)
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, key + '.json')
+    data_path = os.path.join(cache_dir, key + '.npy')
+
+    start = (0, 0)
+    n_cached = 0
+    if os.path.exists(meta_path) and os.path.exists(data_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        start = (meta['next_block'], meta['block_offset'])
+        n_cached = meta['n_matrices']
+
+    if n_cached < total_matrices:
+        sample_block, size = _block_sampler(observed_proportions, variance_threshold, dict(params, mask=mask), seed)
+        accepted_blocks = []
+        position = start
+
+        def consume(accepted, block_position):
+            nonlocal position
+            accepted_blocks.append(accepted)
+            position = block_position
+
+        with tqdm(total=total_matrices, initial=n_cached, desc=f"Generating {total_matrices} matrices for {condition}") as pbar:
+            with stats.stage('total'):
+                _search_blocks(sample_block, total_matrices - n_cached, n_jobs, pbar, consume, start=start, stats=stats)
+        stats.event('finish', final=True)
+
+        # Write the extended entry next to the old one and swap it in
+        new_matrices = np.concatenate(accepted_blocks).reshape(-1, size, size)
+        tmp_path = data_path + f'.{os.getpid()}.tmp'
+        try:
+            extended = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=new_matrices.dtype, shape=(total_matrices, size, size))
+            if n_cached:
+                extended[:n_cached] = np.load(data_path, mmap_mode='r')[:n_cached]
+            extended[n_cached:] = new_matrices
+            extended.flush()
+            del extended
+            os.replace(tmp_path, data_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        meta = {'key': key, 'condition': condition, 'seed': seed, 'next_block': position[0], 'block_offset': position[1], 'n_matrices': total_matrices}
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+        _evict(cache_dir, cache_max_bytes, keep=key)
+    else:
+        os.utime(meta_path)  # Mark the entry as recently used
+        stats.count('cache_hits')
+
+    transition_matrix_solutions = np.load(data_path, mmap_mode='r')[:total_matrices]
+
+    if return_array:
+        return transition_matrix_solutions
+
+    return list(transition_matrix_solutions)
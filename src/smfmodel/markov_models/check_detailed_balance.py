@@ -1,24 +1,19 @@
 # check_detailed_balance
 
-def check_detailed_balance(transition_matrix, threshold):
+def check_detailed_balance(transition_matrix, threshold, steady_state=None):
     """
     Check if the transition matrix satisfies the detailed balance condition.
 
     Parameters:
         transition_matrix (np.ndarray): The transition matrix to check.
         threshold (float): The deviation from detailed balance to threshold.
+        steady_state (np.ndarray): Precomputed steady state of the transition matrix. Solved if not given.
 
     Returns:
         bool: True if detailed balance holds, False otherwise.
     """
-    from .solve_steady_state import solve_steady_state
-    
-    steady_state = solve_steady_state(transition_matrix)
-    n = len(steady_state)
+    from .check_detailed_balance_batch import check_detailed_balance_batch
 
-    for i in range(n):
-        for j in range(n):
-            deviation = (steady_state[i] * transition_matrix[i, j]) - (steady_state[j] * transition_matrix[j, i])
-            if abs(deviation) > threshold:
-                return False
-    return True
\ No newline at end of file
+    steady_states = None if steady_state is None else steady_state[None]
+
+    return bool(check_detailed_balance_batch(transition_matrix[None], threshold, steady_states)[0])
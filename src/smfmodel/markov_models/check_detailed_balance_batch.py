@@ -0,0 +1,21 @@
+# check_detailed_balance_batch
+import numpy as np
+
+def check_detailed_balance_batch(Ts, threshold, steady_states=None):
+    """
+    Check which transition matrices of a stack satisfy the detailed balance condition.
+
+    Parameters:
+        Ts (np.ndarray): Stack of transition matrices of shape (N, n, n).
+        threshold (float): The deviation from detailed balance to threshold.
+        steady_states (np.ndarray): Precomputed steady states of shape (N, n). Solved if not given.
+
+    Returns:
+        detailed_balance (np.ndarray): Boolean mask of shape (N,), True where detailed balance holds.
+    """
+    from .net_flux_batch import net_flux_batch
+
+    J = net_flux_batch(Ts, steady_states)
+    detailed_balance = np.all(np.abs(J) <= threshold, axis=(-2, -1))
+
+    return detailed_balance
@@ -0,0 +1,175 @@
+#constructive_transition_matrix_solutions
+
+def _scale_to_stationary(K, steady_states, reversible, max_iter, tol):
+    """
+    Scale positive masked kernels into stationary flux matrices with Sinkhorn iterations.
+
+    A flux matrix F with row sums and column sums both equal to pi defines the transition
+    matrix T = F / pi, whose stationary distribution is pi. With reversible=True, K is symmetric
+    and is scaled as D K D, so F is symmetric and T satisfies detailed balance.
+
+    Parameters:
+        K (np.ndarray): Stack of non-negative kernels of shape (N, n, n), zero outside the mask.
+        steady_states (np.ndarray): Target stationary distributions of shape (N, n).
+        reversible (bool): Whether to use the symmetric scaling.
+        max_iter (int): Maximum number of Sinkhorn iterations.
+        tol (float): Tolerance on the marginals.
+
+    Returns:
+        Ts (np.ndarray): Stack of transition matrices of shape (N, n, n).
+    """
+    import numpy as np
+
+    F = K.copy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if reversible:
+            d = np.ones_like(steady_states)
+            for _ in range(max_iter):
+                d = np.sqrt(d * steady_states / np.einsum('kij,kj->ki', K, d))
+                F = d[:, :, np.newaxis] * K * d[:, np.newaxis, :]
+                if np.nanmax(np.abs(F.sum(axis=-1) - steady_states)) < tol:
+                    break
+        else:
+            for _ in range(max_iter):
+                F *= (steady_states / F.sum(axis=-1))[:, :, np.newaxis]
+                F *= (steady_states / F.sum(axis=-2))[:, np.newaxis, :]
+                if np.nanmax(np.abs(F.sum(axis=-1) - steady_states)) < tol:
+                    break
+        Ts = F / F.sum(axis=-1, keepdims=True)
+
+    return Ts
+
+def constructive_transition_matrix_solutions(observed_proportions, variance_threshold, condition, params):
+    """
+    Constructs transition matrices whose steady state lies inside the variance threshold box.
+
+    Instead of rejecting random matrices, each sample first draws a stationary distribution pi
+    inside the box (observed_proportions +/- variance_threshold, on the simplex), then a random
+    kernel on the transition mask, and scales that kernel with Sinkhorn iterations into a flux
+    matrix with row and column sums pi. The resulting transition matrix has stationary
+    distribution pi by construction. Every sample is still verified with solve_steady_state_batch
+    against the threshold, as in generate_transition_matrix_solutions.
+
+    The matrices follow a different distribution from the rejection sampler: pi is drawn
+    uniformly in the box and renormalized onto the simplex, rather than induced by uniform random
+    rates. The renormalization also makes pi non-uniform over the part of the box on the simplex.
+
+    Parameters:
+        observed_proportions (np.ndarray): The observed steady-state proportions.
+        variance_threshold (np.ndarray): Threshold of variance to determine success.
+        condition (str): String to give the tqdm progress context.
+        params (dict): Map of addtional parameters to pass.
+            total_matrices (int): Number of matrices to construct. Defaults to 1000.
+            size, allow_self_transitions, constrain_transitions_to_adjacent, mask: The transition mask, as in generate_transition_matrix_solutions.
+            dirichlet_alpha (float): Draw the kernel entries from a Gamma distribution with this shape instead of uniformly. Defaults to None.
+            reversible (bool): Construct matrices that satisfy detailed balance. Defaults to False.
+            batch_size (int): Number of samples constructed per batch. Defaults to 1024.
+            max_iter (int): Maximum number of Sinkhorn iterations. Defaults to 1000.
+            tol (float): Tolerance of the Sinkhorn marginals. Defaults to 1e-12.
+            max_constructions (int): Raise a ValueError when this many draws of pi, rejected outside the box or
+                constructed and failed the verification, gave no valid matrix, as the box or the mask then likely
+                admits no steady state inside the threshold. Defaults to 10000.
+            seed (int): Seed for the random generator. Defaults to None.
+            return_array (bool): Return an (N, n, n) array instead of a list. Defaults to False.
+
+    Returns:
+        transition_matrix_solutions (list): List of successful transition matrices.
+        report (dict): Sampling report with the number of 'candidates' drawn, 'accepted' matrices,
+            the effective 'acceptance_rate' (valid matrices per candidate) and the wall time 'seconds_per_sample'.
+    """
+    import time
+    from tqdm import tqdm
+    import numpy as np
+    from .solve_steady_state_batch import solve_steady_state_batch
+    from .transition_mask import transition_mask
+
+    total_matrices = params.get('total_matrices', 1000)
+    size = params.get('size', 4)
+    allow_self_transitions = params.get('allow_self_transitions', False)
+    constrain_transitions_to_adjacent = params.get('constrain_transitions_to_adjacent', True)
+    mask = params.get('mask', None)
+    dirichlet_alpha = params.get('dirichlet_alpha', None)
+    reversible = params.get('reversible', False)
+    batch_size = params.get('batch_size', 1024)
+    max_iter = params.get('max_iter', 1000)
+    tol = params.get('tol', 1e-12)
+    max_constructions = params.get('max_constructions', 10_000)
+    seed = params.get('seed', None)
+    return_array = params.get('return_array', False)
+
+    if mask is None:
+        mask = transition_mask(size, allow_self_transitions, constrain_transitions_to_adjacent)
+    elif not isinstance(mask, np.ndarray):
+        mask = transition_mask(graph=mask)
+    if reversible:
+        mask = mask & mask.T
+    size = mask.shape[0]
+
+    observed_proportions = np.asarray(observed_proportions, dtype=float)
+    variance_threshold = np.asarray(variance_threshold, dtype=float)
+    lower = np.clip(observed_proportions - variance_threshold, 0, 1)
+    upper = np.clip(observed_proportions + variance_threshold, 0, 1)
+    if not lower.sum() <= 1 <= upper.sum():
+        # Rounded proportions that do not sum to 1 can leave the whole box off the simplex
+        raise ValueError(f"The threshold box around the observed proportions of {condition} does not intersect the simplex, "
+                         f"its lower bounds sum to {lower.sum():.6g} and its upper bounds to {upper.sum():.6g}.")
+
+    rng = np.random.default_rng(seed)
+    transition_matrix_solutions = []
+    generated_matrices = 0
+    candidates = 0
+    valid = 0
+    start_time = time.perf_counter()
+
+    with tqdm(total=total_matrices, desc=f"Constructing {total_matrices} matrices for {condition}") as pbar:
+        while generated_matrices < total_matrices:
+            # Draw stationary distributions inside the threshold box
+            steady_states = rng.uniform(lower, upper, size=(batch_size, size))
+            steady_states /= steady_states.sum(axis=1, keepdims=True)
+            in_box = np.all(np.abs(steady_states - observed_proportions) < variance_threshold, axis=1) & np.all(steady_states > 0, axis=1)
+            steady_states = steady_states[in_box]
+            candidates += batch_size
+            if not len(steady_states):
+                if not valid and candidates >= max_constructions:
+                    raise ValueError(f"No stationary distribution drawn for {condition} landed inside the threshold box after {candidates} draws.")
+                continue
+
+            # Draw kernels on the mask and scale them to the stationary distributions
+            if dirichlet_alpha is None:
+                K = rng.random((len(steady_states), size, size))
+            else:
+                K = rng.gamma(dirichlet_alpha, size=(len(steady_states), size, size))
+            K *= mask
+            if reversible:
+                K = K + np.swapaxes(K, -1, -2)
+            Ts = _scale_to_stationary(K, steady_states, reversible, max_iter, tol)
+
+            # Verify the constructed matrices like the rejection sampler does
+            finite = np.all(np.isfinite(Ts), axis=(-2, -1))
+            Ts = Ts[finite]
+            abs_delta = np.abs(solve_steady_state_batch(Ts)[0] - observed_proportions)
+            T_steady_state_within_threshold = np.all(variance_threshold - abs_delta > 0, axis=1)
+            valid += np.count_nonzero(T_steady_state_within_threshold)
+            if not valid and candidates >= max_constructions:
+                # No distribution could be reached so far, e.g. a periodic mask that forces equal mass on both sides
+                raise ValueError(f"The transition mask admits no matrices with steady states inside the threshold for {condition} after {candidates} draws.")
+
+            accepted = Ts[T_steady_state_within_threshold][:total_matrices - generated_matrices]
+            if len(accepted):
+                transition_matrix_solutions.extend(accepted)
+                generated_matrices += len(accepted)
+                pbar.set_postfix({'Matrices generated': generated_matrices})
+                pbar.update(len(accepted))
+
+    elapsed = time.perf_counter() - start_time
+    report = {
+        'candidates': candidates,
+        'accepted': generated_matrices,
+        'acceptance_rate': valid / candidates,
+        'seconds_per_sample': elapsed / max(generated_matrices, 1)
+    }
+
+    if return_array:
+        return np.array(transition_matrix_solutions).reshape(-1, size, size), report
+
+    return transition_matrix_solutions, report
@@ -0,0 +1,79 @@
+# convert_h5ad_to_transition_parameters
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+def _is_gzip(path):
+    """Whether a file is a gzip stream, from its magic bytes rather than its suffix."""
+    with open(path, 'rb') as f:
+        return f.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC
+
+def convert_h5ad_to_transition_parameters(h5ad_path, path, mask=None, dtype='float32', condition_key='condition', chunk_size=65536):
+    """
+    Converts an h5ad file of transition matrices into a save_transition_parameters store.
+
+    X is read in chunks of rows from a backed AnnData, so the matrices are never loaded whole.
+    A gzip stream is first decompressed into a temporary file next to the output, as HDF5 needs
+    random access. The file type is read from the magic bytes, since an .h5ad.gz name is also
+    used for plain HDF5 files with internal gzip compression, which are read directly. Matrices with non-zero entries outside the mask raise
+    a ValueError instead of being stored lossily.
+
+    Parameters:
+        h5ad_path (str): Path of the .h5ad or .h5ad.gz file, with X the flattened matrices as in load_transitions_into_adata.
+        path (str): Directory of the store to write.
+        mask (np.ndarray or networkx.Graph): Mask or state graph of the allowed transitions. Defaults to the
+            entries that are non-zero in any of the matrices, found in a first pass over X.
+        dtype (str): 'float64', 'float32', 'uint16' or 'uint8'. Defaults to 'float32'.
+        condition_key (str): The obs column of the conditions. Defaults to 'condition'.
+        chunk_size (int): Number of rows read and encoded at once. Defaults to 65536.
+
+    Returns:
+        path (str): The path of the store.
+    """
+    import gzip
+    import os
+    import shutil
+    import tempfile
+    import numpy as np
+    import pandas as pd
+    import anndata as ad
+    from .save_transition_parameters import _write_transition_parameters
+    from .transition_mask import transition_mask
+
+    temporary_path = None
+    if _is_gzip(h5ad_path):
+        os.makedirs(path, exist_ok=True)
+        handle, temporary_path = tempfile.mkstemp(suffix='.h5ad', dir=path)
+        with gzip.open(h5ad_path, 'rb') as source, os.fdopen(handle, 'wb') as target:
+            shutil.copyfileobj(source, target, length=2**24)
+
+    try:
+        adata = ad.read_h5ad(temporary_path or h5ad_path, backed='r')
+        n_obs, n_vars = adata.shape
+        size = int(round(np.sqrt(n_vars)))
+        if size * size != n_vars:
+            raise ValueError(f"{h5ad_path} has {n_vars} variables, which are not flattened square matrices.")
+
+        def chunks():
+            for start in range(0, n_obs, chunk_size):
+                yield np.asarray(adata.X[start:start + chunk_size]).reshape(-1, size, size)
+
+        if mask is None:
+            mask = np.zeros((size, size), dtype=bool)
+            for chunk in chunks():
+                mask |= np.any(chunk != 0, axis=0)
+        elif not isinstance(mask, np.ndarray):
+            mask = transition_mask(graph=mask)
+
+        if condition_key in adata.obs:
+            conditions = pd.Categorical(adata.obs[condition_key])
+        else:
+            conditions = pd.Categorical(np.repeat('', n_obs))
+        codes = conditions.codes.astype(np.int8 if len(conditions.categories) < 128 else np.int32)
+
+        _write_transition_parameters(path, chunks(), n_obs, mask, codes, [str(category) for category in conditions.categories], list(adata.var_names), dtype)
+        adata.file.close()
+    finally:
+        if temporary_path is not None:
+            os.remove(temporary_path)
+
+    return path
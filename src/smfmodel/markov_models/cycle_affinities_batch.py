@@ -0,0 +1,29 @@
+# cycle_affinities_batch
+import numpy as np
+
+def cycle_affinities_batch(Ts, basis=None):
+    """
+    Calculate the affinities of the fundamental cycles for a stack of transition matrices.
+
+    The affinity of a cycle is the log ratio of its forward and backward transition rate
+    products, evaluated for all matrices as a sum of per-edge log ratios.
+
+    Parameters:
+        Ts (np.ndarray): Stack of transition matrices of shape (N, n, n).
+        basis (dict): Cycle basis from fundamental_cycle_basis. Built from the transitions present in Ts if not given.
+
+    Returns:
+        affinities (np.ndarray): Cycle affinities of shape (N, C).
+    """
+    from .fundamental_cycle_basis import fundamental_cycle_basis
+
+    Ts = np.asarray(Ts, dtype=float)
+    if basis is None:
+        basis = fundamental_cycle_basis((Ts > 0).any(axis=0))
+
+    i, j = basis['edges'].T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        edge_log_ratios = np.log(Ts[:, i, j]) - np.log(Ts[:, j, i])
+        affinities = edge_log_ratios @ basis['incidence'].T
+
+    return affinities
@@ -0,0 +1,28 @@
+# cycle_fluxes_batch
+import numpy as np
+
+def cycle_fluxes_batch(Ts, basis=None, steady_states=None):
+    """
+    Calculate the steady-state fluxes through the fundamental cycles for a stack of transition matrices.
+
+    The flux of a fundamental cycle is the net flux through its chord, in the direction of the cycle.
+
+    Parameters:
+        Ts (np.ndarray): Stack of transition matrices of shape (N, n, n).
+        basis (dict): Cycle basis from fundamental_cycle_basis. Built from the transitions present in Ts if not given.
+        steady_states (np.ndarray): Precomputed steady states of shape (N, n). Solved if not given.
+
+    Returns:
+        fluxes (np.ndarray): Cycle fluxes of shape (N, C).
+    """
+    from .fundamental_cycle_basis import fundamental_cycle_basis
+    from .net_flux_batch import net_flux_batch
+
+    Ts = np.asarray(Ts, dtype=float)
+    if basis is None:
+        basis = fundamental_cycle_basis((Ts > 0).any(axis=0))
+
+    i, j = basis['edges'][basis['chords']].T
+    fluxes = net_flux_batch(Ts, steady_states)[:, i, j]
+
+    return fluxes
@@ -2,17 +2,19 @@
 import numpy as np
 from .solve_steady_state import solve_steady_state
 
-def detailed_balance_deviation(transition_matrix):
+def detailed_balance_deviation(transition_matrix, steady_state=None):
     """
     Calculate how far the transition matrix is from satisfying detailed balance.
 
     Parameters:
         transition_matrix (np.ndarray): The transition matrix to check.
+        steady_state (np.ndarray): Precomputed steady state of the transition matrix. Solved if not given.
 
     Returns:
         deviation (np.ndarray): Deviation from detailed balance
     """
-    steady_state = solve_steady_state(transition_matrix)
+    if steady_state is None:
+        steady_state = solve_steady_state(transition_matrix)
 
     deviation = steady_state[0] * transition_matrix[0, 1] - steady_state[1] * transition_matrix[1, 0]
 
@@ -2,31 +2,33 @@
 import numpy as np
 from .solve_steady_state import solve_steady_state
 
-def energy_dissipation(transition_matrix):
+def energy_dissipation(transition_matrix, steady_state=None, basis=None):
     """
     Calculate the energy dissipation rate of a system at steady state given its transition matrix.
 
+    The rate is the sum over the fundamental cycles of the cycle flux times the cycle affinity,
+    which holds for networks with any number of cycles.
+
     Parameters:
         transition_matrix (np.ndarray): The transition matrix to check.
+        steady_state (np.ndarray): Precomputed steady state of the transition matrix. Solved if not given.
+        basis (dict): Cycle basis from fundamental_cycle_basis. Built from the transitions present in the matrix if not given.
 
     Returns:
         dissipation_rate (float): The rate of energy dissipation.
     """
-    steady_state = solve_steady_state(transition_matrix)
-    n = len(steady_state)
+    from .cycle_affinities_batch import cycle_affinities_batch
+    from .cycle_fluxes_batch import cycle_fluxes_batch
+    from .fundamental_cycle_basis import fundamental_cycle_basis
 
-    # the following line only works for single-cycle systems
-    J = steady_state[0] * transition_matrix[0,1] - steady_state[1] * transition_matrix[1,0]
+    if steady_state is None:
+        steady_state = solve_steady_state(transition_matrix)
+    if basis is None:
+        basis = fundamental_cycle_basis(transition_matrix > 0)
 
-    rate_product_clockwise = 1
-    rate_product_counter_clockwise = 1
-    for i in range(n):
-            if i == n-1:
-                j = 0
-            else:
-                j = i + 1
-            rate_product_clockwise *= transition_matrix[i, j]
-            rate_product_counter_clockwise *= transition_matrix[j, i]
-    dissipation_rate = J*np.log(rate_product_clockwise/rate_product_counter_clockwise)
+    Ts = transition_matrix[np.newaxis]
+    J = cycle_fluxes_batch(Ts, basis, steady_state[np.newaxis])
+    A = cycle_affinities_batch(Ts, basis)
+    dissipation_rate = np.sum(J * A)
 
-    return dissipation_rate
\ No newline at end of file
+    return dissipation_rate
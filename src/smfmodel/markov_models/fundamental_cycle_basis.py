@@ -0,0 +1,68 @@
+# fundamental_cycle_basis
+from functools import lru_cache
+import numpy as np
+
+@lru_cache(maxsize=128)
+def _fundamental_cycle_basis(size, mask_bytes):
+    """Compute the fundamental cycle basis of a packed (size, size) mask. Cached on the mask."""
+    import networkx as nx
+
+    mask = np.frombuffer(mask_bytes, dtype=bool).reshape(size, size)
+    # Undirected state graph without self-transitions
+    linked = (mask | mask.T) & ~np.eye(size, dtype=bool)
+    edges = np.argwhere(np.triu(linked))
+    edge_index = {(i, j): e for e, (i, j) in enumerate(edges.tolist())}
+
+    graph = nx.Graph()
+    graph.add_nodes_from(range(size))
+    graph.add_edges_from(edges.tolist())
+    tree = nx.minimum_spanning_tree(graph)
+
+    # Every edge outside the spanning tree (chord) closes one fundamental cycle
+    chords = [e for e, (i, j) in enumerate(edges.tolist()) if not tree.has_edge(i, j)]
+    cycles = []
+    incidence = np.zeros((len(chords), len(edges)), dtype=float)
+    for c, e in enumerate(chords):
+        i, j = edges[e]
+        # Orient the cycle along the chord i -> j and return to i through the tree
+        cycle = [int(i)] + nx.shortest_path(tree, int(j), int(i))
+        cycles.append(cycle[:-1])
+        for a, b in zip(cycle[:-1], cycle[1:]):
+            incidence[c, edge_index[(min(a, b), max(a, b))]] = 1 if a < b else -1
+
+    basis = {
+        'edges': edges,
+        'chords': np.array(chords, dtype=int),
+        'cycles': cycles,
+        'incidence': incidence
+    }
+    for value in (basis['edges'], basis['chords'], basis['incidence']):
+        value.setflags(write=False)
+
+    return basis
+
+def fundamental_cycle_basis(mask):
+    """
+    Computes the fundamental cycle basis of a state graph (Schnakenberg network theory).
+
+    A spanning tree of the undirected state graph is chosen, and each edge outside it (chord)
+    closes one fundamental cycle. The basis only depends on the topology, so it is cached and
+    shared by every stack of matrices with the same mask.
+
+    Parameters:
+        mask (np.ndarray or networkx.Graph): Boolean (n, n) mask of the allowed transitions, or a state graph.
+
+    Returns:
+        basis (dict): The read-only cycle basis:
+            'edges' (np.ndarray): (E, 2) array of the undirected edges (i, j), i < j.
+            'chords' (np.ndarray): (C,) indices into edges of the chord of each cycle. Cycle c is oriented along its chord i -> j.
+            'cycles' (list): The states visited by each cycle, starting with its chord.
+            'incidence' (np.ndarray): (C, E) signed incidence of the edges in each cycle, +1 when traversed as i -> j.
+    """
+    from .transition_mask import transition_mask
+
+    if not isinstance(mask, np.ndarray):
+        mask = transition_mask(graph=mask)
+    mask = np.ascontiguousarray(mask, dtype=bool)
+
+    return _fundamental_cycle_basis(mask.shape[0], mask.tobytes())
@@ -1,49 +1,289 @@
 #generate_transition_matrix_solutions
 
-def generate_transition_matrix_solutions(observed_proportions, variance_threshold, condition, params):
+def _sample_block(block_index, entropy, observed_proportions, variance_threshold, batch_size, generate_T_function_str, generate_T_kwargs, instrument=False):
     """
-    Generates transition matrices for given observed proportions and variance thresholds.
+    Draw one block of candidate matrices from its own SeedSequence child stream and keep the accepted ones.
 
     Parameters:
+        block_index (int): Index of the block. Selects the SeedSequence child stream.
+        entropy (int): Root entropy of the SeedSequence.
         observed_proportions (np.ndarray): The observed steady-state proportions.
         variance_threshold (np.ndarray): Threshold of variance to determine success.
-        condition (str): String to give the tqdm progress context.
-        params (dict): Map of addtional parameters to pass.
+        batch_size (int): Number of candidate matrices in the block.
+        generate_T_function_str (str): Name of the matrix generating function.
+        generate_T_kwargs (dict): Keyword arguments for the matrix generating function.
+        instrument (bool): Whether to record the stage timings and rejection counts of the block.
 
     Returns:
-        transition_matrix_solutions (list): List of successful transition matrices.
+        block_index (int): Index of the block.
+        accepted (np.ndarray): The accepted matrices of the block, in draw order.
+        block_stats (dict): The RunStats.as_dict() of the block, or None without instrument.
     """
-    from tqdm import tqdm
     import numpy as np
+    from ..instrumentation import RunStats, NULL_STATS
     from .random_transition_matrix import random_transition_matrix
-    from .solve_steady_state import solve_steady_state
+    from .solve_steady_state_batch import solve_steady_state_batch
 
     function_dict = {
         "random_transition_matrix": random_transition_matrix
     }
+    generate_T_function = function_dict[generate_T_function_str]
+
+    stats = RunStats() if instrument else NULL_STATS
+
+    rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(block_index,)))
+    with stats.stage('generate'):
+        Ts = generate_T_function(n_matrices=batch_size, rng=rng, **generate_T_kwargs)  # Generate a batch of random transition matrices
+    with stats.stage('solve_steady_state'):
+        steady_states, ill_conditioned = solve_steady_state_batch(Ts)  # Calculate steady-state proportions for the whole batch
+    with stats.stage('filter'):
+        abs_delta = np.abs(steady_states - observed_proportions) # Get the difference between the observed proportions and the T-steady states
+        variance_test = variance_threshold - abs_delta # Substract the difference from the variance threshold
+        T_steady_state_within_threshold = np.all(variance_test > 0, axis=1) # Mask of the solutions within threshold
+
+    if not stats.enabled:
+        return block_index, Ts[T_steady_state_within_threshold], None
+
+    # Which threshold components reject the candidates, and how many at once
+    rejected_components = ~(variance_test > 0)
+    stats.count('candidates', batch_size)
+    stats.count('accepted', np.count_nonzero(T_steady_state_within_threshold))
+    stats.count('ill_conditioned', np.count_nonzero(ill_conditioned))
+    stats.histogram('rejections_per_state', rejected_components.sum(axis=0))
+    stats.histogram('rejected_components', np.bincount(rejected_components.sum(axis=1), minlength=len(observed_proportions) + 1))
+
+    return block_index, Ts[T_steady_state_within_threshold], stats.as_dict()
+
+def _search_blocks(sample_block, total_matrices, n_jobs, pbar, consume, start=(0, 0), stats=None):
+    """
+    Run blocks of the rejection sampler in block order until total_matrices have been accepted.
+
+    Blocks are folded into the result strictly in block order, so the accepted matrices
+    do not depend on how many workers evaluated the blocks.
+
+    Parameters:
+        sample_block (callable): Maps a block index to (block_index, accepted matrices, block stats).
+        total_matrices (int): Number of matrices to accept.
+        n_jobs (int): Number of worker processes.
+        pbar (tqdm): Progress bar to advance with the accepted matrices.
+        consume (callable): Called as consume(accepted, position) with the accepted matrices of each block, in order.
+            position is the (block, offset) at which the search resumes after them.
+        start (tuple): The (block, offset) to start from. The first offset accepted matrices of the block are skipped.
+        stats (RunStats): Stats to merge the block stats of the folded blocks into. Defaults to None.
+
+    Returns:
+        position (tuple): The (block, offset) at which the search resumes.
+    """
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    from ..instrumentation import NULL_STATS
+
+    stats = NULL_STATS if stats is None else stats
+    generated_matrices = 0
+    next_block, offset = start
+    position = start
+
+    def fold(block_index, accepted, block_stats):
+        nonlocal generated_matrices, position
+        skip = offset if block_index == start[0] else 0
+        accepted = accepted[skip:]
+        taken = accepted[:total_matrices - generated_matrices]
+        if len(taken) < len(accepted):
+            position = (block_index, skip + len(taken))
+        else:
+            position = (block_index + 1, 0)
+        generated_matrices += len(taken)
+        consume(taken, position)
+        if block_stats is not None:
+            stats.merge(block_stats)
+            stats.count('blocks')
+            stats.count('matrices', len(taken))
+            stats.event('block')
+        if len(taken):
+            pbar.update(len(taken))  # Update progress bar for the successful matrices of the block
+            pbar.set_postfix({'Matrices generated': generated_matrices})
+
+    if n_jobs == 1:
+        while generated_matrices < total_matrices:
+            fold(*sample_block(next_block))
+            next_block += 1
+        return position
+
+    completed = {}
+    submitted_block = next_block
+    executor = ProcessPoolExecutor(max_workers=n_jobs)
+    try:
+        pending = set()
+        while generated_matrices < total_matrices:
+            # Keep every worker busy with a short queue of upcoming blocks
+            while len(pending) < 2 * n_jobs:
+                pending.add(executor.submit(sample_block, submitted_block))
+                submitted_block += 1
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                block_index, accepted, block_stats = future.result()
+                completed[block_index] = (accepted, block_stats)
+            # Fold the contiguous prefix of completed blocks
+            while next_block in completed and generated_matrices < total_matrices:
+                fold(next_block, *completed.pop(next_block))
+                next_block += 1
+    finally:
+        # Stop all workers together once enough matrices were accepted
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return position
+
+def _block_sampler(observed_proportions, variance_threshold, params, seed):
+    """
+    Bind the block sampler of generate_transition_matrix_solutions to its inputs.
+
+    The mask of allowed transitions is built once here and shipped with every block.
+
+    Parameters:
+        observed_proportions (np.ndarray): The observed steady-state proportions.
+        variance_threshold (np.ndarray): Threshold of variance to determine success.
+        params (dict): The parameters of generate_transition_matrix_solutions.
+        seed (int): Root entropy of the SeedSequence.
+
+    Returns:
+        sample_block (callable): Picklable map of a block index to (block_index, accepted matrices, block stats).
+        size (int): Number of states.
+    """
+    from functools import partial
+    import numpy as np
+    from .transition_mask import transition_mask
 
-    total_matrices = params.get('total_matrices', 1000)
     size = params.get('size', 4)
     allow_self_transitions = params.get('allow_self_transitions', False)
     constrain_transitions_to_adjacent = params.get('constrain_transitions_to_adjacent', True)
     generate_T_function_str = params.get('generate_T_function', 'random_transition_matrix')
-    generate_T_function = function_dict[generate_T_function_str]
+    batch_size = params.get('batch_size', 1024)
+    mask = params.get('mask', None)
+    dirichlet_alpha = params.get('dirichlet_alpha', None)
+    instrument = params.get('instrument', None) not in (None, False)
 
-    transition_matrix_solutions = []
-    generated_matrices = 0
-    
-    with tqdm(total=total_matrices, desc=f"Generating {total_matrices} matrices for {condition}") as pbar:
-        while generated_matrices < total_matrices:
-            T = generate_T_function(size=size, allow_self_transitions=allow_self_transitions, constrain_transitions_to_adjacent=constrain_transitions_to_adjacent)  # Generate a random transition matrix
-            steady_state = solve_steady_state(T)  # Calculate steady-state proportions
-            abs_delta = np.abs(steady_state - observed_proportions) # Get the difference between the observed proportions and the T-steady state
-            variance_test = variance_threshold - abs_delta # Substract the difference from the variance threshold
-            T_steady_state_within_threshold = np.all(variance_test > 0) # If the solution is within threshold, variable is True
-            
-            if T_steady_state_within_threshold:
-                transition_matrix_solutions.append(T)
-                generated_matrices += 1
-                pbar.set_postfix({'Matrices generated': generated_matrices})
-                pbar.update(1)  # Update progress bar for each successful matrix generation
-    
-    return transition_matrix_solutions
\ No newline at end of file
+    if mask is None:
+        mask = transition_mask(size, allow_self_transitions, constrain_transitions_to_adjacent)
+    elif not isinstance(mask, np.ndarray):
+        mask = transition_mask(graph=mask)
+
+    generate_T_kwargs = {
+        "mask": mask,
+        "dirichlet_alpha": dirichlet_alpha
+    }
+    sample_block = partial(_sample_block, entropy=seed, observed_proportions=np.asarray(observed_proportions), variance_threshold=np.asarray(variance_threshold), batch_size=batch_size, generate_T_function_str=generate_T_function_str, generate_T_kwargs=generate_T_kwargs, instrument=instrument)
+
+    return sample_block, mask.shape[0]
+
+def generate_transition_matrix_solutions(observed_proportions, variance_threshold, condition, params):
+    """
+    Generates transition matrices for given observed proportions and variance thresholds.
+
+    Candidate matrices are drawn in blocks of params['batch_size'] as an (N, n, n) stack,
+    their steady states are solved in one stacked call and each block is filtered with a
+    single threshold mask. Block k draws from child k of a np.random.SeedSequence, and blocks
+    are accepted in block order, so for a given seed the result does not depend on n_jobs.
+
+    With params['output_path'] the accepted matrices are streamed in chunks into an on-disk
+    AnnData store (see append_transitions_to_h5ad) instead of being held in memory. The store
+    records where the search stopped, so rerunning with the same path resumes an interrupted
+    run, or extends a finished one when total_matrices is increased.
+
+    Parameters:
+        observed_proportions (np.ndarray): The observed steady-state proportions.
+        variance_threshold (np.ndarray): Threshold of variance to determine success.
+        condition (str): String to give the tqdm progress context.
+        params (dict): Map of addtional parameters to pass.
+            batch_size (int): Number of candidate matrices to draw per block. Defaults to 1024.
+            seed (int): Seed of the SeedSequence, for reproducible runs. Defaults to a draw from the global np.random state,
+                or to the seed stored in the output_path store when resuming.
+            n_jobs (int): Number of worker processes to spread the blocks over. -1 uses all cores. Defaults to 1.
+            return_array (bool): Return an (N, n, n) array instead of a list. Defaults to False.
+            output_path (str): Path of an h5ad store to stream the accepted matrices into. Defaults to None.
+            chunk_size (int): Number of accepted matrices per write to output_path. Defaults to 4096.
+            transition_names (list): Var names of the output_path store. Defaults to 'i_j'.
+            dtype (str): Dtype of X in the output_path store. Defaults to 'float64'.
+            mask (np.ndarray or networkx.Graph): Mask or state graph of the allowed transitions. Overrides size,
+                allow_self_transitions and constrain_transitions_to_adjacent. Defaults to None.
+            dirichlet_alpha (float): Draw Dirichlet distributed rows with this concentration. Defaults to None.
+            instrument (RunStats, callable or bool): Record stage timings, candidate and acceptance counters and
+                per-state rejection histograms, see smfmodel.instrumentation.RunStats. Defaults to None.
+
+    Returns:
+        transition_matrix_solutions (list): List of successful transition matrices, or output_path when streaming.
+    """
+    import os
+    from tqdm import tqdm
+    import numpy as np
+    from ..instrumentation import resolve_instrument
+    from .append_transitions_to_h5ad import append_transitions_to_h5ad, _read_generation_state
+
+    total_matrices = params.get('total_matrices', 1000)
+    batch_size = params.get('batch_size', 1024)
+    seed = params.get('seed', None)
+    n_jobs = params.get('n_jobs', 1)
+    return_array = params.get('return_array', False)
+    output_path = params.get('output_path', None)
+    chunk_size = params.get('chunk_size', 4096)
+    transition_names = params.get('transition_names', None)
+    dtype = params.get('dtype', 'float64')
+    stats = resolve_instrument(params.get('instrument', None), name=f'generate_transition_matrix_solutions[{condition}]')
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+
+    # Resume from the state stored with the matrices already on disk
+    start = (0, 0)
+    n_stored = 0
+    state = None if output_path is None else _read_generation_state(output_path, condition)
+    if state is not None:
+        if seed is None:
+            seed = state['seed']
+        if state['seed'] != seed or state['batch_size'] != batch_size:
+            raise ValueError(f"{output_path} holds matrices for {condition} generated with a different seed or batch_size.")
+        start = (state['next_block'], state['block_offset'])
+        n_stored = state['n_matrices']
+
+    if seed is None:
+        seed = int(np.random.randint(0, 2**32, dtype=np.uint64))
+
+    sample_block, size = _block_sampler(observed_proportions, variance_threshold, params, seed)
+
+    accepted_blocks = []
+    position = start
+
+    def flush():
+        nonlocal n_stored
+        if not accepted_blocks:
+            return
+        chunk = np.concatenate(accepted_blocks)
+        n_stored += len(chunk)
+        generation_state = {'seed': seed, 'batch_size': batch_size, 'next_block': position[0], 'block_offset': position[1], 'n_matrices': n_stored}
+        with stats.stage('write'):
+            append_transitions_to_h5ad(output_path, chunk, condition, transition_names=transition_names, generation_state=generation_state, dtype=dtype, chunk_size=chunk_size)
+        accepted_blocks.clear()
+
+    def consume(accepted, block_position):
+        nonlocal position
+        accepted_blocks.append(accepted)
+        position = block_position
+        if output_path is not None and sum(len(block) for block in accepted_blocks) >= chunk_size:
+            flush()
+
+    with tqdm(total=total_matrices, initial=min(n_stored, total_matrices), desc=f"Generating {total_matrices} matrices for {condition}") as pbar:
+        if n_stored < total_matrices:
+            with stats.stage('total'):
+                _search_blocks(sample_block, total_matrices - n_stored, n_jobs, pbar, consume, start=start, stats=stats)
+
+    if output_path is not None:
+        flush()
+        stats.event('finish', final=True)
+        return output_path
+
+    stats.event('finish', final=True)
+
+    transition_matrix_solutions = np.concatenate(accepted_blocks + [np.empty((0, size, size))]).reshape(-1, size, size)
+
+    if return_array:
+        return transition_matrix_solutions
+
+    return list(transition_matrix_solutions)
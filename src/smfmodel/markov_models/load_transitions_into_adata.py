@@ -1,31 +1,55 @@
 # load_transitions_into_adata
 
-def load_transitions_into_adata(transition_matrix_solutions, transition_names, condition):
+def load_transitions_into_adata(transition_matrix_solutions, transition_names, condition, dtype=None):
     """
-    Loads a list of transition matrices into an AnnData object.
-    
+    Loads transition matrices into an AnnData object.
+
+    An (N, n, n) array is flattened with a reshape, so X is a view of the input when no dtype
+    conversion is needed. Several conditions are merged by passing a list of conditions and a
+    matching list of matrix stacks, which are copied once into a preallocated X.
+
     Parameters:
-        transition_matrix_solutions (list): A list of ndarrays.
+        transition_matrix_solutions (np.ndarray or list): An (N, n, n) array or a list of ndarrays.
+            A list of those, one per condition, if condition is a list.
         transition_names (list): A list of strings corresponding to the transition names.
-        condition (str): The condition metadata id
-        
+        condition (str or list): The condition metadata id, or a list of them.
+        dtype (str): The dtype of X, e.g. 'float32'. Defaults to the dtype of the matrices.
+
     Returns:
         adata (AnnData): An anndata object
-        
+
     """
     import numpy as np
+    import pandas as pd
     import anndata as ad
-    
-    transitions_list = []
-    
-    for matrix in transition_matrix_solutions:
-        h = np.hstack(matrix) # Flatten the matrix
-        transitions_list.append(h) # Add to the transition list
-        
-    transitions_matrix = np.array(transitions_list) # Turn the transtion list into an ndarray
-    adata = ad.AnnData(transitions_matrix) # Build an AnnData around the ndarray
-    adata.var_names = transition_names # Give names to the transitions
-    adata.obs['condition'] = [condition] * adata.shape[0] # Add metadata
-    adata.obs['condition'] = adata.obs['condition'].astype('category')
-    
-    return adata
\ No newline at end of file
+
+    if isinstance(condition, (list, tuple)):
+        conditions = list(condition)
+        stacks = [np.asarray(matrices) for matrices in transition_matrix_solutions]
+    else:
+        conditions = [condition]
+        stacks = [np.asarray(transition_matrix_solutions)]
+
+    counts = [stack.shape[0] for stack in stacks]
+    n_transitions = len(transition_names)
+
+    if len(stacks) == 1:
+        # Flatten every matrix with a single reshape, a view for C-contiguous input
+        transitions_matrix = stacks[0].reshape(counts[0], n_transitions)
+        if dtype is not None:
+            transitions_matrix = transitions_matrix.astype(dtype, copy=False)
+    else:
+        # Copy each condition once into the preallocated merged matrix
+        transitions_matrix = np.empty((sum(counts), n_transitions), dtype=dtype or np.result_type(*stacks))
+        row = 0
+        for stack, count in zip(stacks, counts):
+            transitions_matrix[row:row + count] = stack.reshape(count, n_transitions)
+            row += count
+
+    # Build the categorical condition metadata directly from codes
+    codes = np.repeat(np.arange(len(conditions), dtype=np.int8 if len(conditions) < 128 else np.int32), counts)
+    obs = pd.DataFrame({'condition': pd.Categorical.from_codes(codes, categories=conditions)}, index=np.arange(len(codes)).astype(str))
+
+    adata = ad.AnnData(transitions_matrix, obs=obs, var=pd.DataFrame(index=transition_names)) # Build an AnnData around the ndarray
+
+    return adata
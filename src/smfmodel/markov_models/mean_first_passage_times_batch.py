@@ -0,0 +1,35 @@
+# mean_first_passage_times_batch
+import numpy as np
+
+def mean_first_passage_times_batch(Qs):
+    """
+    Calculate the mean first-passage times between all states for a stack of rate matrices.
+
+    With the fundamental matrix Z = (1 pi - Q)^-1, the mean time to first reach state j from
+    state i is m_ij = (Z_jj - Z_ij) / pi_j. The stationary mode of Q is an eigenvalue 1 of
+    1 pi - Q and every other mode lambda_k an eigenvalue -lambda_k, so Z is read off the
+    eigendecomposition as V diag(1, -1 / lambda_k) V^-1 without a further inversion.
+
+    Parameters:
+        Qs (np.ndarray or dict): Stack of rate matrices of shape (N, n, n), or their rate_eigendecomposition_batch.
+
+    Returns:
+        mean_first_passage_times (np.ndarray): (N, n, n) mean first-passage times, with zeros on the diagonal.
+            The mean return time to j is 1 / (pi_j * -Q_jj).
+    """
+    from .rate_eigendecomposition_batch import _rate_decomposition
+
+    decomposition = _rate_decomposition(Qs)
+    eigenvalues = decomposition['eigenvalues']
+    steady_states = decomposition['steady_states']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse_eigenvalues = -1 / eigenvalues
+    inverse_eigenvalues[:, 0] = 1  # The stationary mode
+    Z = np.einsum('nik,nk,nkj->nij', decomposition['right'], inverse_eigenvalues, decomposition['left'], optimize=True).real
+
+    diagonal = np.diagonal(Z, axis1=-2, axis2=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_first_passage_times = (diagonal[:, np.newaxis, :] - Z) / steady_states[:, np.newaxis, :]
+
+    return mean_first_passage_times
@@ -0,0 +1,24 @@
+# net_flux_batch
+import numpy as np
+
+def net_flux_batch(Ts, steady_states=None):
+    """
+    Calculate the steady-state net probability fluxes for a stack of transition matrices.
+
+    Parameters:
+        Ts (np.ndarray): Stack of transition matrices of shape (N, n, n).
+        steady_states (np.ndarray): Precomputed steady states of shape (N, n). Solved if not given.
+
+    Returns:
+        J (np.ndarray): Net fluxes J[k, i, j] = pi_i T_ij - pi_j T_ji of shape (N, n, n).
+    """
+    from .solve_steady_state_batch import solve_steady_state_batch
+
+    Ts = np.asarray(Ts, dtype=float)
+    if steady_states is None:
+        steady_states = solve_steady_state_batch(Ts)[0]
+
+    one_way_flux = steady_states[:, :, np.newaxis] * Ts
+    J = one_way_flux - np.swapaxes(one_way_flux, -1, -2)
+
+    return J
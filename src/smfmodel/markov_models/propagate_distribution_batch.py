@@ -0,0 +1,32 @@
+# propagate_distribution_batch
+import numpy as np
+
+def propagate_distribution_batch(Qs, initial_distributions, times):
+    """
+    Propagate state distributions over a time grid for a stack of rate matrices.
+
+    p(t) = p(0) exp(Q t) = ((p(0) V) * exp(lambda t)) V^-1 is evaluated for every matrix and
+    time point with one batched product over the eigendecomposition, instead of one scipy.linalg.expm call
+    per matrix and time point.
+
+    Parameters:
+        Qs (np.ndarray or dict): Stack of rate matrices of shape (N, n, n), or their rate_eigendecomposition_batch.
+        initial_distributions (np.ndarray): (n,) distribution shared by every matrix, or (N, n) one per matrix.
+        times (np.ndarray): (T,) time points.
+
+    Returns:
+        distributions (np.ndarray): (N, T, n) distributions, the expected occupancy of every state at every time.
+    """
+    from .rate_eigendecomposition_batch import _rate_decomposition
+
+    decomposition = _rate_decomposition(Qs)
+    eigenvalues = decomposition['eigenvalues']
+    initial_distributions = np.broadcast_to(np.asarray(initial_distributions, dtype=float), eigenvalues.shape)
+    times = np.asarray(times, dtype=float)
+
+    # Coordinates of p(0) in the eigenbasis, then every time point at once
+    coefficients = np.einsum('ni,nik->nk', initial_distributions, decomposition['right'])
+    decay = np.exp(eigenvalues[:, np.newaxis, :] * times[np.newaxis, :, np.newaxis])
+    distributions = (coefficients[:, np.newaxis, :] * decay) @ decomposition['left']
+
+    return distributions.real
@@ -1,7 +1,7 @@
 # random_transition_matrix
 import numpy as np
 
-def random_transition_matrix(size=4, allow_self_transitions=False, constrain_transitions_to_adjacent=True):
+def random_transition_matrix(size=4, allow_self_transitions=False, constrain_transitions_to_adjacent=True, n_matrices=None, rng=None, mask=None, dirichlet_alpha=None):
     """
     Creates a random kinetic transition matrix of given size with values between 0 and 1, 
     where the diagonal is zero (no self-transitions).
@@ -9,29 +9,44 @@ def random_transition_matrix(size=4, allow_self_transitions=False, constrain_tra
     Parameters:
         size (int):
         allow_self_transitions (bool):
-        constrain_transitions_to_adjacent (bool):
+        constrain_transitions_to_adjacent (bool): Only allow transitions between neighbouring states of the ring 0 -> 1 -> ... -> size-1 -> 0.
+        n_matrices (int): If given, draw a stack of this many matrices at once.
+        rng (np.random.Generator): Random generator to draw from. Defaults to the global np.random state.
+        mask (np.ndarray or networkx.Graph): Boolean (size, size) mask of the allowed transitions, or a state graph.
+            Overrides size, allow_self_transitions and constrain_transitions_to_adjacent. See transition_mask.
+        dirichlet_alpha (float or np.ndarray): If given, draw each row from a Dirichlet distribution over its allowed
+            transitions with this concentration, instead of normalizing uniform draws.
 
     Returns:
-        matrix (np.ndarray): A square transition matrix
+        matrix (np.ndarray): A square transition matrix, or an (n_matrices, size, size) stack of them
 
     """
+    from .transition_mask import transition_mask
 
-    # Create a random matrix of variable 'size' with values between 0 and 1
-    matrix = np.random.rand(size, size)
-    
-    if allow_self_transitions:
-        pass
+    random = np.random if rng is None else rng
+
+    if mask is None:
+        mask = transition_mask(size, allow_self_transitions, constrain_transitions_to_adjacent)
+    elif not isinstance(mask, np.ndarray):
+        mask = transition_mask(graph=mask)
+    mask = mask.astype(bool)
+    size = mask.shape[0]
+    if not mask.any(axis=1).all():
+        raise ValueError("Every state needs at least one allowed transition.")
+
+    shape = (size, size) if n_matrices is None else (n_matrices, size, size)
+
+    if dirichlet_alpha is None:
+        # Create a random matrix of variable 'size' with values between 0 and 1
+        matrix = random.random(shape)
     else:
-        # Set diagonal to zero (no self-transitions)
-        np.fill_diagonal(matrix, 0)
-    
-    if constrain_transitions_to_adjacent:
-        for i in range(size):
-            for j in range(size):
-                if np.abs(i-j) == 2: # This only works by 4X4 matrices
-                    matrix[i, j] = 0
-                
-    row_sums = matrix.sum(axis=1, keepdims=True)  # Calculate row sums
+        # Normalized Gamma draws give Dirichlet distributed rows
+        matrix = random.gamma(np.broadcast_to(dirichlet_alpha, shape))
+
+    # Zero the forbidden transitions
+    matrix = matrix * mask
+
+    row_sums = matrix.sum(axis=-1, keepdims=True)  # Calculate row sums
     matrix = matrix / row_sums  # Normalize rows to sum to 1
     
-    return matrix
\ No newline at end of file
+    return matrix
@@ -0,0 +1,63 @@
+# rate_eigendecomposition_batch
+import numpy as np
+
+def _rate_decomposition(Qs):
+    """The eigendecomposition of Qs, computed unless Qs already is the dict of rate_eigendecomposition_batch."""
+    if isinstance(Qs, dict):
+        return Qs
+    return rate_eigendecomposition_batch(Qs)
+
+def rate_eigendecomposition_batch(Qs, cond_threshold=1e12):
+    """
+    Eigendecompose a stack of rate matrices once, for reuse in time propagation and spectra.
+
+    Q = V diag(lambda) V^-1, so exp(Q t) = V diag(exp(lambda t)) V^-1 for every t. Keeping V,
+    V^-1 and lambda means propagate_distribution_batch, relaxation_spectrum_batch and
+    mean_first_passage_times_batch only do batched array products, with no scipy.linalg.expm
+    call per matrix or time point. Pass the returned dict to those functions instead of the
+    rate matrices to reuse it.
+
+    The eigenvalues are ordered by decreasing real part, so the stationary eigenvalue 0 comes
+    first. The steady states are solved with solve_steady_state_batch on the uniformized chain
+    I + Q / max(-Q_ii).
+
+    Parameters:
+        Qs (np.ndarray): Stack of rate matrices of shape (N, n, n), e.g. from rate_matrix_batch.
+        cond_threshold (float): Condition number of V above which a matrix is flagged, e.g. when Q is not diagonalizable.
+
+    Returns:
+        decomposition (dict): Dict with
+            'eigenvalues' (np.ndarray): (N, n) complex eigenvalues.
+            'right' (np.ndarray): (N, n, n) right eigenvectors V, as columns.
+            'left' (np.ndarray): (N, n, n) V^-1, with the left eigenvectors as rows.
+            'steady_states' (np.ndarray): (N, n) steady states.
+            'ill_conditioned' (np.ndarray): (N,) mask of the matrices with a singular or ill-conditioned V or steady state.
+    """
+    from .solve_steady_state_batch import solve_steady_state_batch
+
+    Qs = np.asarray(Qs, dtype=float)
+    N, n, _ = Qs.shape
+
+    eigenvalues, right = np.linalg.eig(Qs)
+    order = np.argsort(-eigenvalues.real, axis=1, kind='stable')
+    eigenvalues = np.take_along_axis(eigenvalues, order, axis=1)
+    right = np.take_along_axis(right, order[:, np.newaxis, :], axis=2)
+
+    with np.errstate(all='ignore'):
+        condition_number = np.linalg.cond(right)
+    ill_conditioned = ~(condition_number < cond_threshold)
+    left = np.full_like(right, np.nan)
+    left[~ill_conditioned] = np.linalg.inv(right[~ill_conditioned])
+
+    # Uniformize so the steady states come from the same solver as for transition matrices
+    exit_rates = np.max(-np.diagonal(Qs, axis1=-2, axis2=-1), axis=1)
+    exit_rates[exit_rates <= 0] = 1
+    steady_states, steady_state_ill_conditioned = solve_steady_state_batch(np.eye(n) + Qs / exit_rates[:, np.newaxis, np.newaxis])
+
+    return {
+        'eigenvalues': eigenvalues,
+        'right': right,
+        'left': left,
+        'steady_states': steady_states,
+        'ill_conditioned': ill_conditioned | steady_state_ill_conditioned
+    }
@@ -0,0 +1,21 @@
+# rate_matrix_batch
+import numpy as np
+
+def rate_matrix_batch(Ts, dt=1.0):
+    """
+    Convert a stack of transition matrices into continuous-time rate matrices.
+
+    A transition matrix T is read as the probabilities of one time step dt, so the generator
+    is Q = (T - I) / dt. Off-diagonal rates are T_ij / dt and every row sums to zero. Q has
+    the same steady state as T, and T = I + Q dt maps it back. Stacks from
+    generate_transition_matrix_solutions or its variants can therefore be used directly.
+
+    Parameters:
+        Ts (np.ndarray): Stack of transition matrices of shape (N, n, n), or a single (n, n) matrix.
+        dt (float): Duration of one step of T. Defaults to 1.
+
+    Returns:
+        Qs (np.ndarray): Rate matrices of the same shape as Ts.
+    """
+    Ts = np.asarray(Ts, dtype=float)
+    return (Ts - np.eye(Ts.shape[-1])) / dt
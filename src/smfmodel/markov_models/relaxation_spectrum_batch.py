@@ -0,0 +1,34 @@
+# relaxation_spectrum_batch
+import numpy as np
+
+def relaxation_spectrum_batch(Qs):
+    """
+    Calculate the relaxation spectrum for a stack of rate matrices.
+
+    Every non-stationary eigenvalue lambda_k of Q is a mode that decays with the relaxation
+    time tau_k = -1 / Re(lambda_k) and oscillates with the angular frequency Im(lambda_k),
+    which is non-zero for chains out of detailed balance. Modes are ordered from slowest to fastest.
+
+    Parameters:
+        Qs (np.ndarray or dict): Stack of rate matrices of shape (N, n, n), or their rate_eigendecomposition_batch.
+
+    Returns:
+        spectrum (dict): Dict with
+            'relaxation_times' (np.ndarray): (N, n - 1) relaxation times, infinite for further stationary modes of reducible chains.
+            'frequencies' (np.ndarray): (N, n - 1) angular frequencies of the modes.
+            'spectral_gap' (np.ndarray): (N,) rate of the slowest mode, -Re(lambda_1).
+    """
+    from .rate_eigendecomposition_batch import _rate_decomposition
+
+    # The stationary eigenvalue comes first in the decomposition
+    modes = _rate_decomposition(Qs)['eigenvalues'][:, 1:]
+    rates = np.clip(-modes.real, 0, None)
+
+    with np.errstate(divide='ignore'):
+        relaxation_times = 1 / rates
+
+    return {
+        'relaxation_times': relaxation_times,
+        'frequencies': np.abs(modes.imag),
+        'spectral_gap': rates[:, 0]
+    }
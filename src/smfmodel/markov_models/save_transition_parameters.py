@@ -0,0 +1,200 @@
+# save_transition_parameters
+
+_QUANTIZATION_LEVELS = {'uint8': 2**8 - 1, 'uint16': 2**16 - 1}
+
+def _encode_parameters(transition_matrices, mask, dtype):
+    """
+    Keep the free parameters of a stack of matrices on a mask.
+
+    The free parameters are the allowed transitions of every row except the reference one (see
+    transition_logits._logit_layout), since each row sums to 1. Float dtypes store the
+    probabilities themselves; uint8 and uint16 quantize them to evenly spaced levels on [0, 1].
+
+    Returns:
+        parameters (np.ndarray): (N, n_free) array of dtype.
+    """
+    import numpy as np
+    from .transition_logits import _logit_layout
+
+    transition_matrices = np.asarray(transition_matrices, dtype=float)
+    rows, cols, _ = _logit_layout(mask)
+
+    outside = np.where(mask, 0, transition_matrices)
+    if np.any(outside != 0):
+        raise ValueError("The transition matrices have non-zero entries outside the mask, which would be lost.")
+
+    parameters = transition_matrices[:, rows, cols]
+    if dtype in _QUANTIZATION_LEVELS:
+        levels = _QUANTIZATION_LEVELS[dtype]
+        return np.rint(np.clip(parameters, 0, 1) * levels).astype(dtype)
+    return parameters.astype(dtype)
+
+def _decode_parameters(parameters, mask, dtype='float64'):
+    """
+    Rebuild full matrices from their free parameters, the inverse of _encode_parameters.
+
+    Returns:
+        transition_matrices (np.ndarray): (N, n, n) array of dtype, zero outside the mask.
+    """
+    import numpy as np
+    from .transition_logits import _logit_layout
+
+    mask = np.asarray(mask, dtype=bool)
+    size = mask.shape[0]
+    rows, cols, reference = _logit_layout(mask)
+
+    parameters = np.asarray(parameters)
+    if parameters.dtype.name in _QUANTIZATION_LEVELS:
+        parameters = parameters / _QUANTIZATION_LEVELS[parameters.dtype.name]
+
+    transition_matrices = np.zeros((len(parameters), size, size), dtype=dtype)
+    transition_matrices[:, rows, cols] = parameters
+    # The reference transition takes the rest of every row
+    transition_matrices[:, np.arange(size), reference] = 1 - transition_matrices.sum(axis=-1)
+    if parameters.dtype.kind != 'f':
+        np.clip(transition_matrices, 0, None, out=transition_matrices)
+        transition_matrices /= transition_matrices.sum(axis=-1, keepdims=True)
+
+    return transition_matrices
+
+def _write_transition_parameters(path, chunks, n_matrices, mask, condition_codes, categories, transition_names, dtype):
+    """
+    Write a parameter store from an iterable of (N_chunk, n, n) stacks, one chunk in memory at a time.
+
+    Returns:
+        path (str): The path of the store.
+    """
+    import json
+    import os
+    import numpy as np
+    from .._version import __version__
+    from .transition_logits import _logit_layout
+
+    mask = np.asarray(mask, dtype=bool)
+    size = mask.shape[0]
+    n_free = len(_logit_layout(mask)[0])
+    if transition_names is None:
+        transition_names = [f'{i}_{j}' for i in range(size) for j in range(size)]
+
+    os.makedirs(path, exist_ok=True)
+    parameters = np.lib.format.open_memmap(os.path.join(path, 'parameters.npy'), mode='w+', dtype=dtype, shape=(n_matrices, n_free))
+    row = 0
+    for chunk in chunks:
+        parameters[row:row + len(chunk)] = _encode_parameters(chunk, mask, dtype)
+        row += len(chunk)
+    if row != n_matrices:
+        raise ValueError(f"Expected {n_matrices} matrices, got {row}.")
+    parameters.flush()
+    del parameters
+
+    np.save(os.path.join(path, 'condition.npy'), condition_codes)
+    meta = {
+        'format': 'smfmodel-transition-parameters',
+        'version': __version__,
+        'n_matrices': n_matrices,
+        'mask': mask.astype(int).tolist(),
+        'dtype': np.dtype(dtype).name,
+        'categories': list(categories),
+        'transition_names': list(transition_names)
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    return path
+
+def save_transition_parameters(path, transition_matrix_solutions, transition_names, condition, mask=None, dtype='float32', chunk_size=65536):
+    """
+    Saves transition matrices as only their free parameters, in a memory-mappable directory store.
+
+    A matrix on a transition mask is fixed by its allowed transitions minus one per row, since
+    every row sums to 1. For the default 4-state ring that is 4 of 16 entries. The store holds
+    parameters.npy, an (N, n_free) array of those parameters, condition.npy with the condition
+    code of every matrix and meta.json with the mask, the dtype, the condition categories and the
+    transition names. Both .npy files are opened with np.load(mmap_mode='r'), so any rows can be
+    read and rebuilt without loading the rest (see load_transition_parameters).
+
+    float64 rebuilds the matrices to rounding error, float32 to about 1e-7 and the quantized
+    uint16 (uint8) to half a level, 1 / 131070 (1 / 510), per free entry. The errors of a row
+    add up in its reference entry.
+
+    Parameters:
+        path (str): Directory of the store, created if needed.
+        transition_matrix_solutions (np.ndarray or list): An (N, n, n) array or a list of ndarrays.
+            A list of those, one per condition, if condition is a list.
+        transition_names (list): A list of strings corresponding to the transition names. Defaults to 'i_j' when None.
+        condition (str or list): The condition metadata id, or a list of them.
+        mask (np.ndarray or networkx.Graph): Mask or state graph of the allowed transitions. Defaults to the
+            entries that are non-zero in any of the matrices.
+        dtype (str): 'float64', 'float32', 'uint16' or 'uint8'. Defaults to 'float32'.
+        chunk_size (int): Number of matrices encoded at once. Defaults to 65536.
+
+    Returns:
+        path (str): The path of the store.
+    """
+    import numpy as np
+    from .transition_mask import transition_mask
+
+    if isinstance(condition, (list, tuple)):
+        conditions = list(condition)
+        stacks = list(transition_matrix_solutions)
+    else:
+        conditions = [condition]
+        stacks = [transition_matrix_solutions]
+    stacks = [stack if hasattr(stack, 'shape') else np.asarray(stack) for stack in stacks]
+
+    if mask is None:
+        size = stacks[0].shape[-1]
+        mask = np.zeros((size, size), dtype=bool)
+        for stack in stacks:
+            for start in range(0, len(stack), chunk_size):
+                mask |= np.any(np.asarray(stack[start:start + chunk_size]) != 0, axis=0)
+    elif not isinstance(mask, np.ndarray):
+        mask = transition_mask(graph=mask)
+
+    counts = [len(stack) for stack in stacks]
+    codes = np.repeat(np.arange(len(conditions), dtype=np.int8 if len(conditions) < 128 else np.int32), counts)
+    chunks = (stack[start:start + chunk_size] for stack in stacks for start in range(0, len(stack), chunk_size))
+
+    return _write_transition_parameters(path, chunks, sum(counts), mask, codes, conditions, transition_names, dtype)
+
+def load_transition_parameters(path, indices=None, condition=None, return_adata=False, dtype='float64'):
+    """
+    Loads transition matrices from a store written by save_transition_parameters.
+
+    The parameters are memory-mapped and only the selected rows are read and rebuilt.
+
+    Parameters:
+        path (str): Directory of the store.
+        indices (np.ndarray or slice): Rows to load. Defaults to all rows.
+        condition (str): Only load the rows of this condition, within indices. Defaults to None.
+        return_adata (bool): Return an AnnData as load_transitions_into_adata does. Defaults to False.
+        dtype (str): The dtype of the rebuilt matrices. Defaults to 'float64'.
+
+    Returns:
+        transition_matrices (np.ndarray): (N, n, n) array of transition matrices, or an AnnData with return_adata.
+    """
+    import json
+    import os
+    import numpy as np
+    import pandas as pd
+
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    parameters = np.load(os.path.join(path, 'parameters.npy'), mmap_mode='r')
+    codes = np.load(os.path.join(path, 'condition.npy'), mmap_mode='r')
+
+    if indices is None:
+        indices = slice(None)
+    selected = np.arange(meta['n_matrices'])[indices]
+    if condition is not None:
+        selected = selected[codes[selected] == meta['categories'].index(condition)]
+
+    transition_matrices = _decode_parameters(parameters[selected], meta['mask'], dtype=dtype)
+
+    if not return_adata:
+        return transition_matrices
+
+    import anndata as ad
+
+    obs = pd.DataFrame({'condition': pd.Categorical.from_codes(np.asarray(codes[selected]), categories=meta['categories'])}, index=selected.astype(str))
+    return ad.AnnData(transition_matrices.reshape(len(selected), -1), obs=obs, var=pd.DataFrame(index=meta['transition_names']))
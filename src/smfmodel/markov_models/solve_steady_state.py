@@ -6,14 +6,18 @@ def solve_steady_state(T):
     Calculate the steady state proportions from a transition matrix.
 
     Parameters:
-        T (numpy.ndarray): Transition matrix (square matrix).
+        T (numpy.ndarray): Transition matrix (square matrix), or an (N, n, n) stack of them.
 
     Returns:
-        numpy.ndarray: Steady state proportions (1D array).
+        numpy.ndarray: Steady state proportions (1D array), or an (N, n) array for a stack.
     """
     
     # Number of states
-    n = T.shape[0]
+    n = T.shape[-1]
+
+    if T.ndim == 3:
+        from .solve_steady_state_batch import solve_steady_state_batch
+        return solve_steady_state_batch(T)[0]
 
     # Create the augmented matrix by appending a row for the sum of proportions
     A = np.vstack((T.T - np.eye(n), np.ones(n)))
@@ -23,4 +27,4 @@ def solve_steady_state(T):
     # Solve the linear system A * x = b
     steady_state = np.linalg.lstsq(A, b, rcond=None)[0]
 
-    return steady_state
\ No newline at end of file
+    return steady_state
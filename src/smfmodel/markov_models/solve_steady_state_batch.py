@@ -0,0 +1,59 @@
+# solve_steady_state_batch
+import numpy as np
+
+def solve_steady_state_batch(Ts, cond_threshold=1e12):
+    """
+    Calculate the steady state proportions for a stack of transition matrices.
+
+    Two-state chains use the closed form pi = (T[1, 0], T[0, 1]) / (T[0, 1] + T[1, 0]).
+    Larger chains solve the square system (T^T - I) with its last row replaced by the
+    normalization constraint. Matrices where that system is singular or ill-conditioned
+    (e.g. reducible chains) fall back to least squares on the augmented (n+1) x n system
+    used by solve_steady_state.
+
+    Parameters:
+        Ts (np.ndarray): Stack of transition matrices of shape (N, n, n).
+        cond_threshold (float): 1-norm condition number above which a matrix is solved by least squares.
+
+    Returns:
+        steady_states (np.ndarray): Steady state proportions of shape (N, n).
+        ill_conditioned (np.ndarray): Boolean mask of shape (N,) flagging the matrices that were singular or ill-conditioned.
+    """
+    Ts = np.asarray(Ts, dtype=float)
+    N, n, _ = Ts.shape
+
+    steady_states = np.empty((N, n))
+
+    if n == 2:
+        # Closed form for two-state chains
+        forward = Ts[:, 0, 1]
+        backward = Ts[:, 1, 0]
+        total = forward + backward
+        ill_conditioned = total <= np.finfo(float).eps
+        with np.errstate(divide='ignore', invalid='ignore'):
+            steady_states[:, 0] = backward / total
+            steady_states[:, 1] = forward / total
+    else:
+        # Square system with the last balance equation replaced by the sum of proportions
+        A = np.swapaxes(Ts, -1, -2) - np.eye(n)
+        A[:, -1, :] = 1
+
+        with np.errstate(all='ignore'):
+            sign, logdet = np.linalg.slogdet(A)
+        ill_conditioned = (sign == 0) | ~np.isfinite(logdet)
+
+        solvable = ~ill_conditioned
+        A_inv = np.linalg.inv(A[solvable])
+        condition_number = np.abs(A[solvable]).sum(axis=-2).max(axis=-1) * np.abs(A_inv).sum(axis=-2).max(axis=-1)
+        # The last column of the inverse is the solution for the right hand side (0, ..., 0, 1)
+        steady_states[solvable] = A_inv[:, :, -1]
+        ill_conditioned[solvable] = ~(condition_number < cond_threshold)
+
+    # Least squares fallback for the singular or ill-conditioned matrices
+    b = np.zeros(n + 1)
+    b[-1] = 1
+    for index in np.flatnonzero(ill_conditioned):
+        A = np.vstack((Ts[index].T - np.eye(n), np.ones(n)))
+        steady_states[index] = np.linalg.lstsq(A, b, rcond=None)[0]
+
+    return steady_states, ill_conditioned
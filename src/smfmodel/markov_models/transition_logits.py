@@ -0,0 +1,75 @@
+# transition_logits
+import numpy as np
+
+def _logit_layout(mask):
+    """
+    The free parameters of the rows of transition matrices on a mask.
+
+    Each row keeps its last allowed transition as the reference. Every other allowed transition
+    is a free parameter, in row-major order.
+
+    Returns:
+        rows (np.ndarray): Row of every free parameter.
+        cols (np.ndarray): Column of every free parameter.
+        reference (np.ndarray): Reference column of every row.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    size = mask.shape[0]
+    if not mask.any(axis=1).all():
+        raise ValueError("Every state needs at least one allowed transition.")
+    reference = size - 1 - np.argmax(mask[:, ::-1], axis=1)
+    free = mask.copy()
+    free[np.arange(size), reference] = False
+    rows, cols = np.nonzero(free)
+    return rows, cols, reference
+
+def transition_logits(transition_matrices, mask=None):
+    """
+    Maps transition matrices to the additive log-ratio (ALR) logits of their allowed transitions.
+
+    Every row of a matrix on the mask is a composition of its allowed transitions, so it is
+    described by the log-ratios of its allowed transitions to a reference one, the last allowed
+    transition of the row. The logits of all rows are concatenated in row-major order, which
+    gives an unconstrained vector of mask.sum() - size free parameters per matrix.
+
+    Parameters:
+        transition_matrices (np.ndarray): A (size, size) matrix or an (..., size, size) stack.
+        mask (np.ndarray): Boolean (size, size) mask of the allowed transitions. Defaults to the
+            entries that are non-zero in any of the matrices.
+
+    Returns:
+        logits (np.ndarray): An (..., n_free) array of logits.
+    """
+    transition_matrices = np.asarray(transition_matrices, dtype=float)
+    if mask is None:
+        mask = np.any(transition_matrices != 0, axis=tuple(range(transition_matrices.ndim - 2)))
+    rows, cols, reference = _logit_layout(mask)
+
+    with np.errstate(divide='ignore'):
+        log_T = np.log(transition_matrices)
+    return log_T[..., rows, cols] - log_T[..., rows, reference[rows]]
+
+def transition_matrices_from_logits(logits, mask):
+    """
+    Maps ALR logits back to transition matrices, the inverse of transition_logits.
+
+    Parameters:
+        logits (np.ndarray): An (..., n_free) array of logits.
+        mask (np.ndarray): Boolean (size, size) mask of the allowed transitions.
+
+    Returns:
+        transition_matrices (np.ndarray): An (..., size, size) stack of row-stochastic matrices, zero outside the mask.
+    """
+    logits = np.asarray(logits, dtype=float)
+    mask = np.asarray(mask, dtype=bool)
+    size = mask.shape[0]
+    rows, cols, reference = _logit_layout(mask)
+
+    log_T = np.full(logits.shape[:-1] + (size, size), -np.inf)
+    log_T[..., rows, cols] = logits
+    log_T[..., np.arange(size), reference] = 0
+    log_T -= log_T.max(axis=-1, keepdims=True)  # Stable softmax of every row
+    transition_matrices = np.exp(log_T)
+    transition_matrices /= transition_matrices.sum(axis=-1, keepdims=True)
+
+    return transition_matrices
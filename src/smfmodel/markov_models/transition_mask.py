@@ -0,0 +1,32 @@
+# transition_mask
+import numpy as np
+
+def transition_mask(size=4, allow_self_transitions=False, constrain_transitions_to_adjacent=True, graph=None):
+    """
+    Builds the boolean mask of the allowed transitions between states.
+
+    Parameters:
+        size (int): Number of states. Ignored if graph is given.
+        allow_self_transitions (bool): Whether the diagonal is allowed. Ignored if graph is given, whose self-loops
+            are the allowed self transitions.
+        constrain_transitions_to_adjacent (bool): Whether to only allow transitions between neighbouring
+            states of the ring 0 -> 1 -> ... -> size-1 -> 0. Ignored if graph is given.
+        graph (networkx.Graph): State graph whose edges are the allowed transitions. Nodes are taken in sorted order.
+            An undirected graph allows both directions of each edge, a DiGraph only the given ones.
+
+    Returns:
+        mask (np.ndarray): A boolean (size, size) array, True where a transition is allowed.
+    """
+    if graph is not None:
+        import networkx as nx
+        return nx.to_numpy_array(graph, nodelist=sorted(graph.nodes), weight=None) > 0
+
+    if constrain_transitions_to_adjacent:
+        offset = (np.arange(size)[np.newaxis, :] - np.arange(size)[:, np.newaxis]) % size
+        mask = (offset == 1) | (offset == size - 1)
+    else:
+        mask = np.ones((size, size), dtype=bool)
+
+    mask[np.arange(size), np.arange(size)] = allow_self_transitions
+
+    return mask
@@ -1,3 +1,16 @@
-__all__ = [
+from .._lazy import attach
+
+# Functions load with their module on first access
+__getattr__, __dir__ = attach(__name__, functions={
+    "load_transition_surrogate": "save_transition_surrogate",
+    "sample_transition_surrogate": "sample_transition_surrogate",
+    "save_transition_surrogate": "save_transition_surrogate",
+    "train_transition_surrogate": "train_transition_surrogate"
+})
 
+__all__ = [
+    "load_transition_surrogate",
+    "sample_transition_surrogate",
+    "save_transition_surrogate",
+    "train_transition_surrogate"
 ]
\ No newline at end of file
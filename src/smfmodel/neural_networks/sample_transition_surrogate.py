@@ -0,0 +1,122 @@
+# sample_transition_surrogate
+
+def sample_transition_surrogate(surrogate, observed_proportions, variance_threshold, condition, params):
+    """
+    Samples transition matrices for observed proportions from a trained transition surrogate.
+
+    Each batch draws conditioning steady states uniformly inside the threshold box around the
+    observed proportions (or uses the observed proportions themselves), samples ALR logits from
+    the mixture density network in one forward pass and maps them to transition matrices. Every
+    sample is verified with solve_steady_state_batch against the threshold, as in
+    generate_transition_matrix_solutions, so only matrices inside the box are returned. If
+    max_batches run out first, the matrices found so far are returned with a RuntimeWarning.
+
+    Parameters:
+        surrogate (dict): A surrogate from train_transition_surrogate or load_transition_surrogate.
+        observed_proportions (np.ndarray): The observed steady-state proportions.
+        variance_threshold (np.ndarray): Threshold of variance to determine success.
+        condition (str): String to give the tqdm progress context.
+        params (dict): Map of addtional parameters to pass.
+            total_matrices (int): Number of matrices to sample. Defaults to 1000.
+            batch_size (int): Number of samples drawn per forward pass. Defaults to 4096.
+            max_batches (int): Give up after this many batches. Defaults to 1000.
+            condition_on_box (bool): Condition on steady states drawn inside the threshold box
+                instead of on the observed proportions. Defaults to True.
+            seed (int): Seed of the sampling. Defaults to None.
+            return_array (bool): Return an (N, n, n) array instead of a list. Defaults to False.
+
+    Returns:
+        transition_matrix_solutions (list): List of successful transition matrices.
+        report (dict): Sampling report with the number of 'candidates' drawn, 'accepted' matrices,
+            the 'acceptance_rate' and the wall time 'seconds_per_sample'.
+    """
+    import time
+    import warnings
+    import numpy as np
+    import torch
+    from tqdm import tqdm
+    from ..markov_models.solve_steady_state_batch import solve_steady_state_batch
+    from ..markov_models.transition_logits import transition_matrices_from_logits
+    from .train_transition_surrogate import _conditioning_inputs, _mixture_parameters
+
+    total_matrices = params.get('total_matrices', 1000)
+    batch_size = params.get('batch_size', 4096)
+    max_batches = params.get('max_batches', 1000)
+    condition_on_box = params.get('condition_on_box', True)
+    seed = params.get('seed', None)
+    return_array = params.get('return_array', False)
+
+    model = surrogate['model']
+    config = surrogate['config']
+    mask = np.asarray(config['mask'], dtype=bool)
+    size = mask.shape[0]
+    n_components = config['n_components']
+    logit_mean = np.asarray(config['logit_mean'])
+    logit_std = np.asarray(config['logit_std'])
+
+    observed_proportions = np.asarray(observed_proportions, dtype=float)
+    variance_threshold = np.asarray(variance_threshold, dtype=float)
+    lower = np.clip(observed_proportions - variance_threshold, 1e-12, 1)
+    upper = np.clip(observed_proportions + variance_threshold, 1e-12, 1)
+
+    rng = np.random.default_rng(seed)
+    accepted_blocks = []
+    generated_matrices = 0
+    candidates = 0
+    start_time = time.perf_counter()
+
+    model.eval()
+    with tqdm(total=total_matrices, desc=f"Sampling {total_matrices} matrices for {condition}") as pbar:
+        for _ in range(max_batches):
+            if generated_matrices >= total_matrices:
+                break
+
+            # Conditioning steady states
+            if condition_on_box:
+                steady_states = rng.uniform(lower, upper, size=(batch_size, size))
+                steady_states /= steady_states.sum(axis=1, keepdims=True)
+            else:
+                steady_states = np.broadcast_to(observed_proportions, (batch_size, size))
+            inputs = torch.as_tensor(_conditioning_inputs(steady_states, config), dtype=torch.float32)
+
+            # One forward pass, then a component and a Gaussian draw per sample
+            with torch.no_grad():
+                log_weights, means, log_scales = (tensor.numpy().astype(float) for tensor in _mixture_parameters(model, inputs, n_components))
+            weights = np.exp(log_weights)
+            components = (weights.cumsum(axis=1) > rng.random((batch_size, 1)) * weights.sum(axis=1, keepdims=True)).argmax(axis=1)
+            rows = np.arange(batch_size)
+            z = means[rows, components] + np.exp(log_scales[rows, components]) * rng.standard_normal(means.shape[::2])
+            Ts = transition_matrices_from_logits(z * logit_std + logit_mean, mask)
+
+            # Verify the samples like the rejection sampler does
+            abs_delta = np.abs(solve_steady_state_batch(Ts)[0] - observed_proportions)
+            T_steady_state_within_threshold = np.all(variance_threshold - abs_delta > 0, axis=1)
+            candidates += batch_size
+
+            accepted = Ts[T_steady_state_within_threshold][:total_matrices - generated_matrices]
+            if len(accepted):
+                accepted_blocks.append(accepted)
+                generated_matrices += len(accepted)
+                pbar.update(len(accepted))
+                pbar.set_postfix({'Matrices generated': generated_matrices})
+
+    elapsed = time.perf_counter() - start_time
+    if generated_matrices < total_matrices:
+        warnings.warn(
+            f"The surrogate found only {generated_matrices} of {total_matrices} matrices for {condition} in "
+            f"{max_batches} batches of {batch_size} samples. Increase max_batches or retrain the surrogate.",
+            RuntimeWarning
+        )
+    report = {
+        'candidates': candidates,
+        'accepted': generated_matrices,
+        'acceptance_rate': generated_matrices / max(candidates, 1),
+        'seconds_per_sample': elapsed / max(generated_matrices, 1)
+    }
+
+    transition_matrix_solutions = np.concatenate(accepted_blocks + [np.empty((0, size, size))])
+
+    if return_array:
+        return transition_matrix_solutions, report
+
+    return list(transition_matrix_solutions), report
@@ -0,0 +1,46 @@
+# save_transition_surrogate
+
+def save_transition_surrogate(surrogate, path):
+    """
+    Saves the weights and configuration of a transition surrogate.
+
+    Parameters:
+        surrogate (dict): A surrogate from train_transition_surrogate.
+        path (str): Path of the file to write, e.g. 'surrogate.pt'.
+
+    Returns:
+        path (str): The path of the written file.
+    """
+    import torch
+
+    torch.save({
+        'state_dict': surrogate['model'].state_dict(),
+        'config': surrogate['config'],
+        'history': surrogate.get('history', {})
+    }, path)
+
+    return path
+
+def load_transition_surrogate(path):
+    """
+    Loads a transition surrogate written by save_transition_surrogate.
+
+    Parameters:
+        path (str): Path of the saved surrogate.
+
+    Returns:
+        surrogate (dict): The 'model', its 'config' and the training 'history', ready for sample_transition_surrogate.
+    """
+    import torch
+    from .train_transition_surrogate import _build_mixture_density_network
+
+    saved = torch.load(path, map_location='cpu', weights_only=True)
+    config = saved['config']
+    n_inputs = len(config['input_mean'])
+    n_outputs = len(config['logit_mean'])
+
+    model = _build_mixture_density_network(n_inputs, n_outputs, config['n_components'], config['hidden_sizes'])
+    model.load_state_dict(saved['state_dict'])
+    model.eval()
+
+    return {'model': model, 'config': config, 'history': saved['history']}
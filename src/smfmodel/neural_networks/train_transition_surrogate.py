@@ -0,0 +1,177 @@
+# train_transition_surrogate
+
+def _build_mixture_density_network(n_inputs, n_outputs, n_components, hidden_sizes):
+    """
+    Build a mixture density network with diagonal Gaussian components.
+
+    Parameters:
+        n_inputs (int): Size of the conditioning input.
+        n_outputs (int): Size of the modelled vector.
+        n_components (int): Number of mixture components.
+        hidden_sizes (list): Widths of the hidden layers.
+
+    Returns:
+        model (torch.nn.ModuleDict): The 'body' and the 'logits', 'means' and 'log_scales' heads.
+    """
+    import torch.nn as nn
+
+    layers = []
+    width = n_inputs
+    for hidden_size in hidden_sizes:
+        layers += [nn.Linear(width, hidden_size), nn.SiLU()]
+        width = hidden_size
+
+    return nn.ModuleDict({
+        'body': nn.Sequential(*layers),
+        'logits': nn.Linear(width, n_components),
+        'means': nn.Linear(width, n_components * n_outputs),
+        'log_scales': nn.Linear(width, n_components * n_outputs)
+    })
+
+def _mixture_parameters(model, inputs, n_components):
+    """
+    Evaluate the mixture of a batch of conditioning inputs.
+
+    Returns:
+        log_weights (torch.Tensor): (batch, n_components) log mixture weights.
+        means (torch.Tensor): (batch, n_components, n_outputs) component means.
+        log_scales (torch.Tensor): (batch, n_components, n_outputs) component log standard deviations.
+    """
+    import torch
+
+    hidden = model['body'](inputs)
+    log_weights = torch.log_softmax(model['logits'](hidden), dim=-1)
+    means = model['means'](hidden).reshape(len(inputs), n_components, -1)
+    log_scales = model['log_scales'](hidden).reshape(len(inputs), n_components, -1).clamp(-7, 5)
+    return log_weights, means, log_scales
+
+def _mixture_log_likelihood(log_weights, means, log_scales, targets):
+    """Log likelihood of every target under its mixture."""
+    import math
+    import torch
+
+    z = (targets[:, None, :] - means) * torch.exp(-log_scales)
+    component_log_likelihood = -0.5 * (z ** 2).sum(-1) - log_scales.sum(-1) - 0.5 * targets.shape[-1] * math.log(2 * math.pi)
+    return torch.logsumexp(log_weights + component_log_likelihood, dim=-1)
+
+def _conditioning_inputs(steady_states, config):
+    """Standardized log steady states, the conditioning input of the network."""
+    import numpy as np
+
+    log_steady_states = np.log(np.clip(steady_states, 1e-12, None))
+    return (log_steady_states - np.asarray(config['input_mean'])) / np.asarray(config['input_std'])
+
+def train_transition_surrogate(params):
+    """
+    Trains an amortized surrogate of the transition matrices that produce a steady state.
+
+    Pairs (T, steady state) are simulated once with random_transition_matrix and
+    solve_steady_state_batch, the same prior as generate_transition_matrix_solutions. A mixture
+    density network then learns the distribution of T, as the ALR logits of its allowed
+    transitions (see transition_logits), conditioned on the log steady state. Sampling matrices
+    for new observed proportions is then a forward pass (see sample_transition_surrogate)
+    instead of a fresh rejection search.
+
+    Parameters:
+        params (dict): Map of addtional parameters to pass.
+            size, allow_self_transitions, constrain_transitions_to_adjacent, mask: The transition mask, as in generate_transition_matrix_solutions.
+            dirichlet_alpha (float): Draw Dirichlet distributed rows with this concentration. Defaults to None.
+            n_train (int): Number of simulated pairs. Defaults to 200000.
+            n_components (int): Number of mixture components. Defaults to 8.
+            hidden_sizes (list): Widths of the hidden layers. Defaults to [128, 128].
+            epochs (int): Number of passes over the simulated pairs. Defaults to 30.
+            batch_size (int): Minibatch size. Defaults to 1024.
+            learning_rate (float): Adam learning rate. Defaults to 1e-3.
+            validation_fraction (float): Fraction of the pairs held out to track the loss. Defaults to 0.05.
+            seed (int): Seed of the simulation and of torch. Defaults to None.
+
+    Returns:
+        surrogate (dict): The trained 'model', its 'config' and the 'history' of the mean training
+            and validation negative log likelihoods per epoch.
+    """
+    import numpy as np
+    import torch
+    from tqdm import tqdm
+    from .._version import __version__
+    from ..markov_models.random_transition_matrix import random_transition_matrix
+    from ..markov_models.solve_steady_state_batch import solve_steady_state_batch
+    from ..markov_models.transition_logits import transition_logits
+    from ..markov_models.transition_mask import transition_mask
+
+    size = params.get('size', 4)
+    allow_self_transitions = params.get('allow_self_transitions', False)
+    constrain_transitions_to_adjacent = params.get('constrain_transitions_to_adjacent', True)
+    mask = params.get('mask', None)
+    dirichlet_alpha = params.get('dirichlet_alpha', None)
+    n_train = params.get('n_train', 200_000)
+    n_components = params.get('n_components', 8)
+    hidden_sizes = list(params.get('hidden_sizes', [128, 128]))
+    epochs = params.get('epochs', 30)
+    batch_size = params.get('batch_size', 1024)
+    learning_rate = params.get('learning_rate', 1e-3)
+    validation_fraction = params.get('validation_fraction', 0.05)
+    seed = params.get('seed', None)
+
+    if mask is None:
+        mask = transition_mask(size, allow_self_transitions, constrain_transitions_to_adjacent)
+    elif not isinstance(mask, np.ndarray):
+        mask = transition_mask(graph=mask)
+    mask = mask.astype(bool)
+
+    # Simulate the training pairs with the prior of the rejection sampler
+    rng = np.random.default_rng(seed)
+    if seed is not None:
+        torch.manual_seed(seed)
+    Ts = random_transition_matrix(n_matrices=n_train, rng=rng, mask=mask, dirichlet_alpha=dirichlet_alpha)
+    steady_states, ill_conditioned = solve_steady_state_batch(Ts)
+    logits = transition_logits(Ts, mask)
+    valid = ~ill_conditioned & np.all(np.isfinite(logits), axis=1) & np.all(steady_states > 0, axis=1)
+    logits = logits[valid]
+    steady_states = steady_states[valid]
+
+    log_steady_states = np.log(steady_states)
+    logit_mean = logits.mean(axis=0)
+    logit_std = np.where(logits.std(axis=0) > 0, logits.std(axis=0), 1.0)
+    config = {
+        'version': __version__,
+        'mask': mask.tolist(),
+        'dirichlet_alpha': None if dirichlet_alpha is None else np.asarray(dirichlet_alpha, dtype=float).tolist(),
+        'n_components': n_components,
+        'hidden_sizes': hidden_sizes,
+        'input_mean': log_steady_states.mean(axis=0).tolist(),
+        'input_std': log_steady_states.std(axis=0).tolist(),
+        'logit_mean': logit_mean.tolist(),
+        'logit_std': logit_std.tolist()
+    }
+    inputs = torch.as_tensor(_conditioning_inputs(steady_states, config), dtype=torch.float32)
+    targets = torch.as_tensor((logits - logit_mean) / logit_std, dtype=torch.float32)
+
+    n_validation = int(len(inputs) * validation_fraction)
+    order = torch.as_tensor(rng.permutation(len(inputs)))
+    validation, training = order[:n_validation], order[n_validation:]
+
+    model = _build_mixture_density_network(inputs.shape[1], targets.shape[1], n_components, hidden_sizes)
+    optimizer = torch.optim.Adam(model.parameters(), lr=learning_rate)
+    history = {'train_nll': [], 'validation_nll': []}
+
+    for epoch in tqdm(range(epochs), desc="Training transition surrogate"):
+        model.train()
+        epoch_order = training[torch.as_tensor(rng.permutation(len(training)))]
+        losses = []
+        for start in range(0, len(epoch_order), batch_size):
+            batch = epoch_order[start:start + batch_size]
+            loss = -_mixture_log_likelihood(*_mixture_parameters(model, inputs[batch], n_components), targets[batch]).mean()
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            losses.append(loss.item())
+        history['train_nll'].append(float(np.mean(losses)))
+
+        if n_validation:
+            model.eval()
+            with torch.no_grad():
+                validation_loss = -_mixture_log_likelihood(*_mixture_parameters(model, inputs[validation], n_components), targets[validation]).mean()
+            history['validation_nll'].append(validation_loss.item())
+
+    model.eval()
+    return {'model': model, 'config': config, 'history': history}
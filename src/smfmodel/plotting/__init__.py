@@ -1,7 +1,20 @@
-from .plot_2D_contour import plot_2D_contour
-from .plot_hist import plot_hist
+from .._lazy import attach
+
+# Functions load with their module on first access
+__getattr__, __dir__ = attach(__name__, functions={
+    "binned_kde_2d": "binned_kde_2d",
+    "kde_contour_levels": "binned_kde_2d",
+    "hist_summaries": "hist_summaries",
+    "plot_2D_contour": "plot_2D_contour",
+    "plot_hist": "plot_hist",
+    "transition_pair_densities": "transition_pair_densities"
+})
 
 __all__ = [
+    "binned_kde_2d",
+    "hist_summaries",
+    "kde_contour_levels",
     "plot_2D_contour",
-    "plot_hist"
+    "plot_hist",
+    "transition_pair_densities"
 ]
\ No newline at end of file
@@ -0,0 +1,102 @@
+# hist_summaries
+
+def _chunks(array, chunk_size):
+    """Yield consecutive float slices of a 1D array, np.memmap or h5py dataset."""
+    import numpy as np
+
+    if not hasattr(array, 'shape'):
+        array = np.asarray(array)
+    n = array.shape[0]
+    chunk_size = chunk_size or max(n, 1)
+    for start in range(0, n, chunk_size):
+        yield np.asarray(array[start:start + chunk_size], dtype=float).ravel()
+
+def hist_summaries(data_arrays, params):
+    """
+    Computes everything plot_hist draws for a list of data arrays, without plotting.
+
+    Every array is read twice, chunk by chunk: once for its range and once for its histogram,
+    signed sums and moments. The CDF is a binned KDE: the values are counted on the CDF grid and
+    smoothed with a Gaussian filter of Scott's bandwidth, instead of evaluating an exact KDE. The
+    summaries are plain dicts of arrays, so they can be pickled and passed to plot_hist again.
+
+    Parameters:
+        data_arrays (list): list of data arrays, may be np.memmap or h5py datasets
+        params (dict): Dictionary of plotting params
+            n_bins (int): The number of histogram bins.
+            window_size (int): The window of the rolling average of the counts.
+            shared_bins (bool): Use the same bin edges, over the range of all arrays, for every array. Defaults to False.
+            cdf_points (int): The number of points of the CDF grid. Defaults to 1000.
+            chunk_size (int): The number of values read at a time. Defaults to whole arrays.
+
+    Returns:
+        summaries (dict): The shared 'range' and CDF grid 'cdf_x', and a list 'arrays' with the
+            'bins', 'counts', 'rolling_average', 'mean_pos', 'mean_neg', 'cdf' and 'half_max' of every array.
+    """
+    import numpy as np
+    import pandas as pd
+    from scipy.ndimage import gaussian_filter1d
+
+    n_bins = params['n_bins']
+    window_size = params['window_size']
+    shared_bins = params.get('shared_bins', False)
+    cdf_points = params.get('cdf_points', 1000)
+    chunk_size = params.get('chunk_size', None)
+
+    # First pass: the range of every array
+    ranges = []
+    for array in data_arrays:
+        lower, upper = np.inf, -np.inf
+        for chunk in _chunks(array, chunk_size):
+            if len(chunk):
+                lower = min(lower, chunk.min())
+                upper = max(upper, chunk.max())
+        ranges.append((lower, upper))
+    min_data = min(lower for lower, _ in ranges)
+    max_data = max(upper for _, upper in ranges)
+    cdf_x = np.linspace(min_data, max_data, cdf_points)
+    dx = (cdf_x[1] - cdf_x[0]) or 1.0
+
+    summaries = {'range': (min_data, max_data), 'cdf_x': cdf_x, 'arrays': []}
+
+    # Second pass: histograms, signed sums and moments
+    for array, (lower, upper) in zip(data_arrays, ranges):
+        if shared_bins:
+            lower, upper = min_data, max_data
+        bins = np.histogram_bin_edges([lower, upper], bins=n_bins, range=(lower, upper))
+        counts = np.zeros(n_bins, dtype=np.int64)
+        grid_counts = np.zeros(cdf_points)
+        n, total, total_of_squares = 0, 0.0, 0.0
+        pos_sum, pos_n, neg_sum, neg_n = 0.0, 0, 0.0, 0
+
+        for chunk in _chunks(array, chunk_size):
+            counts += np.histogram(chunk, bins=bins)[0]
+            grid_counts += np.bincount(np.clip(np.rint((chunk - min_data) / dx).astype(np.int64), 0, cdf_points - 1), minlength=cdf_points)
+            n += len(chunk)
+            total += chunk.sum()
+            total_of_squares += np.square(chunk).sum()
+            pos = chunk >= 0
+            neg = chunk <= 0
+            pos_sum += chunk[pos].sum()
+            pos_n += np.count_nonzero(pos)
+            neg_sum += chunk[neg].sum()
+            neg_n += np.count_nonzero(neg)
+
+        # Binned KDE of the values on the CDF grid
+        std = np.sqrt(max(total_of_squares / n - (total / n) ** 2, 0))
+        bandwidth = std * n ** (-1 / 5)
+        pdf = gaussian_filter1d(grid_counts, sigma=bandwidth / dx, mode='constant') / (n * dx) if bandwidth > 0 else grid_counts / (n * dx)
+        cdf = np.cumsum(pdf) * dx
+        half_max = cdf_x[np.flatnonzero(cdf > np.max(cdf) / 2)[0]]
+
+        summaries['arrays'].append({
+            'bins': bins,
+            'counts': counts,
+            'rolling_average': pd.Series(counts).rolling(window=window_size, center=True).mean().to_numpy(),
+            'mean_pos': pos_sum / pos_n if pos_n else np.nan,
+            'mean_neg': neg_sum / neg_n if neg_n else np.nan,
+            'cdf': cdf,
+            'half_max': half_max
+        })
+
+    return summaries
@@ -1,8 +1,12 @@
 # plot_2D_contour
 
-def plot_2D_contour(adata, x_label, y_label, condition, params):
+def plot_2D_contour(adata, x_label, y_label, condition, params, density=None):
     """
     Plots a 2D contour plot from an input adata.
+
+    The density is a binned KDE (see binned_kde_2d) of the two transitions over the plotted
+    range, read from X without copying the condition subset, so adata may be backed. Grids of
+    many panels can be computed in one pass with transition_pair_densities and passed as density.
     
     Parameters:
         adata (AnnData): The AnnData object
@@ -10,18 +14,16 @@ def plot_2D_contour(adata, x_label, y_label, condition, params):
         y_label (str): The y-axis category
         condition (str): The condition to plot
         params (dict): Dictionary of plotting parameters
+            gridsize (int): The number of grid points along each axis. Defaults to 128.
+        density (dict): A precomputed grid of the pair from transition_pair_densities. Defaults to None.
         
     Returns:
         None
         
     """
     import matplotlib.pyplot as plt
-    import seaborn as sns
-    import anndata as ad
-
-    subset = adata[adata.obs['condition'] == condition].copy()
-    array1 = subset.X[:, subset.uns['Transition_array_state_map'][x_label]]
-    array2 = subset.X[:, subset.uns['Transition_array_state_map'][y_label]]
+    from .binned_kde_2d import kde_contour_levels
+    from .transition_pair_densities import transition_pair_densities
 
     levels = params['levels']
     x_lower = params['x_lower']
@@ -29,9 +31,14 @@ def plot_2D_contour(adata, x_label, y_label, condition, params):
     y_lower = params['y_lower']
     y_upper = params['y_upper']
     save_density_plot = params['save']
+    gridsize = params.get('gridsize', 128)
+
+    if density is None:
+        extent = {x_label: (x_lower, x_upper), y_label: (y_lower, y_upper)}
+        density = transition_pair_densities(adata, condition, pairs=[(x_label, y_label)], extent=extent, gridsize=gridsize)[(x_label, y_label)]
 
     plt.figure(figsize=(4, 4))
-    sns.kdeplot(x=array1, y=array2, cmap='viridis', fill=False, thresh=0, levels=levels)
+    plt.contour(density['x'], density['y'], density['density'].T, levels=kde_contour_levels(density['density'], levels, thresh=0), cmap='viridis')
 
     title = f'{y_label} versus {x_label} for {condition} Allele'
     plt.title(title, pad=20)
@@ -0,0 +1,76 @@
+# transition_pair_densities
+
+def _condition_columns(adata, condition, columns, chunk_size):
+    """
+    Yield the given columns of the rows of a condition, chunk by chunk.
+
+    Only slices of X are read, so a backed AnnData is never loaded whole and the
+    subset is never copied as an AnnData.
+    """
+    import numpy as np
+
+    in_condition = np.asarray(adata.obs['condition'] == condition)
+    X = adata.X
+    for start in range(0, adata.n_obs, chunk_size):
+        stop = min(start + chunk_size, adata.n_obs)
+        rows = in_condition[start:stop]
+        if rows.any():
+            yield np.asarray(X[start:stop])[rows][:, columns]
+
+def transition_pair_densities(adata, condition, pairs=None, extent=(0, 1), gridsize=128, bw_adjust=1, chunk_size=1_000_000):
+    """
+    Estimates the 2D densities of many transition pairs of a condition in one pass over X.
+
+    The rows of the condition are read once, in chunks, and every column is binned once. Each
+    pair is then counted with a bincount and smoothed like binned_kde_2d, with Scott's bandwidth
+    from the moments of the whole condition.
+
+    Parameters:
+        adata (AnnData): The AnnData object, may be backed.
+        condition (str): The condition to estimate.
+        pairs (list): (x_label, y_label) pairs of transitions. Defaults to all pairs of transitions.
+        extent (tuple or dict): (lower, upper) of the grid of every transition, or a dict of them by transition.
+            Defaults to (0, 1), the range of transition probabilities.
+        gridsize (int): The number of grid points along each axis.
+        bw_adjust (float): Factor applied to the bandwidth.
+        chunk_size (int): The number of rows of X read at a time.
+
+    Returns:
+        densities (dict): The binned_kde_2d grid of every (x_label, y_label) pair.
+    """
+    from itertools import combinations
+    import numpy as np
+    from .binned_kde_2d import _bin_indices, _pair_counts, _smooth_counts, _scott_bandwidth
+
+    state_map = adata.uns.get('Transition_array_state_map', {name: i for i, name in enumerate(adata.var_names)})
+    if pairs is None:
+        pairs = list(combinations(state_map, 2))
+    labels = list(dict.fromkeys(label for pair in pairs for label in pair))
+    columns = [state_map[label] for label in labels]
+    position = {label: i for i, label in enumerate(labels)}
+    extents = {label: tuple(extent[label]) if isinstance(extent, dict) else tuple(extent) for label in labels}
+
+    counts = {pair: np.zeros((gridsize, gridsize), dtype=np.int64) for pair in pairs}
+    n = 0
+    sums = np.zeros(len(labels))
+    sums_of_squares = np.zeros(len(labels))
+
+    for chunk in _condition_columns(adata, condition, columns, chunk_size):
+        chunk = chunk.astype(float, copy=False)
+        n += len(chunk)
+        sums += chunk.sum(axis=0)
+        sums_of_squares += np.square(chunk).sum(axis=0)
+        indices = [_bin_indices(chunk[:, i], *extents[label], gridsize) for i, label in enumerate(labels)]
+        for x_label, y_label in pairs:
+            counts[(x_label, y_label)] += _pair_counts(indices[position[x_label]], indices[position[y_label]], gridsize)
+
+    mean = sums / max(n, 1)
+    std = np.sqrt(np.maximum(sums_of_squares / max(n, 1) - np.square(mean), 0))
+
+    densities = {}
+    for x_label, y_label in pairs:
+        i, j = position[x_label], position[y_label]
+        bandwidth = _scott_bandwidth([std[i], std[j]], n, bw_adjust)
+        densities[(x_label, y_label)] = _smooth_counts(counts[(x_label, y_label)], (extents[x_label], extents[y_label]), n, bandwidth)
+
+    return densities
@@ -1,11 +1,36 @@
-from .clr_transform import clr_transform
-from .manova import manova_test, prepare_manova_data, check_zero_variance, perform_anovas, apply_bonferroni_correction
-from .permutation_test import permutation_test
+from .._lazy import attach
+
+# Functions load with their module on first access
+__getattr__, __dir__ = attach(__name__, functions={
+    "alr_transform": "alr_transform",
+    "clr_transform": "clr_transform",
+    "ilr_transform": "ilr_transform",
+    "helmert_basis": "ilr_transform",
+    "manova_test": "manova",
+    "manova_statistics": "manova",
+    "zero_variance_mask": "manova",
+    "prepare_manova_data": "manova",
+    "check_zero_variance": "manova",
+    "perform_anovas": "manova",
+    "perform_anovas_vectorized": "manova",
+    "apply_bonferroni_correction": "manova",
+    "multiplicative_replacement": "multiplicative_replacement",
+    "permutation_test": "permutation_test",
+    "permutation_test_contrasts": "permutation_test_contrasts"
+})
 
 __all__ = [
-    "apply_bonferroni_correction"
+    "alr_transform",
+    "apply_bonferroni_correction",
     "clr_transform",
+    "helmert_basis",
+    "ilr_transform",
     "manova_test",
+    "manova_statistics",
+    "multiplicative_replacement",
     "perform_anovas",
-    "permutation_test"
+    "perform_anovas_vectorized",
+    "permutation_test",
+    "permutation_test_contrasts",
+    "zero_variance_mask"
 ]
\ No newline at end of file
@@ -0,0 +1,40 @@
+# alr_transform
+
+def alr_transform(data, reference=-1, out=None, dtype=None, zero_replacement=None, chunk_size=None):
+    """
+    Apply the Additive Log-Ratio (ALR) transformation to compositional data.
+
+    Every part is divided by the reference part before the log, which leaves n_classes - 1
+    coordinates. The log is taken once per chunk, see clr_transform.
+
+    Parameters:
+    data (np.ndarray)
+        A 2D array of shape (n_samples, n_classes) where each row is a compositional
+        vector. May be an np.memmap, an h5py dataset or a backed AnnData X.
+    reference (int)
+        The column of the reference part. Defaults to the last part.
+    out (np.ndarray)
+        An array of shape (n_samples, n_classes - 1) to write the result to.
+    dtype (str or np.dtype)
+        The dtype of the result, e.g. 'float32'. Defaults to the dtype of out or data.
+    zero_replacement (float or str)
+        None keeps zeros. 'multiplicative' or a delta replace them with multiplicative_replacement first.
+    chunk_size (int)
+        The number of rows transformed at a time. Defaults to all rows at once.
+
+    Returns:
+    alr_data (np.ndarray)
+        The ALR-transformed data of shape (n_samples, n_classes - 1), in the column order of
+        data without the reference.
+    """
+    import numpy as np
+    from .clr_transform import _log_ratio_transform
+
+    n_classes = np.shape(data)[1]
+    reference = reference % n_classes
+    others = np.delete(np.arange(n_classes), reference)
+
+    def ratio_to_reference(log_data):
+        return log_data[:, others] - log_data[:, reference:reference + 1]
+
+    return _log_ratio_transform(data, n_classes - 1, ratio_to_reference, out, dtype, zero_replacement, chunk_size)
@@ -1,21 +1,102 @@
 # clr_transform
 
-def clr_transform(data):
+def _log_ratio_transform(data, n_columns, log_ratio, out, dtype, zero_replacement, chunk_size):
+    """
+    Apply a log-ratio transform to compositional data chunk by chunk.
+
+    Each chunk of rows is read once, its zeros are replaced, its log is taken in place and
+    log_ratio maps it to the transformed rows. Chunks are only read by slicing, so data can be
+    an np.memmap, an h5py dataset or the X of a backed AnnData object. When out is an in-memory
+    array with the layout of the log, the log is taken directly inside out.
+
+    Parameters:
+    data (array-like)
+        A 2D array of shape (n_samples, n_classes) of compositional vectors.
+    n_columns (int)
+        The number of columns of the transformed data.
+    log_ratio (callable)
+        Maps a chunk of log compositions, which it may modify in place, to the transformed chunk.
+    out (array-like)
+        An array of shape (n_samples, n_columns) to write the result to, e.g. an np.memmap.
+    dtype (str or np.dtype)
+        The dtype of the computation and of the result.
+    zero_replacement (float or str)
+        None to keep zeros, 'multiplicative' or a delta for multiplicative_replacement.
+    chunk_size (int)
+        The number of rows per chunk. Defaults to all rows at once.
+
+    Returns:
+    transformed_data (array-like)
+        out, or a new array of shape (n_samples, n_columns).
+    """
+    import numpy as np
+    from .multiplicative_replacement import multiplicative_replacement
+
+    if not hasattr(data, 'shape') or not hasattr(data, 'dtype'):
+        data = np.asarray(data)
+    n_rows, n_classes = data.shape
+
+    if dtype is None:
+        if out is not None:
+            dtype = out.dtype
+        elif np.issubdtype(data.dtype, np.floating):
+            dtype = data.dtype
+        else:
+            dtype = np.float64
+    if out is None:
+        out = np.empty((n_rows, n_columns), dtype=dtype)
+    if chunk_size is None:
+        chunk_size = max(n_rows, 1)
+    delta = None if zero_replacement in (None, 'multiplicative') else zero_replacement
+
+    in_place = isinstance(out, np.ndarray) and n_columns == n_classes and out.dtype == np.dtype(dtype)
+
+    for start in range(0, n_rows, chunk_size):
+        stop = min(start + chunk_size, n_rows)
+        if in_place:
+            chunk = out[start:stop]
+            chunk[...] = data[start:stop]
+        else:
+            chunk = np.array(data[start:stop], dtype=dtype)
+        if zero_replacement is not None:
+            multiplicative_replacement(chunk, delta=delta, out=chunk)
+        np.log(chunk, out=chunk)
+        transformed = log_ratio(chunk)
+        if transformed is not chunk or not in_place:
+            out[start:stop] = transformed
+
+    return out
+
+def clr_transform(data, out=None, dtype=None, zero_replacement=None, chunk_size=None):
     """
     Apply the Centered Log-Ratio (CLR) transformation to compositional data.
 
+    The log is taken once and the row mean of the log, the log of the geometric mean, is
+    subtracted in place, so an in-memory input needs a single output sized buffer.
+
     Parameters:
     data (np.ndarray)
-        A 2D array of shape (n_samples, n_classes) where each row is a compositional 
-        vector that sums to 1.
+        A 2D array of shape (n_samples, n_classes) where each row is a compositional
+        vector that sums to 1. May be an np.memmap, an h5py dataset or a backed AnnData X.
+    out (np.ndarray)
+        An array of the same shape to write the result to, e.g. an np.memmap.
+    dtype (str or np.dtype)
+        The dtype of the result, e.g. 'float32'. Defaults to the dtype of out or data.
+    zero_replacement (float or str)
+        None keeps zeros, which give -inf and NaN. 'multiplicative' or a delta replace them
+        with multiplicative_replacement first.
+    chunk_size (int)
+        The number of rows transformed at a time. Defaults to all rows at once.
 
     Returns:
     clr_data (np.ndarray)
-        The CLR-transformed data of the same shape as input, where each row has been 
+        The CLR-transformed data of the same shape as input, where each row has been
         log-ratio transformed.
     """
     import numpy as np
-    # Geometric mean for each row
-    geometric_mean = np.exp(np.mean(np.log(data), axis=1))
-    # CLR transformation
-    return np.log(data / geometric_mean[:, np.newaxis])
+
+    def centre(log_data):
+        log_data -= log_data.mean(axis=1, keepdims=True)
+        return log_data
+
+    return _log_ratio_transform(data, np.shape(data)[1], centre, out, dtype, zero_replacement, chunk_size)
@@ -0,0 +1,64 @@
+# ilr_transform
+
+def helmert_basis(n_classes):
+    """
+    Build the orthonormal Helmert basis of the CLR plane.
+
+    Parameters:
+    n_classes (int)
+        The number of parts of the compositions.
+
+    Returns:
+    basis (np.ndarray)
+        An array of shape (n_classes, n_classes - 1) with orthonormal columns that sum to 0.
+        Column k contrasts the first k + 1 parts with part k + 1.
+    """
+    import numpy as np
+
+    basis = np.zeros((n_classes, n_classes - 1))
+    for k in range(1, n_classes):
+        basis[:k, k - 1] = 1 / k
+        basis[k, k - 1] = -1
+        basis[:, k - 1] *= np.sqrt(k / (k + 1))
+    return basis
+
+def ilr_transform(data, basis=None, out=None, dtype=None, zero_replacement=None, chunk_size=None):
+    """
+    Apply the Isometric Log-Ratio (ILR) transformation to compositional data.
+
+    The ILR coordinates are the CLR data projected on an orthonormal basis of the CLR plane.
+    Because the basis columns sum to 0, the log can be projected directly and the centering
+    step is skipped. The log is taken once per chunk, see clr_transform.
+
+    Parameters:
+    data (np.ndarray)
+        A 2D array of shape (n_samples, n_classes) where each row is a compositional
+        vector. May be an np.memmap, an h5py dataset or a backed AnnData X.
+    basis (np.ndarray)
+        An orthonormal basis of shape (n_classes, n_classes - 1) with columns summing to 0.
+        Defaults to helmert_basis(n_classes).
+    out (np.ndarray)
+        An array of shape (n_samples, n_classes - 1) to write the result to.
+    dtype (str or np.dtype)
+        The dtype of the result, e.g. 'float32'. Defaults to the dtype of out or data.
+    zero_replacement (float or str)
+        None keeps zeros. 'multiplicative' or a delta replace them with multiplicative_replacement first.
+    chunk_size (int)
+        The number of rows transformed at a time. Defaults to all rows at once.
+
+    Returns:
+    ilr_data (np.ndarray)
+        The ILR-transformed data of shape (n_samples, n_classes - 1).
+    """
+    import numpy as np
+    from .clr_transform import _log_ratio_transform
+
+    n_classes = np.shape(data)[1]
+    if basis is None:
+        basis = helmert_basis(n_classes)
+    basis = np.asarray(basis)
+
+    def project(log_data):
+        return log_data @ basis.astype(log_data.dtype, copy=False)
+
+    return _log_ratio_transform(data, basis.shape[1], project, out, dtype, zero_replacement, chunk_size)
@@ -1,13 +1,26 @@
 # manova
 
+def zero_variance_mask(data):
+    """
+    Flag the columns with zero variance.
+
+    Parameters:
+    -----------
+    data : np.ndarray
+        An array of shape (..., n_samples, n_classes), e.g. a stack of pooled comparisons.
+
+    Returns:
+    --------
+    mask : np.ndarray
+        A boolean array of shape (..., n_classes) that is True for the zero variance columns.
+    """
+    import numpy as np
+    data = np.asarray(data)
+    return np.ptp(data, axis=-2) == 0
+
 def check_zero_variance(df):
-    """Check for columns with zero variance and remove them."""
-    import pandas as pd
-    zero_variance_columns = df.loc[:, df.var() == 0].columns
-    if len(zero_variance_columns) > 0:
-        print(f"Removing columns with zero variance: {zero_variance_columns.tolist()}")
-        df = df.drop(columns=zero_variance_columns)
-    return df
+    """Remove the columns with zero variance, selected with the boolean mask of zero_variance_mask."""
+    return df.loc[:, ~zero_variance_mask(df.to_numpy())]
 
 def prepare_manova_data(condition_1, condition_2, variables):
     """
@@ -49,7 +62,7 @@ def prepare_manova_data(condition_1, condition_2, variables):
 
     return df
 
-def manova_test(condition_1, condition_2, variables):
+def manova_test(condition_1, condition_2, variables, instrument=None):
     """
     Perform MANOVA to compare class proportions between two conditions.
 
@@ -61,6 +74,8 @@ def manova_test(condition_1, condition_2, variables):
     condition_2 : np.ndarray
         A 2D array of shape (n_samples, n_classes) representing the second condition,
         where each row is an observation of class proportions.
+    instrument : RunStats, callable or bool
+        Record the stage timings and counters, see smfmodel.instrumentation.RunStats.
 
     Returns:
     --------
@@ -70,19 +85,27 @@ def manova_test(condition_1, condition_2, variables):
     import numpy as np
     import pandas as pd
     from statsmodels.multivariate.manova import MANOVA
+    from ..instrumentation import resolve_instrument
+
+    stats = resolve_instrument(instrument, name='manova_test')
     # Prepare data
-    df = prepare_manova_data(condition_1, condition_2, variables)
+    with stats.stage('prepare'):
+        df = prepare_manova_data(condition_1, condition_2, variables)
     
     # Adjust the formula based on the remaining columns in the DataFrame
     class_columns = df.columns.difference(['Condition'])
     formula = ' + '.join(class_columns) + ' ~ Condition'
     # Perform MANOVA using statsmodels
-    maov = MANOVA.from_formula(formula, data=df)
-    result = maov.mv_test()
+    with stats.stage('fit'):
+        maov = MANOVA.from_formula(formula, data=df)
+        result = maov.mv_test()
+    stats.count('observations', len(df))
+    stats.count('columns', len(class_columns))
+    stats.event('finish', final=True)
 
     return result
 
-def perform_anovas(condition_1, condition_2, variables):
+def perform_anovas(condition_1, condition_2, variables, instrument=None):
     """
     Perform one-way ANOVA for each dependent variable (class proportions).
 
@@ -90,6 +113,8 @@ def perform_anovas(condition_1, condition_2, variables):
     -----------
     df : pd.DataFrame
         A pandas DataFrame containing the class proportions and the Condition column.
+    instrument : RunStats, callable or bool
+        Record the stage timings and counters, see smfmodel.instrumentation.RunStats.
 
     Returns:
     --------
@@ -98,22 +123,31 @@ def perform_anovas(condition_1, condition_2, variables):
     """
     import statsmodels.api as sm
     from statsmodels.formula.api import ols
+    from ..instrumentation import resolve_instrument
+
+    stats = resolve_instrument(instrument, name='perform_anovas')
     anova_results = {}
-    df = prepare_manova_data(condition_1, condition_2, variables)
+    with stats.stage('prepare'):
+        df = prepare_manova_data(condition_1, condition_2, variables)
     # Iterate over each class column (dependent variable)
     for class_column in df.columns.difference(['Condition']):
         # Build the formula for the univariate ANOVA
         formula = f'{class_column} ~ Condition'
         
         # Fit the model using ordinary least squares (OLS)
-        model = ols(formula, data=df).fit()
+        with stats.stage('fit'):
+            model = ols(formula, data=df).fit()
         
         # Perform the ANOVA
-        anova_table = sm.stats.anova_lm(model, typ=2)
+        with stats.stage('anova'):
+            anova_table = sm.stats.anova_lm(model, typ=2)
         
         # Store the result for each class
         anova_results[class_column] = anova_table
+        stats.count('columns')
+        stats.event('column')
     
+    stats.event('finish', final=True)
     return anova_results
 
 def apply_bonferroni_correction(anova_results):
@@ -139,3 +173,246 @@ def apply_bonferroni_correction(anova_results):
     
     # Return a dictionary with class names and corrected p-values
     return {class_name: corrected_pval for class_name, corrected_pval in zip(anova_results.keys(), corrected_pvals)}
+
+def perform_anovas_vectorized(condition_1, condition_2, variables, instrument=None):
+    """
+    Perform one-way ANOVA for every dependent variable in a single NumPy pass.
+
+    For a two-group design the F statistic of each column follows in closed form from the
+    group means and variances, so no formula is parsed and no model is fit per column.
+
+    Parameters:
+    -----------
+    condition_1 : np.ndarray
+        A 2D array of shape (n_samples, n_classes) representing the first condition,
+        where each row is an observation of class proportions.
+    condition_2 : np.ndarray
+        A 2D array of shape (n_samples, n_classes) representing the second condition,
+        where each row is an observation of class proportions.
+    variables : list
+        The names of the n_classes columns.
+    instrument : RunStats, callable or bool
+        Record the stage timings and counters, see smfmodel.instrumentation.RunStats.
+
+    Returns:
+    --------
+    anova_results : pd.DataFrame
+        A DataFrame indexed by class ('Class_<variable>', as in apply_bonferroni_correction)
+        with the sums of squares, degrees of freedom, F statistic, p-value and the Bonferroni
+        and Benjamini-Hochberg corrected p-values. Zero variance columns are left out.
+    """
+    import numpy as np
+    import pandas as pd
+    from scipy.stats import f
+    from statsmodels.stats.multitest import multipletests
+    from ..instrumentation import resolve_instrument
+
+    stats = resolve_instrument(instrument, name='perform_anovas_vectorized')
+    condition_1 = np.asarray(condition_1, dtype=float)
+    condition_2 = np.asarray(condition_2, dtype=float)
+    n_1 = condition_1.shape[0]
+    n_2 = condition_2.shape[0]
+    n_total = n_1 + n_2
+
+    with stats.stage('sums_of_squares'):
+        mean_1 = condition_1.mean(axis=0)
+        mean_2 = condition_2.mean(axis=0)
+        grand_mean = (n_1 * mean_1 + n_2 * mean_2) / n_total
+
+        # Between and within group sums of squares of every column
+        sum_sq_condition = n_1 * (mean_1 - grand_mean) ** 2 + n_2 * (mean_2 - grand_mean) ** 2
+        sum_sq_residual = ((condition_1 - mean_1) ** 2).sum(axis=0) + ((condition_2 - mean_2) ** 2).sum(axis=0)
+
+        # Drop the zero variance columns, as check_zero_variance does
+        keep = (sum_sq_condition + sum_sq_residual) > 0
+
+    df_condition = 1
+    df_residual = n_total - 2
+    F = (sum_sq_condition[keep] / df_condition) / (sum_sq_residual[keep] / df_residual)
+    pvals = f.sf(F, df_condition, df_residual)
+
+    anova_results = pd.DataFrame({
+        'sum_sq_condition': sum_sq_condition[keep],
+        'sum_sq_residual': sum_sq_residual[keep],
+        'df_condition': df_condition,
+        'df_residual': df_residual,
+        'F': F,
+        'PR(>F)': pvals,
+        'p_bonferroni': multipletests(pvals, method='bonferroni')[1],
+        'p_fdr_bh': multipletests(pvals, method='fdr_bh')[1]
+    }, index=[f'Class_{variable}' for variable, kept in zip(variables, keep) if kept])
+    stats.count('columns', np.count_nonzero(keep))
+    stats.count('zero_variance_columns', np.count_nonzero(~keep))
+    stats.event('finish', final=True)
+
+    return anova_results
+
+def _manova_stats_table(eigenvals, p, q, df_resid, tolerance=1e-8):
+    """
+    Compute the four MANOVA statistics and their F approximations for a stack of comparisons.
+
+    Mirrors statsmodels.multivariate.multivariate_ols.multivariate_stats, vectorized over
+    comparisons that share the same number of dependent variables.
+
+    Parameters:
+    -----------
+    eigenvals : np.ndarray
+        An array of shape (n_comparisons, n_classes) of the eigenvalues of inv(E + H) H.
+    p : np.ndarray
+        The rank of E + H of every comparison.
+    q : int
+        The rank of the hypothesis.
+    df_resid : int
+        The residual degrees of freedom.
+    tolerance : float
+        Eigenvalues smaller than tolerance are considered 0.
+
+    Returns:
+    --------
+    table : np.ndarray
+        An array of shape (n_comparisons, 4, 5) of Value, Num DF, Den DF, F Value and Pr > F
+        for Wilks' lambda, Pillai's trace, Hotelling-Lawley trace and Roy's greatest root.
+    """
+    import numpy as np
+    from scipy.stats import f
+
+    eigv2 = np.where(eigenvals > tolerance, eigenvals, 0)
+    eigv1 = eigv2 / (1 - eigv2)
+    v = df_resid
+    p = np.asarray(p, dtype=float)
+    s = np.minimum(p, q)
+    m = (np.abs(p - q) - 1) / 2
+    n = (v - p - 1) / 2
+
+    table = np.empty(eigv2.shape[:1] + (4, 5))
+    table[:, 0, 0] = np.prod(1 - eigv2, axis=-1)
+    table[:, 1, 0] = eigv2.sum(axis=-1)
+    table[:, 2, 0] = eigv1.sum(axis=-1)
+    table[:, 3, 0] = eigv1.max(axis=-1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Wilks' lambda
+        r = v - (p - q + 1) / 2
+        u = (p * q - 2) / 4
+        t = np.where(p * p + q * q - 5 > 0, np.sqrt((p * p * q * q - 4) / (p * p + q * q - 5)), 1)
+        df1 = p * q
+        df2 = r * t - 2 * u
+        lmd = np.power(table[:, 0, 0], 1 / t)
+        table[:, 0, 1:4] = np.stack([df1, df2, (1 - lmd) / lmd * df2 / df1], axis=-1)
+
+        # Pillai's trace
+        V = table[:, 1, 0]
+        df1 = s * (2 * m + s + 1)
+        df2 = s * (2 * n + s + 1)
+        table[:, 1, 1:4] = np.stack([df1, df2, df2 / df1 * V / (s - V)], axis=-1)
+
+        # Hotelling-Lawley trace
+        U = table[:, 2, 0]
+        b = (p + 2 * n) * (q + 2 * n) / 2 / (2 * n + 1) / (n - 1)
+        df2_large_n = 4 + (p * q + 2) / (b - 1)
+        c = (df2_large_n - 2) / 2 / n
+        large_n = n > 0
+        df1 = np.where(large_n, p * q, s * (2 * m + s + 1))
+        df2 = np.where(large_n, df2_large_n, s * (s * n + 1))
+        F = np.where(large_n, df2 / df1 * U / c, df2 / df1 / s * U)
+        table[:, 2, 1:4] = np.stack([df1, df2, F], axis=-1)
+
+        # Roy's greatest root
+        sigma = table[:, 3, 0]
+        r = np.maximum(p, q)
+        df1 = r
+        df2 = v - r + q
+        table[:, 3, 1:4] = np.stack([df1, df2, df2 / df1 * sigma], axis=-1)
+
+    table[:, :, 4] = f.sf(table[:, :, 3], table[:, :, 1], table[:, :, 2])
+
+    return table
+
+def manova_statistics(condition_1, condition_2, rank_deficient=False, instrument=None):
+    """
+    Perform MANOVA between two conditions directly from the SSCP matrices.
+
+    The hypothesis (H) and error (E) sums of squares and cross products are computed straight
+    from the two condition arrays, without building a DataFrame or a formula. Stacks of
+    comparisons (e.g. one per locus) are evaluated together. Zero variance columns are masked
+    per comparison, and E + H is inverted with a pseudoinverse, so collinear columns (e.g.
+    rows of a transition matrix that sum to 1) do not make it fail.
+
+    By default the number of dependent variables p is the number of kept columns, as in
+    manova_test, and the results match manova_test. With rank_deficient=True, p is the rank of
+    E + H instead. For collinear columns such as compositions this lowers p by the number of
+    constraints, which changes the degrees of freedom and the p-values, and is the appropriate
+    test when the constraint is structural.
+
+    Parameters:
+    -----------
+    condition_1 : np.ndarray
+        A 2D array of shape (n_samples, n_classes) representing the first condition, or a
+        3D array of shape (n_comparisons, n_samples, n_classes) of stacked comparisons.
+    condition_2 : np.ndarray
+        An array of the same layout representing the second condition.
+    rank_deficient : bool
+        Whether to take p as the rank of E + H instead of the number of kept columns.
+    instrument : RunStats, callable or bool
+        Record the stage timings and counters, see smfmodel.instrumentation.RunStats.
+
+    Returns:
+    --------
+    result : pd.DataFrame
+        The Value, Num DF, Den DF, F Value and Pr > F of Wilks' lambda, Pillai's trace,
+        Hotelling-Lawley trace and Roy's greatest root, as in the statsmodels MANOVA table
+        of the Condition term. Stacked comparisons are indexed by (comparison, statistic).
+    """
+    import numpy as np
+    import pandas as pd
+    from ..instrumentation import resolve_instrument
+
+    stats = resolve_instrument(instrument, name='manova_statistics')
+    condition_1 = np.asarray(condition_1, dtype=float)
+    condition_2 = np.asarray(condition_2, dtype=float)
+    stacked = condition_1.ndim == 3
+    if not stacked:
+        condition_1 = condition_1[np.newaxis]
+        condition_2 = condition_2[np.newaxis]
+
+    n_comparisons = condition_1.shape[0]
+    n_1 = condition_1.shape[1]
+    n_2 = condition_2.shape[1]
+    df_resid = n_1 + n_2 - 2
+    q = 1
+
+    with stats.stage('sscp'):
+        mean_1 = condition_1.mean(axis=1)
+        mean_2 = condition_2.mean(axis=1)
+        grand_mean = (n_1 * mean_1 + n_2 * mean_2) / (n_1 + n_2)
+
+        # Hypothesis and error SSCP matrices of every comparison
+        delta_1 = mean_1 - grand_mean
+        delta_2 = mean_2 - grand_mean
+        H = n_1 * delta_1[:, :, np.newaxis] * delta_1[:, np.newaxis, :] + n_2 * delta_2[:, :, np.newaxis] * delta_2[:, np.newaxis, :]
+        centered_1 = condition_1 - mean_1[:, np.newaxis, :]
+        centered_2 = condition_2 - mean_2[:, np.newaxis, :]
+        E = np.einsum('kni,knj->kij', centered_1, centered_1) + np.einsum('kni,knj->kij', centered_2, centered_2)
+
+        # Mask the zero variance columns of each pooled comparison
+        keep = ~zero_variance_mask(np.concatenate([condition_1, condition_2], axis=1))
+        keep_2d = keep[:, :, np.newaxis] & keep[:, np.newaxis, :]
+        H = np.where(keep_2d, H, 0)
+        E = np.where(keep_2d, E, 0)
+
+    with stats.stage('eigenvalues'):
+        EH = E + H
+        p = np.linalg.matrix_rank(EH) if rank_deficient else keep.sum(axis=1)
+        eigenvals = np.real(np.linalg.eigvals(np.linalg.pinv(EH) @ H))
+        table = _manova_stats_table(eigenvals, p, q, df_resid)
+
+    statistics = ["Wilks' lambda", "Pillai's trace", "Hotelling-Lawley trace", "Roy's greatest root"]
+    columns = ["Value", "Num DF", "Den DF", "F Value", "Pr > F"]
+    stats.count('comparisons', n_comparisons)
+    stats.count('zero_variance_columns', np.count_nonzero(~keep))
+    stats.event('finish', final=True)
+    if not stacked:
+        return pd.DataFrame(table[0], index=statistics, columns=columns)
+
+    index = pd.MultiIndex.from_product([range(n_comparisons), statistics], names=['comparison', 'statistic'])
+    return pd.DataFrame(table.reshape(-1, len(columns)), index=index, columns=columns)
@@ -0,0 +1,44 @@
+# multiplicative_replacement
+
+def multiplicative_replacement(data, delta=None, out=None):
+    """
+    Replace the zeros of compositional data with the multiplicative replacement strategy.
+
+    Every zero of a row is set to delta times the row total, and the non-zero parts of the
+    row are shrunk by the mass that was added, so the row total and the ratios between the
+    non-zero parts are preserved (Martin-Fernandez et al., 2003).
+
+    Parameters:
+    data (np.ndarray)
+        A 2D array of shape (n_samples, n_classes) where each row is a compositional vector.
+    delta (float)
+        The replacement value, as a fraction of the row total. Defaults to (1 / n_classes) ** 2.
+    out (np.ndarray)
+        An array of the same shape to write the result to. May be data itself.
+
+    Returns:
+    replaced_data (np.ndarray)
+        The data without zeros.
+    """
+    import numpy as np
+
+    data = np.asarray(data)
+    if out is None:
+        out = np.array(data, dtype=np.result_type(data.dtype, np.float32))
+    elif out is not data:
+        out[...] = data
+    if delta is None:
+        delta = (1 / data.shape[1]) ** 2
+
+    zeros = out == 0
+    n_zeros = np.count_nonzero(zeros, axis=1)
+    if not n_zeros.any():
+        return out
+    if np.any(n_zeros * delta >= 1):
+        raise ValueError(f"delta={delta} is too large to replace {n_zeros.max()} zeros in a row.")
+
+    totals = out.sum(axis=1)
+    out *= (1 - n_zeros * delta)[:, np.newaxis].astype(out.dtype)
+    out[zeros] = np.broadcast_to((delta * totals)[:, np.newaxis], out.shape)[zeros]
+
+    return out
@@ -1,9 +1,51 @@
 # permutation_test
 
+def _group_indicators(keys, n_1):
+    """
+    Turn a block of random keys into group indicator rows.
+
+    Parameters:
+    keys (np.ndarray)
+        A 2D array of shape (n_permutations, n_samples) of i.i.d. uniform keys.
+    n_1 (int)
+        The number of samples assigned to the first group.
+
+    Returns:
+        indicators (np.ndarray)
+            A 2D array of shape (n_permutations, n_samples) with a 1 for the n_1 samples
+            holding the smallest keys of each row, i.e. the first group of a uniformly
+            random permutation drawn without replacement.
+    """
+    import numpy as np
+    kth_key = np.partition(keys, n_1 - 1, axis=1)[:, n_1 - 1:n_1]
+    return (keys <= kth_key).astype(float)
+
+def _permuted_centroid_differences(indicators, data, n_1):
+    """
+    Compute the centroid differences of a block of permutations with one matrix product.
+
+    Parameters:
+    indicators (np.ndarray)
+        A 2D array of shape (n_permutations, n_samples) of first group indicators.
+    data (np.ndarray)
+        A 2D array of shape (n_samples, n_classes) of the pooled observations.
+    n_1 (int)
+        The number of samples in the first group.
+
+    Returns:
+        differences (np.ndarray)
+            A 2D array of shape (n_permutations, n_classes) of the first minus the second
+            permuted group centroid.
+    """
+    n_2 = data.shape[0] - n_1
+    sums_1 = indicators @ data
+    sums_2 = data.sum(axis=0) - sums_1
+    return sums_1 / n_1 - sums_2 / n_2
+
 # Assume condition_1 and condition_2 are arrays of shape (n_samples, n_classes)
-def permutation_test(condition_1, condition_2, apply_clr_transform=False, n_permutations=1000):
+def permutation_test(condition_1, condition_2, apply_clr_transform=False, n_permutations=1000, block_size=None, early_stop_hits=None, seed=None, instrument=None):
     """
-    Perform a permutation test to compare two sets of proportions (arrays) and 
+    Perform a permutation test to compare two sets of proportions (arrays) and
     determine if the difference in their centroids is statistically significant.
 
     Parameters:
@@ -18,72 +60,98 @@ def permutation_test(condition_1, condition_2, apply_clr_transform=False, n_perm
     n_permutations (int)
         The number of permutations to perform. This determines the size of the null
         distribution used for the test.
+    block_size (int)
+        The number of permutations evaluated per block. Memory is bounded by
+        block_size * n_samples. Defaults to about 4 million elements per block, and at
+        most 1000 permutations, so that early stopping is checked regularly.
+    early_stop_hits (int)
+        Besag-Clifford sequential stopping. If given, stop after the first block in which
+        this many permuted distances reached the observed distance; the p-value is then
+        clearly not small.
+    seed (int)
+        Seed for the random generator.
+    instrument (RunStats, callable or bool)
+        Record the stage timings and permutation counters, see smfmodel.instrumentation.RunStats.
 
     Returns:
         observed_distance (float)
-            The Euclidean distance between the centroids (mean proportion vectors) of 
+            The Euclidean distance between the centroids (mean proportion vectors) of
             the two conditions.
         p_value (float)
-            The proportion of permutations where the distance between randomly permuted 
-            centroids is greater than or equal to the observed distance. This is the 
+            The proportion of permutations where the distance between randomly permuted
+            centroids is greater than or equal to the observed distance. This is the
             estimated p-value of the test.
-    
+
     Notes:
-    - This is a non-parametric test that does not assume any specific distribution for 
-      the data. It tests whether the difference in the means (centroids) of the two 
+    - This is a non-parametric test that does not assume any specific distribution for
+      the data. It tests whether the difference in the means (centroids) of the two
       conditions is greater than expected by chance.
+    - Permutations are drawn without replacement. Each block of permutations is turned
+      into a group indicator matrix, so the permuted group sums of the whole block come
+      from a single matrix product.
+    - With early stopping the p-value is hits / permutations performed, the Besag-Clifford
+      estimate.
     """
     import numpy as np
-    from scipy.spatial.distance import euclidean
-    from sklearn.utils import resample
     from tqdm import tqdm
+    from ..instrumentation import resolve_instrument
+
+    stats = resolve_instrument(instrument, name='permutation_test')
 
     if apply_clr_transform:
         from .clr_transform import clr_transform
         # Apply CLR transformation to both conditions
-        condition_1 = clr_transform(condition_1)
-        condition_2 = clr_transform(condition_2)
+        with stats.stage('clr_transform'):
+            condition_1 = clr_transform(condition_1)
+            condition_2 = clr_transform(condition_2)
 
     # Calculate the original (observed) centroids for both conditions
     centroid_1 = np.mean(condition_1, axis=0)
     centroid_2 = np.mean(condition_2, axis=0)
-    
+
     # Compute the Euclidean distance between the two centroids
-    observed_distance = euclidean(centroid_1, centroid_2)
+    observed_distance = np.linalg.norm(centroid_1 - centroid_2)
 
     # Combine the data from both conditions into one dataset
     combined_data = np.vstack([condition_1, condition_2])
-    
+
     # Store the number of samples in the first condition
     n_1 = len(condition_1)
+    n_total = len(combined_data)
 
-    # Initialize an empty list to store distances from permuted data
-    permuted_distances = []
-    
-    # Perform permutation test by shuffling data and calculating distances
+    n_permutations = int(n_permutations)
+    if block_size is None:
+        block_size = max(1, min(1000, 4_000_000 // n_total))
+
+    rng = np.random.default_rng(seed)
+    n_performed = 0
+    n_hits = 0
+
+    # Perform permutation test block by block
     with tqdm(total=n_permutations, desc=f"Permutation {n_permutations}") as pbar:
-        for _ in range(int(n_permutations)):
-            # Randomly shuffle the combined data
-            permuted_data = resample(combined_data)
-            
-            # Split the permuted data into two new conditions
-            new_cond_1 = permuted_data[:n_1]  # First 'n_1' samples
-            new_cond_2 = permuted_data[n_1:]  # Remaining samples
-            
-            # Calculate the centroids for the permuted data
-            permuted_centroid_1 = np.mean(new_cond_1, axis=0)
-            permuted_centroid_2 = np.mean(new_cond_2, axis=0)
-            
-            # Calculate the distance between the new centroids and store it
-            permuted_distances.append(euclidean(permuted_centroid_1, permuted_centroid_2))
-
-            pbar.update(1)  # Update progress bar for each permutation
-
-    # Convert the list of permuted distances to a NumPy array for easier comparison
-    permuted_distances = np.array(permuted_distances)
-    
-    # Calculate the p-value: the proportion of permuted distances greater than or 
+        while n_performed < n_permutations:
+            n_block = min(block_size, n_permutations - n_performed)
+            with stats.stage('draw'):
+                indicators = _group_indicators(rng.random((n_block, n_total)), n_1)
+            with stats.stage('centroids'):
+                permuted_distances = np.linalg.norm(_permuted_centroid_differences(indicators, combined_data, n_1), axis=1)
+
+            block_hits = np.count_nonzero(permuted_distances >= observed_distance)
+            n_hits += block_hits
+            n_performed += n_block
+            pbar.update(n_block)  # Update progress bar for each block of permutations
+            stats.count('permutations', n_block)
+            stats.count('hits', block_hits)
+            stats.count('blocks')
+            stats.event('block')
+
+            if early_stop_hits is not None and n_hits >= early_stop_hits:
+                stats.count('early_stopped')
+                break
+
+    # Calculate the p-value: the proportion of permuted distances greater than or
     # equal to the observed distance
-    p_value = np.mean(permuted_distances >= observed_distance)
-    
+    p_value = n_hits / n_performed
+    stats.event('finish', final=True)
+
     return observed_distance, p_value
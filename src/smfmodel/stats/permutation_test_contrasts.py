@@ -0,0 +1,148 @@
+# permutation_test_contrasts
+
+def permutation_test_contrasts(data, groupby, contrasts, apply_clr_transform=False, n_permutations=1000, block_size=None, per_feature=False, correction_method='fdr_bh', seed=None, instrument=None):
+    """
+    Perform centroid permutation tests for many pairs of conditions in one pass.
+
+    The data is stacked and CLR transformed once. Every block of permutations draws one
+    set of random keys for all observations, and every contrast derives its permutations
+    from the keys of its own observations, so the draws are shared across contrasts and
+    features.
+
+    Parameters:
+    data (AnnData or np.ndarray)
+        An AnnData object, whose X is tested, or a 2D array of shape (n_samples, n_classes).
+        A sparse X is densified.
+    groupby (str or array-like)
+        The obs column holding the condition labels when data is an AnnData object,
+        otherwise an array of n_samples condition labels.
+    contrasts (list)
+        A list of (condition_1, condition_2) label pairs to compare.
+    apply_clr_transform (bool)
+        Whether to apply CLR transformation to the data. Generally used on compositional data.
+    n_permutations (int)
+        The number of permutations to perform.
+    block_size (int)
+        The number of permutations evaluated per block. Memory is bounded by
+        block_size * n_samples. Defaults to about 4 million elements per block.
+    per_feature (bool)
+        Whether to also test the absolute centroid difference of every feature.
+    correction_method (str)
+        The statsmodels multipletests method used to correct the p-values across tests.
+    seed (int)
+        Seed for the random generator.
+    instrument (RunStats, callable or bool)
+        Record the stage timings and permutation counters, see smfmodel.instrumentation.RunStats.
+
+    Returns:
+        results (pd.DataFrame)
+            One row per contrast with the observed centroid distance, its p-value and the
+            corrected p-value.
+        feature_results (pd.DataFrame)
+            Only if per_feature. One row per contrast and feature with the observed absolute
+            centroid difference, its p-value and the corrected p-value.
+    """
+    import numpy as np
+    import pandas as pd
+    from statsmodels.stats.multitest import multipletests
+    from tqdm import tqdm
+    from ..instrumentation import resolve_instrument
+    from .permutation_test import _group_indicators, _permuted_centroid_differences
+
+    stats = resolve_instrument(instrument, name='permutation_test_contrasts')
+
+    from scipy.sparse import issparse
+
+    if hasattr(data, 'obs'):
+        X = data.X
+        feature_names = np.asarray(data.var_names)
+        labels = np.asarray(data.obs[groupby]) if isinstance(groupby, str) else np.asarray(groupby)
+    else:
+        X = data
+        feature_names = np.arange(X.shape[1])
+        labels = np.asarray(groupby)
+    # np.asarray wraps a sparse matrix in a 0-d object array, so densify it explicitly
+    X = X.toarray() if issparse(X) else np.asarray(X)
+
+    if apply_clr_transform:
+        from .clr_transform import clr_transform
+        # Apply CLR transformation once for all contrasts
+        with stats.stage('clr_transform'):
+            X = clr_transform(X)
+
+    n_total = X.shape[0]
+    n_permutations = int(n_permutations)
+    if block_size is None:
+        block_size = max(1, 4_000_000 // n_total)
+
+    # Pool the observations of every contrast once
+    pooled_indices = []
+    pooled_data = []
+    group_sizes = []
+    observed_differences = []
+    for condition_1, condition_2 in contrasts:
+        indices_1 = np.flatnonzero(labels == condition_1)
+        indices_2 = np.flatnonzero(labels == condition_2)
+        if len(indices_1) == 0 or len(indices_2) == 0:
+            raise ValueError(f"Contrast {condition_1} vs {condition_2} has an empty condition.")
+        indices = np.concatenate([indices_1, indices_2])
+        pooled_indices.append(indices)
+        pooled_data.append(X[indices])
+        group_sizes.append(len(indices_1))
+        observed_differences.append(X[indices_1].mean(axis=0) - X[indices_2].mean(axis=0))
+
+    observed_differences = np.array(observed_differences)
+    observed_distances = np.linalg.norm(observed_differences, axis=1)
+
+    distance_hits = np.zeros(len(contrasts), dtype=int)
+    feature_hits = np.zeros(observed_differences.shape, dtype=int)
+
+    rng = np.random.default_rng(seed)
+    n_performed = 0
+
+    with tqdm(total=n_permutations, desc=f"Permutation {n_permutations} x {len(contrasts)} contrasts") as pbar:
+        while n_performed < n_permutations:
+            n_block = min(block_size, n_permutations - n_performed)
+            # One set of keys for all observations, shared by every contrast
+            with stats.stage('draw'):
+                keys = rng.random((n_block, n_total))
+            for c, (indices, contrast_data, n_1) in enumerate(zip(pooled_indices, pooled_data, group_sizes)):
+                with stats.stage('draw'):
+                    indicators = _group_indicators(keys[:, indices], n_1)
+                with stats.stage('centroids'):
+                    permuted_differences = _permuted_centroid_differences(indicators, contrast_data, n_1)
+                    distance_hits[c] += np.count_nonzero(np.linalg.norm(permuted_differences, axis=1) >= observed_distances[c])
+                    if per_feature:
+                        feature_hits[c] += np.count_nonzero(np.abs(permuted_differences) >= np.abs(observed_differences[c]), axis=0)
+            n_performed += n_block
+            pbar.update(n_block)  # Update progress bar for each block of permutations
+            stats.count('permutations', n_block * len(contrasts))
+            stats.count('blocks')
+            stats.event('block')
+
+    p_values = distance_hits / n_performed
+    stats.histogram('hits_per_contrast', distance_hits)
+    stats.event('finish', final=True)
+    results = pd.DataFrame({
+        'condition_1': [contrast[0] for contrast in contrasts],
+        'condition_2': [contrast[1] for contrast in contrasts],
+        'observed_distance': observed_distances,
+        'p_value': p_values,
+        'p_adj': multipletests(p_values, method=correction_method)[1]
+    })
+
+    if not per_feature:
+        return results
+
+    feature_p_values = (feature_hits / n_performed).ravel()
+    n_features = observed_differences.shape[1]
+    feature_results = pd.DataFrame({
+        'condition_1': np.repeat(results['condition_1'].to_numpy(), n_features),
+        'condition_2': np.repeat(results['condition_2'].to_numpy(), n_features),
+        'feature': np.tile(feature_names, len(contrasts)),
+        'observed_difference': np.abs(observed_differences).ravel(),
+        'p_value': feature_p_values,
+        'p_adj': multipletests(feature_p_values, method=correction_method)[1]
+    })
+
+    return results, feature_results
@@ -0,0 +1,14 @@
+from .._lazy import attach
+
+# Functions load with their module on first access
+__getattr__, __dir__ = attach(__name__, functions={
+    "embedding_density": "embedding_density",
+    "incremental_pca": "incremental_pca",
+    "neighbors": "neighbors"
+})
+
+__all__ = [
+    "embedding_density",
+    "incremental_pca",
+    "neighbors"
+]
@@ -0,0 +1,55 @@
+# incremental_pca
+
+def incremental_pca(adata, n_comps=None, chunk_size=100_000, key_added='X_pca', dtype='float32'):
+    """
+    Principal component analysis of X in chunks of rows, for AnnData objects too large for sc.tl.pca.
+
+    An sklearn IncrementalPCA is fitted with one partial_fit per chunk of rows, and the chunks are
+    projected in a second pass. Only slices of X are read, so a backed AnnData
+    (ad.read_h5ad(path, backed='r')) is never loaded whole. The results are stored where
+    sc.tl.pca puts them, so scanpy's plotting and neighbors functions can use them.
+
+    IncrementalPCA only keeps n_comps components between chunks, so the fit is exact when all
+    components are kept and approximate when the discarded variances are close to the kept ones.
+    Transition matrices have few columns, so keeping them all is cheap.
+
+    Parameters:
+        adata (AnnData): The AnnData object, may be backed.
+        n_comps (int): Number of principal components. Defaults to min(50, n_vars - 1).
+        chunk_size (int): Number of rows per chunk. Must be at least n_comps. Defaults to 100000.
+        key_added (str): obsm key of the projection. Defaults to 'X_pca'.
+        dtype (str): The dtype of the projection. Defaults to 'float32'.
+
+    Returns:
+        None. Adds obsm[key_added], varm['PCs'] and uns['pca'] with the 'variance' and 'variance_ratio'.
+    """
+    import numpy as np
+    from sklearn.decomposition import IncrementalPCA
+    from tqdm import tqdm
+
+    n_obs, n_vars = adata.shape
+    if n_comps is None:
+        n_comps = min(50, n_vars - 1)
+    X = adata.X
+
+    # Fold a short last chunk into the one before, partial_fit needs at least n_comps rows
+    starts = list(range(0, n_obs, chunk_size))
+    if len(starts) > 1 and n_obs - starts[-1] < n_comps:
+        starts.pop()
+    bounds = list(zip(starts, starts[1:] + [n_obs]))
+
+    pca = IncrementalPCA(n_components=n_comps)
+    for start, stop in tqdm(bounds, desc="Fitting incremental PCA"):
+        pca.partial_fit(np.asarray(X[start:stop], dtype=float))
+
+    projection = np.empty((n_obs, n_comps), dtype=dtype)
+    for start, stop in tqdm(bounds, desc="Projecting onto the principal components"):
+        projection[start:stop] = pca.transform(np.asarray(X[start:stop], dtype=float))
+
+    adata.obsm[key_added] = projection
+    adata.varm['PCs'] = pca.components_.T
+    adata.uns['pca'] = {
+        'params': {'zero_center': True, 'use_highly_variable': False, 'chunk_size': chunk_size},
+        'variance': pca.explained_variance_,
+        'variance_ratio': pca.explained_variance_ratio_
+    }
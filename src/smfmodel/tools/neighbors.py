@@ -0,0 +1,121 @@
+# neighbors
+
+def _gauss_connectivities(distances, indices, n_obs):
+    """
+    Gaussian kernel connectivities of a kNN graph, as scanpy's method='gauss' with knn=True.
+
+    The width of every point is the median distance to its neighbors, and
+    W_ij = sqrt(2 s_i s_j / (s_i^2 + s_j^2)) exp(-d_ij^2 / (s_i^2 + s_j^2)). W is symmetrized with
+    the maximum of W and W^T.
+
+    Returns:
+        distances (scipy.sparse.csr_matrix): (n_obs, n_obs) kNN distances.
+        connectivities (scipy.sparse.csr_matrix): (n_obs, n_obs) symmetric connectivities.
+    """
+    import numpy as np
+    from scipy.sparse import csr_matrix
+
+    n_rows, k = indices.shape
+    sigmas = np.full(n_obs, np.nan)
+    sigmas[:n_rows] = np.median(distances, axis=1)
+    # Points that are only neighbors (not queried) take the median width
+    sigmas[np.isnan(sigmas)] = np.median(sigmas[:n_rows])
+    sigmas_sq = sigmas ** 2
+
+    rows = np.repeat(np.arange(n_rows), k)
+    cols = indices.ravel()
+    den = sigmas_sq[rows] + sigmas_sq[cols]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = np.sqrt(2 * sigmas[rows] * sigmas[cols] / den) * np.exp(-distances.ravel() ** 2 / den)
+    weights[~np.isfinite(weights)] = 0
+
+    distance_matrix = csr_matrix((distances.ravel(), (rows, cols)), shape=(n_obs, n_obs))
+    connectivities = csr_matrix((weights, (rows, cols)), shape=(n_obs, n_obs))
+    connectivities = connectivities.maximum(connectivities.T).tocsr()
+
+    return distance_matrix, connectivities
+
+def neighbors(adata, n_neighbors=15, use_rep='X_pca', n_pcs=None, n_landmarks=None, chunk_size=100_000, n_jobs=1, seed=0, key_added=None):
+    """
+    Computes a k-nearest-neighbor graph of an embedding in chunks, in the layout of sc.pp.neighbors.
+
+    The neighbors are searched with an sklearn NearestNeighbors tree over obsm[use_rep], and the
+    points are queried in chunks of rows, so the memory is bounded by the graph itself. With
+    n_landmarks, the tree only holds a uniform subsample of landmark points: every point is linked
+    to its nearest landmarks, which is an out-of-sample projection of all points onto the
+    landmark graph. This bounds the cost of the tree for tens of millions of rows at the price of
+    an approximate graph.
+
+    Parameters:
+        adata (AnnData): The AnnData object, e.g. after incremental_pca. May be backed.
+        n_neighbors (int): Size of the neighborhood, including the point itself, as in scanpy. Defaults to 15.
+        use_rep (str): obsm key of the embedding. Defaults to 'X_pca'.
+        n_pcs (int): Use only the first n_pcs columns of the embedding. Defaults to all.
+        n_landmarks (int): Search the neighbors among this many landmark points only. Defaults to None, all points.
+        chunk_size (int): Number of points queried at once. Defaults to 100000.
+        n_jobs (int): Number of parallel jobs of the neighbor queries. Defaults to 1.
+        seed (int): Seed of the landmark subsample. Defaults to 0.
+        key_added (str): Prefix of the obsp and uns keys, as in scanpy. Defaults to None, 'distances',
+            'connectivities' and 'neighbors'.
+
+    Returns:
+        None. Adds obsp['distances'], obsp['connectivities'] and uns['neighbors'], and obs['landmark'] with n_landmarks.
+    """
+    import numpy as np
+    from sklearn.neighbors import NearestNeighbors
+    from tqdm import tqdm
+
+    embedding = adata.obsm[use_rep]
+    if n_pcs is not None:
+        embedding = embedding[:, :n_pcs]
+    n_obs = embedding.shape[0]
+
+    if n_landmarks is None or n_landmarks >= n_obs:
+        landmarks = np.arange(n_obs)
+    else:
+        landmarks = np.sort(np.random.default_rng(seed).choice(n_obs, size=n_landmarks, replace=False))
+    is_landmark = np.zeros(n_obs, dtype=bool)
+    is_landmark[landmarks] = True
+
+    tree = NearestNeighbors(n_neighbors=n_neighbors, n_jobs=n_jobs).fit(np.asarray(embedding[landmarks]))
+
+    # The point itself counts towards n_neighbors, so keep n_neighbors - 1 other points
+    k = n_neighbors - 1
+    distances = np.empty((n_obs, k))
+    indices = np.empty((n_obs, k), dtype=np.int64)
+    for start in tqdm(range(0, n_obs, chunk_size), desc="Searching nearest neighbors"):
+        stop = min(start + chunk_size, n_obs)
+        chunk_distances, chunk_indices = tree.kneighbors(np.asarray(embedding[start:stop]))
+        chunk_indices = landmarks[chunk_indices]
+        # Drop the point itself, or the farthest neighbor when the point is not among the results
+        is_self = chunk_indices == np.arange(start, stop)[:, np.newaxis]
+        is_self[~is_self.any(axis=1), -1] = True
+        keep = ~is_self
+        distances[start:stop] = chunk_distances[keep].reshape(-1, k)
+        indices[start:stop] = chunk_indices[keep].reshape(-1, k)
+
+    distance_matrix, connectivities = _gauss_connectivities(distances, indices, n_obs)
+
+    if key_added is None:
+        key_added = 'neighbors'
+        distances_key, connectivities_key = 'distances', 'connectivities'
+    else:
+        distances_key, connectivities_key = f'{key_added}_distances', f'{key_added}_connectivities'
+
+    adata.obsp[distances_key] = distance_matrix
+    adata.obsp[connectivities_key] = connectivities
+    adata.uns[key_added] = {
+        'connectivities_key': connectivities_key,
+        'distances_key': distances_key,
+        'params': {
+            'n_neighbors': n_neighbors,
+            'method': 'gauss',
+            'metric': 'euclidean',
+            'random_state': seed,
+            'use_rep': use_rep,
+            **({} if n_pcs is None else {'n_pcs': n_pcs}),
+            **({} if n_landmarks is None else {'n_landmarks': int(len(landmarks))})
+        }
+    }
+    if n_landmarks is not None:
+        adata.obs['landmark'] = is_landmark
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from smfmodel.markov_models import abc_smc_transition_matrix_solutions, solve_steady_state_batch
+
+OBSERVED = np.array([0.4, 0.3, 0.2, 0.1])
+THRESHOLD = np.full(4, 0.05)
+PARAMS = {'total_matrices': 200, 'allow_self_transitions': True, 'batch_size': 512, 'seed': 0}
+
+
+def test_converged_population_is_inside_the_box():
+    adata = abc_smc_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', PARAMS)
+
+    record = adata.uns['abc_smc']
+    assert adata.n_obs == 200
+    assert record['converged'] and record['final_tolerance'] == 1
+    assert np.all(np.diff(record['tolerance']) <= 0)
+    assert np.all(record['accepted'] == 200)
+    steady_states, _ = solve_steady_state_batch(adata.X.reshape(-1, 4, 4))
+    assert np.all(np.abs(steady_states - OBSERVED) < THRESHOLD)
+    assert np.all(adata.obs['abc_distance'] < 1)
+    assert adata.obs['abc_weight'].sum() == pytest.approx(1)
+
+
+def test_seed_reproduces_the_population():
+    first = abc_smc_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', PARAMS)
+    second = abc_smc_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', PARAMS)
+
+    np.testing.assert_array_equal(first.X, second.X)
+
+
+@pytest.mark.parametrize('limit', [{'max_rounds': 1}, {'max_simulations': 1500}])
+def test_running_out_warns_and_is_recorded(limit):
+    with pytest.warns(RuntimeWarning, match='before reaching the variance threshold box'):
+        adata = abc_smc_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', dict(PARAMS, **limit))
+
+    record = adata.uns['abc_smc']
+    assert not record['converged']
+    assert record['final_tolerance'] == record['tolerance'][-1] > 1
+    assert np.all(adata.obs['abc_distance'] < record['final_tolerance'])
+
+
+def test_too_few_simulations_for_a_first_population():
+    with pytest.raises(ValueError, match='too small'):
+        abc_smc_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', dict(PARAMS, total_matrices=1000, max_simulations=100))
@@ -0,0 +1,47 @@
+import anndata as ad
+import numpy as np
+
+from smfmodel.markov_models import append_transitions_to_h5ad, generate_transition_matrix_solutions, random_transition_matrix
+
+OBSERVED = np.array([0.4, 0.3, 0.2, 0.1])
+THRESHOLD = np.full(4, 0.1)
+
+
+def test_appended_chunks_read_back_as_anndata(tmp_path):
+    path = str(tmp_path / 'store.h5ad')
+    rng = np.random.default_rng(0)
+    chunks = [random_transition_matrix(n_matrices=n, rng=rng) for n in (5, 7)]
+
+    append_transitions_to_h5ad(path, chunks[0], 'WT')
+    n_obs = append_transitions_to_h5ad(path, chunks[1], 'KO')
+
+    adata = ad.read_h5ad(path)
+    assert n_obs == 12
+    np.testing.assert_array_equal(adata.X, np.concatenate(chunks).reshape(12, 16))
+    assert list(adata.obs['condition']) == ['WT'] * 5 + ['KO'] * 7
+    assert adata.var_names[1] == '0_1'
+
+
+def test_codes_widen_past_127_conditions(tmp_path):
+    path = str(tmp_path / 'store.h5ad')
+    T = random_transition_matrix(n_matrices=1, rng=np.random.default_rng(1))
+
+    for index in range(200):
+        append_transitions_to_h5ad(path, T, f'condition_{index}', chunk_size=16)
+
+    adata = ad.read_h5ad(path)
+    assert list(adata.obs['condition']) == [f'condition_{index}' for index in range(200)]
+
+
+def test_streamed_run_resumes_and_matches_in_memory_run(tmp_path):
+    path = str(tmp_path / 'solutions.h5ad')
+    params = {'seed': 3, 'batch_size': 128, 'chunk_size': 64}
+    in_memory = generate_transition_matrix_solutions(OBSERVED, THRESHOLD, 'WT', dict(params, total_matrices=300, return_array=True))
+
+    generate_transition_matrix_solutions(OBSERVED, THRESHOLD, 'WT', dict(params, total_matrices=100, output_path=path))
+    # Extending the finished run only generates the missing matrices
+    generate_transition_matrix_solutions(OBSERVED, THRESHOLD, 'WT', dict(params, total_matrices=300, output_path=path))
+
+    adata = ad.read_h5ad(path)
+    np.testing.assert_array_equal(adata.X, in_memory.reshape(300, 16))
+    assert adata.uns['generation_state']['WT']['n_matrices'] == 300
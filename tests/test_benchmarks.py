@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+
+
+def _run_benchmarks(*args):
+    return subprocess.run([sys.executable, os.path.join(BENCHMARKS, 'run_benchmarks.py'), '--repeats', '1', *args], capture_output=True, text=True)
+
+
+def test_synthetic_data_is_seeded(monkeypatch):
+    monkeypatch.syspath_prepend(BENCHMARKS)
+    import synthetic
+
+    Ts = synthetic.transition_matrices(10, seed=3)
+    np.testing.assert_array_equal(Ts, synthetic.transition_matrices(10, seed=3))
+    np.testing.assert_allclose(Ts.sum(axis=-1), 1)
+    np.testing.assert_allclose(synthetic.proportions(5, 3).sum(axis=1), 1)
+    adata = synthetic.transition_adata(20)
+    assert adata.shape == (20, 16)
+    assert list(adata.obs['condition'].cat.categories) == ['WT', 'KO']
+
+
+def test_run_and_compare_to_a_baseline(tmp_path):
+    output = tmp_path / 'baseline.json'
+
+    run = _run_benchmarks('--filter', 'solve_steady_state*', '--output', str(output))
+
+    assert run.returncode == 0, run.stderr
+    report = json.loads(output.read_text())
+    assert {result['name'] for result in report['results']} == {'solve_steady_state_batch', 'solve_steady_state'}
+    assert all(result['scale'] == 'small' and result['seconds'] > 0 for result in report['results'])
+
+    # A generous bound passes, a baseline far faster than the current run is a regression
+    assert _run_benchmarks('--filter', 'solve_steady_state_batch', '--baseline', str(output), '--max-slowdown', '1000').returncode == 0
+    for result in report['results']:
+        result['seconds'] *= 1e-6
+    output.write_text(json.dumps(report))
+    regressed = _run_benchmarks('--filter', 'solve_steady_state_batch', '--baseline', str(output))
+    assert regressed.returncode == 1
+    assert json.loads(regressed.stdout)['regressions'][0]['metric'] == 'seconds'
@@ -0,0 +1,56 @@
+import numpy as np
+
+from smfmodel.markov_models import load_transitions_into_adata, random_transition_matrix
+from smfmodel.plotting import binned_kde_2d, kde_contour_levels, transition_pair_densities
+
+NAMES = [f'{i}_{j}' for i in range(4) for j in range(4)]
+
+
+def _exact_kde(x, y, grid_x, grid_y, bandwidth):
+    # Axis-aligned Gaussian product kernel, the kernel the binned estimate approximates
+    kx = np.exp(-0.5 * ((grid_x[:, None] - x[None]) / bandwidth[0]) ** 2) / (np.sqrt(2 * np.pi) * bandwidth[0])
+    ky = np.exp(-0.5 * ((grid_y[:, None] - y[None]) / bandwidth[1]) ** 2) / (np.sqrt(2 * np.pi) * bandwidth[1])
+    return kx @ ky.T / len(x)
+
+
+def test_matches_the_exact_kde():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=2000)
+    y = 0.5 * x + rng.normal(scale=0.5, size=2000)
+
+    grid = binned_kde_2d(x, y, gridsize=256)
+
+    exact = _exact_kde(x, y, grid['x'], grid['y'], grid['bandwidth'])
+    assert grid['density'].shape == (256, 256)
+    assert np.abs(grid['density'] - exact).max() < 0.02 * exact.max()
+    dx, dy = np.diff(grid['x'][:2])[0], np.diff(grid['y'][:2])[0]
+    np.testing.assert_allclose(grid['density'].sum() * dx * dy, 1, atol=1e-3)
+
+
+def test_contour_levels_enclose_the_requested_mass():
+    rng = np.random.default_rng(1)
+    grid = binned_kde_2d(rng.normal(size=5000), rng.normal(size=5000), gridsize=128)
+    density = grid['density']
+
+    levels = kde_contour_levels(density, levels=[0.2, 0.5, 0.8])
+
+    assert np.all(np.diff(levels) > 0)
+    enclosed = [density[density >= level].sum() / density.sum() for level in levels]
+    np.testing.assert_allclose(enclosed, [0.8, 0.5, 0.2], atol=0.01)
+    assert len(kde_contour_levels(density, levels=10)) == 10
+
+
+def test_pair_densities_match_binned_kde_per_pair():
+    Ts = random_transition_matrix(n_matrices=3000, rng=np.random.default_rng(2))
+    adata = load_transitions_into_adata([Ts, Ts[:100]], NAMES, ['WT', 'KO'])
+    pairs = [('0_1', '1_2'), ('0_1', '3_0'), ('1_2', '2_3')]
+
+    densities = transition_pair_densities(adata, 'WT', pairs=pairs, gridsize=64, chunk_size=700)
+
+    assert set(densities) == set(pairs)
+    for x_label, y_label in pairs:
+        x = Ts[:, int(x_label[0]), int(x_label[2])]
+        y = Ts[:, int(y_label[0]), int(y_label[2])]
+        expected = binned_kde_2d(x, y, extent=((0, 1), (0, 1)), gridsize=64)
+        np.testing.assert_allclose(densities[(x_label, y_label)]['density'], expected['density'], rtol=1e-8, atol=1e-10)
+        np.testing.assert_allclose(densities[(x_label, y_label)]['bandwidth'], expected['bandwidth'])
@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+
+from smfmodel.instrumentation import RunStats
+from smfmodel.markov_models import cached_transition_matrix_solutions, generate_transition_matrix_solutions
+
+OBSERVED = np.array([0.4, 0.3, 0.2, 0.1])
+THRESHOLD = np.full(4, 0.1)
+
+
+def _params(cache_dir, **params):
+    return dict({'seed': 0, 'batch_size': 128, 'total_matrices': 100, 'return_array': True, 'cache_dir': str(cache_dir)}, **params)
+
+
+def _entries(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith('.npy'))
+
+
+def test_hit_returns_the_stored_matrices_memory_mapped(tmp_path):
+    first = cached_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path))
+    stats = RunStats()
+    second = cached_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path, instrument=stats))
+
+    reference = generate_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path))
+    np.testing.assert_array_equal(first, reference)
+    np.testing.assert_array_equal(second, reference)
+    assert isinstance(second.base, np.memmap) or isinstance(second, np.memmap)
+    assert stats.counters['cache_hits'] == 1
+
+
+def test_longer_runs_extend_the_entry(tmp_path):
+    cached_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path, total_matrices=50))
+    extended = cached_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path, total_matrices=200))
+    shorter = cached_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path, total_matrices=20))
+
+    reference = generate_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path, total_matrices=200))
+    np.testing.assert_array_equal(extended, reference)
+    np.testing.assert_array_equal(shorter, reference[:20])
+    assert len(_entries(tmp_path)) == 1
+
+
+def test_array_dirichlet_alpha_is_hashed(tmp_path):
+    alpha = np.full((4, 4), 2.0)
+
+    solutions = cached_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path, dirichlet_alpha=alpha))
+
+    stats = RunStats()
+    again = cached_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path, dirichlet_alpha=alpha.copy(), instrument=stats))
+    assert solutions.shape == (100, 4, 4)
+    np.testing.assert_array_equal(again, solutions)
+    assert stats.counters['cache_hits'] == 1
+
+
+def test_different_inputs_get_different_entries_and_no_seed_bypasses(tmp_path):
+    cached_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path))
+    cached_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path, seed=1))
+    cached_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path, seed=None))
+
+    assert len(_entries(tmp_path)) == 2
+
+
+def test_eviction_and_stale_temporary_files(tmp_path):
+    stale = tmp_path / 'crashed.npy.123.tmp'
+    stale.write_bytes(b'partial')
+    os.utime(stale, (0, 0))
+
+    cached_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path, seed=0))
+    cached_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', _params(tmp_path, seed=1, cache_max_bytes=1))
+
+    # Only the entry just written survives a bound below its own size
+    assert len(_entries(tmp_path)) == 1
+    assert not stale.exists()
+    assert not any(name.endswith('.tmp') for name in os.listdir(tmp_path))
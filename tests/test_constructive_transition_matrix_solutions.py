@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from smfmodel.markov_models import check_detailed_balance_batch, constructive_transition_matrix_solutions, solve_steady_state_batch
+
+OBSERVED = np.array([0.4, 0.3, 0.2, 0.1])
+THRESHOLD = np.full(4, 0.02)
+
+
+def _construct(**params):
+    return constructive_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', dict({'total_matrices': 100, 'allow_self_transitions': True, 'seed': 0, 'return_array': True}, **params))
+
+
+def test_constructed_matrices_are_inside_the_threshold():
+    solutions, report = _construct()
+
+    assert solutions.shape == (100, 4, 4)
+    np.testing.assert_allclose(solutions.sum(axis=-1), 1)
+    assert np.all(np.abs(solve_steady_state_batch(solutions)[0] - OBSERVED) < THRESHOLD)
+    assert np.all(solutions[:, 0, 2] == 0)
+    assert report['accepted'] == 100
+    assert 0 < report['acceptance_rate'] <= 1
+
+
+def test_reversible_matrices_satisfy_detailed_balance():
+    solutions, _ = _construct(reversible=True)
+
+    assert np.all(check_detailed_balance_batch(solutions, 1e-9))
+
+
+def test_small_batches_do_not_abort():
+    # Most single draws miss the box after renormalization, or fail the verification
+    solutions, _ = _construct(batch_size=1, total_matrices=20)
+
+    assert len(solutions) == 20
+
+
+def test_infeasible_mask_raises():
+    # The ring without self transitions is periodic, so states 0 and 2 always hold half of the mass
+    with pytest.raises(ValueError, match='admits no matrices'):
+        _construct(allow_self_transitions=False, max_constructions=500)
+
+
+def test_box_off_the_simplex_raises():
+    # Rounded proportions summing to 0.99 leave the whole box below the simplex
+    params = {'size': 3, 'allow_self_transitions': True, 'max_constructions': 100, 'seed': 0}
+    with pytest.raises(ValueError, match='does not intersect the simplex'):
+        constructive_transition_matrix_solutions(np.full(3, 0.33), np.full(3, 0.001), 'test', params)
+
+
+def test_box_touching_the_simplex_raises():
+    # The upper corner of the box is the only point on the simplex, which no renormalized draw reaches
+    params = {'allow_self_transitions': True, 'batch_size': 64, 'max_constructions': 1000, 'seed': 0}
+    with pytest.raises(ValueError, match='landed inside the threshold box after 1024 draws'):
+        constructive_transition_matrix_solutions(np.full(4, 0.2), np.full(4, 0.05), 'test', params)
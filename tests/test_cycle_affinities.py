@@ -0,0 +1,48 @@
+import numpy as np
+
+from smfmodel.markov_models import (
+    cycle_affinities_batch,
+    cycle_fluxes_batch,
+    entropy_production_batch,
+    fundamental_cycle_basis,
+    random_transition_matrix,
+    transition_mask,
+)
+
+
+def test_number_of_fundamental_cycles():
+    assert len(fundamental_cycle_basis(transition_mask(4))['cycles']) == 1
+    # The complete graph on 4 states has 6 edges, 6 - 4 + 1 = 3 independent cycles
+    assert len(fundamental_cycle_basis(transition_mask(4, allow_self_transitions=True, constrain_transitions_to_adjacent=False))['cycles']) == 3
+
+
+def test_basis_is_cached_and_read_only():
+    mask = transition_mask(5)
+
+    basis = fundamental_cycle_basis(mask)
+
+    assert fundamental_cycle_basis(mask.copy()) is basis
+    assert not basis['incidence'].flags.writeable
+
+
+def test_ring_affinity_is_the_log_ratio_of_rate_products():
+    Ts = random_transition_matrix(4, n_matrices=10, rng=np.random.default_rng(0))
+    basis = fundamental_cycle_basis(transition_mask(4))
+    cycle = basis['cycles'][0] + basis['cycles'][0][:1]
+
+    affinities = cycle_affinities_batch(Ts, basis)
+
+    forward = np.prod([Ts[:, a, b] for a, b in zip(cycle[:-1], cycle[1:])], axis=0)
+    backward = np.prod([Ts[:, b, a] for a, b in zip(cycle[:-1], cycle[1:])], axis=0)
+    np.testing.assert_allclose(affinities[:, 0], np.log(forward / backward))
+
+
+def test_cycle_decomposition_of_the_entropy_production():
+    mask = transition_mask(4, constrain_transitions_to_adjacent=False)
+    Ts = random_transition_matrix(n_matrices=50, rng=np.random.default_rng(1), mask=mask)
+    basis = fundamental_cycle_basis(mask)
+
+    # Schnakenberg: sigma = sum_c J_c A_c
+    dissipation = np.sum(cycle_fluxes_batch(Ts, basis) * cycle_affinities_batch(Ts, basis), axis=1)
+
+    np.testing.assert_allclose(dissipation, entropy_production_batch(Ts))
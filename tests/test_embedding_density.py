@@ -0,0 +1,56 @@
+import anndata as ad
+import numpy as np
+import pandas as pd
+
+from smfmodel.tools import embedding_density
+
+
+def _adata(seed=0):
+    rng = np.random.default_rng(seed)
+    embedding = np.concatenate([rng.normal(0, 1, size=(600, 2)), rng.normal(4, 0.5, size=(400, 2))])
+    condition = np.repeat(['WT', 'KO'], [600, 400]).astype(object)
+    adata = ad.AnnData(obs=pd.DataFrame({'condition': condition}, index=[str(i) for i in range(1000)]))
+    adata.obsm['X_umap'] = embedding
+    return adata, embedding
+
+
+def test_densities_are_scaled_within_each_condition():
+    adata, embedding = _adata()
+
+    embedding_density(adata, basis='umap', gridsize=128, chunk_size=300)
+
+    density = adata.obs['umap_density_condition']
+    assert adata.uns['umap_density_condition_params'] == {'covariate': 'condition', 'components': [0, 1]}
+    for condition, centre in [('WT', 0), ('KO', 4)]:
+        values = density[adata.obs['condition'] == condition].to_numpy()
+        assert np.all((values >= 0) & (values <= 1))
+        assert values.max() > 0.9
+        # The densest points are the ones near the centre of their condition
+        points = embedding[(adata.obs['condition'] == condition).to_numpy()]
+        distance = np.linalg.norm(points - centre, axis=1)
+        assert np.corrcoef(distance, values)[0, 1] < -0.8
+
+
+def test_points_without_a_condition_get_nan():
+    adata, _ = _adata()
+    adata.obs['condition'] = adata.obs['condition'].astype(object)
+    adata.obs.loc[['0', '1', '999'], 'condition'] = np.nan
+    # A far away point without a condition must not stretch the grid
+    adata.obsm['X_umap'][999] = [100, 100]
+    complete = adata[adata.obs['condition'].notna().to_numpy()].copy()
+
+    embedding_density(adata, basis='umap', gridsize=64, chunk_size=250)
+    embedding_density(complete, basis='umap', gridsize=64, chunk_size=250)
+
+    values = adata.obs['umap_density_condition'].to_numpy()
+    assert np.isnan(values[[0, 1, 999]]).all()
+    np.testing.assert_allclose(values[2:999], complete.obs['umap_density_condition'].to_numpy(), atol=1e-12)
+
+
+def test_all_points_together():
+    adata, _ = _adata()
+
+    embedding_density(adata, basis='umap', groupby=None, components=(1, 0))
+
+    assert 0.9 < adata.obs['umap_density'].max() <= 1
+    assert adata.uns['umap_density_params']['components'] == [1, 0]
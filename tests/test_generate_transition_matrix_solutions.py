@@ -0,0 +1,41 @@
+import numpy as np
+
+from smfmodel.markov_models import generate_transition_matrix_solutions, solve_steady_state_batch
+
+OBSERVED = np.array([0.4, 0.3, 0.2, 0.1])
+THRESHOLD = np.full(4, 0.1)
+
+
+def _generate(**params):
+    return generate_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', dict({'total_matrices': 200, 'seed': 0, 'batch_size': 256}, **params))
+
+
+def test_returns_total_matrices_inside_the_threshold():
+    solutions = _generate(return_array=True)
+
+    assert solutions.shape == (200, 4, 4)
+    np.testing.assert_allclose(solutions.sum(axis=-1), 1)
+    steady_states, _ = solve_steady_state_batch(solutions)
+    assert np.all(np.abs(steady_states - OBSERVED) < THRESHOLD)
+
+
+def test_returns_a_list_by_default():
+    solutions = _generate()
+
+    assert isinstance(solutions, list)
+    assert len(solutions) == 200
+    assert solutions[0].shape == (4, 4)
+
+
+def test_masked_transitions_stay_zero():
+    solutions = _generate(return_array=True)
+
+    # The default ring without self transitions
+    assert np.all(np.diagonal(solutions, axis1=-2, axis2=-1) == 0)
+    assert np.all(solutions[:, 0, 2] == 0)
+    assert np.all(solutions[:, 1, 3] == 0)
+
+
+def test_seed_makes_runs_reproducible():
+    np.testing.assert_array_equal(_generate(return_array=True), _generate(return_array=True))
+    assert not np.array_equal(_generate(return_array=True), _generate(return_array=True, seed=1))
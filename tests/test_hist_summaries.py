@@ -0,0 +1,68 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from smfmodel.plotting import hist_summaries
+
+PARAMS = {'n_bins': 40, 'window_size': 3}
+
+
+def _arrays():
+    rng = np.random.default_rng(0)
+    return [rng.normal(0.2, 1, size=5000), rng.normal(-0.5, 0.5, size=3000)]
+
+
+def test_histograms_and_signed_means():
+    arrays = _arrays()
+
+    summaries = hist_summaries(arrays, PARAMS)
+
+    assert summaries['range'] == (min(a.min() for a in arrays), max(a.max() for a in arrays))
+    for array, summary in zip(arrays, summaries['arrays']):
+        counts, bins = np.histogram(array, bins=40)
+        np.testing.assert_array_equal(summary['counts'], counts)
+        np.testing.assert_allclose(summary['bins'], bins)
+        assert summary['mean_pos'] == pytest.approx(array[array >= 0].mean())
+        assert summary['mean_neg'] == pytest.approx(array[array <= 0].mean())
+        np.testing.assert_allclose(summary['rolling_average'][1:-1], np.convolve(counts, np.ones(3) / 3, mode='valid'))
+
+
+def test_cdf_and_half_max():
+    arrays = _arrays()
+
+    summaries = hist_summaries(arrays, dict(PARAMS, cdf_points=2000))
+
+    for array, summary in zip(arrays, summaries['arrays']):
+        assert np.all(np.diff(summary['cdf']) >= 0)
+        assert summary['cdf'][-1] == pytest.approx(1, abs=0.01)
+        assert summary['half_max'] == pytest.approx(np.median(array), abs=0.05)
+
+
+def test_chunks_shared_bins_and_pickling():
+    arrays = _arrays()
+
+    whole = hist_summaries(arrays, dict(PARAMS, shared_bins=True))
+    chunked = hist_summaries(arrays, dict(PARAMS, shared_bins=True, chunk_size=333))
+
+    np.testing.assert_allclose(whole['arrays'][0]['bins'], whole['arrays'][1]['bins'])
+    for a, b in zip(whole['arrays'], chunked['arrays']):
+        np.testing.assert_array_equal(a['counts'], b['counts'])
+        np.testing.assert_allclose(a['cdf'], b['cdf'])
+        assert a['mean_pos'] == pytest.approx(b['mean_pos'])
+    restored = pickle.loads(pickle.dumps(chunked))
+    np.testing.assert_array_equal(restored['arrays'][1]['counts'], chunked['arrays'][1]['counts'])
+
+
+def test_plot_hist_replots_from_summaries():
+    matplotlib = pytest.importorskip('matplotlib')
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from smfmodel.plotting import plot_hist
+
+    params = dict(PARAMS, show_bars=True, show_roll=True, color_palette='viridis', labels=['a', 'b'], save=True, show_mean=True, show_cdf=True)
+
+    plot_hist(None, params, summaries=hist_summaries(_arrays(), params))
+
+    assert len(plt.gca().lines) > 0
+    plt.close('all')
@@ -0,0 +1,43 @@
+import anndata as ad
+import numpy as np
+from sklearn.decomposition import PCA
+
+from smfmodel.markov_models import load_transitions_into_adata, random_transition_matrix
+from smfmodel.tools import incremental_pca
+
+NAMES = [f'{i}_{j}' for i in range(4) for j in range(4)]
+
+
+def _adata(n=1000):
+    Ts = random_transition_matrix(4, allow_self_transitions=True, constrain_transitions_to_adjacent=False, n_matrices=n, rng=np.random.default_rng(0))
+    return load_transitions_into_adata(Ts, NAMES, 'WT')
+
+
+def test_matches_pca_with_all_components():
+    adata = _adata()
+    X = np.asarray(adata.X)
+
+    # 1000 rows in chunks of 333 leave a last chunk of 1, folded into the one before
+    incremental_pca(adata, n_comps=12, chunk_size=333, dtype='float64')
+
+    pca = PCA(n_components=12).fit(X)
+    np.testing.assert_allclose(adata.uns['pca']['variance'], pca.explained_variance_, rtol=1e-8)
+    np.testing.assert_allclose(adata.uns['pca']['variance_ratio'], pca.explained_variance_ratio_, rtol=1e-8)
+    # Components are defined up to their sign
+    signs = np.sign(np.sum(adata.varm['PCs'] * pca.components_.T, axis=0))
+    np.testing.assert_allclose(adata.varm['PCs'] * signs, pca.components_.T, atol=1e-8)
+    np.testing.assert_allclose(adata.obsm['X_pca'] * signs, pca.transform(X), atol=1e-8)
+
+
+def test_backed_adata_and_defaults(tmp_path):
+    adata = _adata(500)
+    path = str(tmp_path / 'transitions.h5ad')
+    adata.write_h5ad(path)
+    backed = ad.read_h5ad(path, backed='r')
+
+    incremental_pca(backed, chunk_size=128)
+
+    assert backed.obsm['X_pca'].shape == (500, 15)
+    assert backed.obsm['X_pca'].dtype == np.float32
+    incremental_pca(adata, chunk_size=500)
+    np.testing.assert_allclose(np.abs(backed.obsm['X_pca']), np.abs(adata.obsm['X_pca']), atol=1e-4)
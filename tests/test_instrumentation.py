@@ -0,0 +1,82 @@
+import logging
+import pickle
+
+import numpy as np
+import pytest
+
+from smfmodel.instrumentation import NULL_STATS, RunStats, resolve_instrument
+from smfmodel.markov_models import generate_transition_matrix_solutions
+from smfmodel.stats import permutation_test
+
+OBSERVED = np.array([0.4, 0.3, 0.2, 0.1])
+THRESHOLD = np.full(4, 0.1)
+
+
+def test_counters_timings_and_rates():
+    stats = RunStats('run')
+
+    with stats.stage('total'):
+        stats.count('candidates', 10)
+        stats.count('accepted', 4)
+    stats.histogram('rejections', [1, 2])
+    stats.histogram('rejections', [3, 4])
+
+    assert stats.counters == {'candidates': 10, 'accepted': 4}
+    np.testing.assert_array_equal(stats.histograms['rejections'], [4, 6])
+    assert stats.timings['total'] > 0
+    rates = stats.rates()
+    assert rates['acceptance_rate'] == 0.4
+    assert rates['candidates_per_second'] == pytest.approx(10 / stats.timings['total'])
+
+    copy = pickle.loads(pickle.dumps(stats.as_dict()))
+    merged = RunStats()
+    merged.merge(copy)
+    merged.merge(stats)
+    assert merged.counters == {'candidates': 20, 'accepted': 8}
+    assert merged.histograms['rejections'].tolist() == [8, 12]
+
+
+def test_resolve_instrument():
+    assert resolve_instrument(None) is NULL_STATS
+    assert resolve_instrument(False) is NULL_STATS
+    stats = RunStats()
+    assert resolve_instrument(stats, name='named') is stats and stats.name == 'named'
+    events = []
+    with_callback = resolve_instrument(lambda event, s: events.append(event), name='cb')
+    with_callback.event('block')
+    assert events == ['block']
+    assert resolve_instrument(True).logger is logging.getLogger('smfmodel')
+    with pytest.raises(TypeError):
+        resolve_instrument(3)
+
+
+def test_generator_counters_add_up():
+    stats = RunStats()
+    events = []
+    stats.callback = lambda event, s: events.append(event)
+
+    solutions = generate_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', {'seed': 0, 'batch_size': 256, 'total_matrices': 300, 'return_array': True, 'instrument': stats})
+
+    counters = stats.counters
+    assert len(solutions) == 300
+    assert counters['matrices'] == 300
+    assert counters['candidates'] == 256 * counters['blocks']
+    assert 300 <= counters['accepted'] <= counters['candidates']
+    # Every candidate is rejected by some number of components, from 0 to all of them
+    assert stats.histograms['rejected_components'].sum() == counters['candidates']
+    assert stats.histograms['rejected_components'][0] == counters['accepted']
+    assert {'generate', 'solve_steady_state', 'filter', 'total'} <= set(stats.timings)
+    assert events.count('block') == counters['blocks'] and events[-1] == 'finish'
+
+
+def test_instrumentation_does_not_change_results():
+    params = {'seed': 1, 'batch_size': 128, 'total_matrices': 100, 'return_array': True}
+    plain = generate_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', params)
+    instrumented = generate_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', dict(params, instrument=RunStats()))
+    np.testing.assert_array_equal(plain, instrumented)
+
+    rng = np.random.default_rng(0)
+    a, b = rng.dirichlet(np.ones(4), size=30), rng.dirichlet(np.ones(4), size=30)
+    stats = RunStats()
+    assert permutation_test(a, b, n_permutations=500, seed=0, instrument=stats) == permutation_test(a, b, n_permutations=500, seed=0)
+    assert stats.counters['permutations'] == 500
@@ -0,0 +1,61 @@
+import importlib
+import json
+import os
+import subprocess
+import sys
+import types
+
+import pytest
+
+import smfmodel
+
+SUBPACKAGES = ['markov_models', 'neural_networks', 'plotting', 'stats', 'tools']
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+def _run(code):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SRC, os.environ.get('PYTHONPATH', '')]))
+    return json.loads(subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True).stdout)
+
+
+def test_import_loads_no_dependencies():
+    heavy = ['numpy', 'scipy', 'pandas', 'anndata', 'matplotlib', 'seaborn', 'torch', 'statsmodels', 'sklearn']
+
+    loaded = _run(f"import json, sys, smfmodel; print(json.dumps([m for m in {heavy} if m in sys.modules]))")
+
+    assert loaded == []
+
+
+def test_function_access_loads_only_its_module():
+    loaded = _run(
+        "import json, sys, smfmodel; smfmodel.mm.solve_steady_state; "
+        "print(json.dumps(sorted(m for m in sys.modules if m.startswith('smfmodel.'))))"
+    )
+
+    assert 'smfmodel.markov_models.solve_steady_state' in loaded
+    assert not any(m.startswith(('smfmodel.plotting', 'smfmodel.stats', 'smfmodel.neural_networks', 'smfmodel.tools')) for m in loaded)
+    assert 'smfmodel.markov_models.generate_transition_matrix_solutions' not in loaded
+
+
+@pytest.mark.parametrize('name', SUBPACKAGES)
+def test_every_exported_name_resolves(name):
+    if name == 'neural_networks':
+        pytest.importorskip('torch')
+    package = importlib.import_module(f'smfmodel.{name}')
+
+    for attribute in package.__all__:
+        assert callable(getattr(package, attribute)), attribute
+        assert attribute in dir(package)
+    with pytest.raises(AttributeError):
+        package.not_a_function
+
+
+def test_aliases_and_submodule_shadowing():
+    assert smfmodel.mm is importlib.import_module('smfmodel.markov_models')
+    assert smfmodel.tl is importlib.import_module('smfmodel.tools')
+
+    # Importing the submodule of the same name must not replace the function
+    importlib.import_module('smfmodel.markov_models.solve_steady_state')
+    assert isinstance(smfmodel.mm.solve_steady_state, types.FunctionType)
+    from smfmodel.markov_models import solve_steady_state
+    assert solve_steady_state is smfmodel.mm.solve_steady_state
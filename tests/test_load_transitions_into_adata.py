@@ -0,0 +1,37 @@
+import numpy as np
+
+from smfmodel.markov_models import load_transitions_into_adata, random_transition_matrix
+
+NAMES = [f'{i}_{j}' for i in range(4) for j in range(4)]
+
+
+def test_single_stack_is_a_view():
+    Ts = random_transition_matrix(n_matrices=10, rng=np.random.default_rng(0))
+
+    adata = load_transitions_into_adata(Ts, NAMES, 'WT')
+
+    assert adata.shape == (10, 16)
+    assert np.shares_memory(adata.X, Ts)
+    assert list(adata.obs['condition'].unique()) == ['WT']
+    assert list(adata.var_names) == NAMES
+
+
+def test_list_of_matrices_and_dtype():
+    Ts = random_transition_matrix(n_matrices=5, rng=np.random.default_rng(1))
+
+    adata = load_transitions_into_adata(list(Ts), NAMES, 'WT', dtype='float32')
+
+    assert adata.X.dtype == np.float32
+    np.testing.assert_allclose(adata.X, Ts.reshape(5, 16), rtol=1e-6)
+
+
+def test_conditions_are_merged_in_order():
+    rng = np.random.default_rng(2)
+    stacks = [random_transition_matrix(n_matrices=n, rng=rng) for n in (3, 4)]
+
+    adata = load_transitions_into_adata(stacks, NAMES, ['WT', 'KO'])
+
+    np.testing.assert_array_equal(adata.X, np.concatenate(stacks).reshape(7, 16))
+    assert list(adata.obs['condition']) == ['WT'] * 3 + ['KO'] * 4
+    assert list(adata.obs['condition'].cat.categories) == ['WT', 'KO']
+    assert list(adata.obs_names) == [str(index) for index in range(7)]
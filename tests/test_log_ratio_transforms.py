@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from smfmodel.stats import alr_transform, clr_transform, helmert_basis, ilr_transform, multiplicative_replacement
+
+
+def _compositions(n=50, d=5, seed=0):
+    return np.random.default_rng(seed).dirichlet(np.ones(d), size=n)
+
+
+def test_clr_matches_the_formula():
+    data = _compositions()
+
+    expected = np.log(data / np.exp(np.log(data).mean(axis=1, keepdims=True)))
+
+    np.testing.assert_allclose(clr_transform(data), expected)
+    np.testing.assert_allclose(clr_transform(data).sum(axis=1), 0, atol=1e-12)
+
+
+def test_chunks_out_and_dtype():
+    data = _compositions(n=101)
+    expected = clr_transform(data)
+
+    np.testing.assert_allclose(clr_transform(data, chunk_size=7), expected)
+    out = np.empty_like(data)
+    assert clr_transform(data, out=out, chunk_size=10) is out
+    np.testing.assert_allclose(out, expected)
+    single = clr_transform(data, dtype='float32')
+    assert single.dtype == np.float32
+    np.testing.assert_allclose(single, expected, atol=1e-5)
+    # The input is left untouched
+    np.testing.assert_allclose(data.sum(axis=1), 1)
+
+
+def test_helmert_basis_is_orthonormal_and_centred():
+    basis = helmert_basis(6)
+
+    np.testing.assert_allclose(basis.T @ basis, np.eye(5), atol=1e-12)
+    np.testing.assert_allclose(basis.sum(axis=0), 0, atol=1e-12)
+
+
+def test_ilr_is_an_isometry_of_clr():
+    data = _compositions()
+
+    ilr = ilr_transform(data, chunk_size=16)
+    clr = clr_transform(data)
+
+    assert ilr.shape == (50, 4)
+    np.testing.assert_allclose(ilr @ helmert_basis(5).T, clr, atol=1e-12)
+    np.testing.assert_allclose(np.linalg.norm(ilr[:, None] - ilr[None], axis=-1), np.linalg.norm(clr[:, None] - clr[None], axis=-1), atol=1e-12)
+
+
+@pytest.mark.parametrize('reference', [-1, 0, 2])
+def test_alr_divides_by_the_reference(reference):
+    data = _compositions()
+    others = np.delete(np.arange(5), reference % 5)
+
+    expected = np.log(data[:, others] / data[:, [reference]])
+
+    np.testing.assert_allclose(alr_transform(data, reference=reference, chunk_size=9), expected)
+
+
+def test_multiplicative_replacement_keeps_totals_and_ratios():
+    data = np.array([[0.5, 0.5, 0.0, 0.0], [0.2, 0.3, 0.5, 0.0], [0.1, 0.2, 0.3, 0.4]])
+
+    replaced = multiplicative_replacement(data, delta=0.01)
+
+    assert np.all(replaced > 0)
+    np.testing.assert_allclose(replaced.sum(axis=1), 1)
+    np.testing.assert_allclose(replaced[0, 2:], 0.01)
+    np.testing.assert_allclose(replaced[1, 0] / replaced[1, 1], 2 / 3)
+    np.testing.assert_array_equal(replaced[2], data[2])
+    assert np.isfinite(clr_transform(data, zero_replacement='multiplicative')).all()
+    with pytest.raises(ValueError, match='too large'):
+        multiplicative_replacement(data, delta=0.5)
@@ -0,0 +1,68 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from smfmodel.stats import manova_statistics, manova_test
+from smfmodel.stats.manova import check_zero_variance, zero_variance_mask
+
+
+def _conditions(seed=0, n_classes=3):
+    rng = np.random.default_rng(seed)
+    condition_1 = rng.normal(0, 1, size=(30, n_classes))
+    condition_2 = rng.normal(0.4, 1, size=(35, n_classes))
+    return condition_1, condition_2
+
+
+def _statsmodels_table(condition_1, condition_2):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        result = manova_test(condition_1, condition_2, list(range(condition_1.shape[1])))
+    return result.results['Condition']['stat'].to_numpy(dtype=float)
+
+
+def test_matches_manova_test():
+    condition_1, condition_2 = _conditions()
+
+    np.testing.assert_allclose(manova_statistics(condition_1, condition_2).to_numpy(), _statsmodels_table(condition_1, condition_2))
+
+
+def test_zero_variance_columns_are_masked():
+    condition_1, condition_2 = _conditions(1)
+    padded_1 = np.column_stack([condition_1, np.ones(len(condition_1))])
+    padded_2 = np.column_stack([condition_2, np.ones(len(condition_2))])
+
+    np.testing.assert_allclose(manova_statistics(padded_1, padded_2).to_numpy(), _statsmodels_table(condition_1, condition_2))
+
+
+def test_stacked_comparisons_match_single_comparisons():
+    pairs = [_conditions(seed) for seed in range(3)]
+
+    stacked = manova_statistics(np.stack([pair[0] for pair in pairs]), np.stack([pair[1] for pair in pairs]))
+
+    assert stacked.index.names == ['comparison', 'statistic']
+    for comparison, pair in enumerate(pairs):
+        np.testing.assert_allclose(stacked.loc[comparison].to_numpy(), manova_statistics(*pair).to_numpy())
+
+
+def test_rank_deficient_uses_the_rank_of_compositions():
+    rng = np.random.default_rng(2)
+    condition_1 = rng.dirichlet([4, 3, 2, 1], size=30)
+    condition_2 = rng.dirichlet([5, 3, 2, 1], size=35)
+
+    by_columns = manova_statistics(condition_1, condition_2)
+    by_rank = manova_statistics(condition_1, condition_2, rank_deficient=True)
+
+    assert by_columns.loc["Wilks' lambda", 'Num DF'] == 4
+    assert by_rank.loc["Wilks' lambda", 'Num DF'] == 3
+    np.testing.assert_allclose(by_columns['Value'], by_rank['Value'])
+
+
+def test_check_zero_variance_drops_columns_silently(capsys):
+    df = pd.DataFrame({'a': [1.0, 2.0, 3.0], 'b': [1.0, 1.0, 1.0], 'Condition': [1, 1, 2]})
+
+    result = check_zero_variance(df)
+
+    assert list(result.columns) == ['a', 'Condition']
+    assert capsys.readouterr().out == ''
+    np.testing.assert_array_equal(zero_variance_mask(df.to_numpy()), [False, True, False])
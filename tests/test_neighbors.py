@@ -0,0 +1,56 @@
+import anndata as ad
+import numpy as np
+import pandas as pd
+
+from smfmodel.tools import neighbors
+
+
+def _adata(n=400, seed=0):
+    embedding = np.random.default_rng(seed).normal(size=(n, 5))
+    adata = ad.AnnData(obs=pd.DataFrame(index=[str(i) for i in range(n)]))
+    adata.obsm['X_pca'] = embedding
+    return adata, embedding
+
+
+def test_matches_a_brute_force_search():
+    adata, embedding = _adata()
+
+    neighbors(adata, n_neighbors=10, chunk_size=64)
+
+    distances = adata.obsp['distances'].toarray()
+    pairwise = np.linalg.norm(embedding[:, None] - embedding[None], axis=-1)
+    np.fill_diagonal(pairwise, np.inf)
+    expected = np.argsort(pairwise, axis=1)[:, :9]
+    for i in range(len(embedding)):
+        assert set(np.flatnonzero(distances[i])) == set(expected[i])
+        np.testing.assert_allclose(np.sort(distances[i][distances[i] > 0]), np.sort(pairwise[i, expected[i]]))
+    assert adata.uns['neighbors']['params']['n_neighbors'] == 10
+
+
+def test_gauss_connectivities_are_symmetric():
+    adata, _ = _adata()
+
+    neighbors(adata, n_neighbors=8, n_pcs=3, key_added='pcs3')
+
+    connectivities = adata.obsp['pcs3_connectivities']
+    assert abs(connectivities - connectivities.T).max() == 0
+    assert connectivities.max() <= 1 and connectivities.min() >= 0
+    assert connectivities.diagonal().sum() == 0
+    assert adata.uns['pcs3']['connectivities_key'] == 'pcs3_connectivities'
+    assert adata.uns['pcs3']['params']['n_pcs'] == 3
+
+
+def test_landmarks():
+    adata, embedding = _adata()
+
+    neighbors(adata, n_neighbors=6, n_landmarks=100, seed=1)
+
+    landmark = adata.obs['landmark'].to_numpy()
+    distances = adata.obsp['distances']
+    assert landmark.sum() == 100
+    assert np.all(np.diff(distances.indptr) == 5)
+    # Every point is linked to its nearest landmarks only
+    assert landmark[distances.indices].all()
+    for i in np.flatnonzero(~landmark)[:20]:
+        nearest = np.flatnonzero(landmark)[np.argsort(np.linalg.norm(embedding[landmark] - embedding[i], axis=1))[:5]]
+        assert set(distances[i].indices) == set(nearest)
@@ -0,0 +1,21 @@
+import numpy as np
+
+from smfmodel.markov_models import generate_transition_matrix_solutions
+
+OBSERVED = np.array([0.4, 0.3, 0.2, 0.1])
+THRESHOLD = np.full(4, 0.1)
+
+
+def _generate(**params):
+    return generate_transition_matrix_solutions(OBSERVED, THRESHOLD, 'test', dict({'total_matrices': 300, 'seed': 7, 'batch_size': 128, 'return_array': True}, **params))
+
+
+def test_result_does_not_depend_on_n_jobs():
+    np.testing.assert_array_equal(_generate(n_jobs=1), _generate(n_jobs=2))
+
+
+def test_shorter_runs_are_prefixes_of_longer_runs():
+    short = _generate(total_matrices=100)
+    long = _generate(total_matrices=300)
+
+    np.testing.assert_array_equal(short, long[:100])
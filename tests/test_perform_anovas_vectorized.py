@@ -0,0 +1,38 @@
+import numpy as np
+
+from smfmodel.stats import apply_bonferroni_correction, perform_anovas, perform_anovas_vectorized
+
+
+def _conditions(seed=0):
+    rng = np.random.default_rng(seed)
+    condition_1 = rng.dirichlet([4, 3, 2, 1], size=30)
+    condition_2 = rng.dirichlet([5, 3, 2, 1], size=40)
+    return condition_1, condition_2
+
+
+def test_matches_the_statsmodels_anovas():
+    condition_1, condition_2 = _conditions()
+    variables = list(range(4))
+
+    vectorized = perform_anovas_vectorized(condition_1, condition_2, variables)
+    reference = perform_anovas(condition_1, condition_2, variables)
+
+    assert list(vectorized.index) == list(reference)
+    for column, table in reference.items():
+        np.testing.assert_allclose(vectorized.loc[column, 'F'], table['F'].iloc[0])
+        np.testing.assert_allclose(vectorized.loc[column, 'PR(>F)'], table['PR(>F)'].iloc[0])
+        np.testing.assert_allclose(vectorized.loc[column, 'sum_sq_condition'], table['sum_sq'].iloc[0])
+        np.testing.assert_allclose(vectorized.loc[column, 'sum_sq_residual'], table['sum_sq'].iloc[1])
+
+    corrected = apply_bonferroni_correction(reference)
+    np.testing.assert_allclose(vectorized['p_bonferroni'], [corrected[column] for column in vectorized.index])
+
+
+def test_zero_variance_columns_are_left_out():
+    condition_1, condition_2 = _conditions(1)
+    condition_1 = np.column_stack([condition_1, np.zeros(len(condition_1))])
+    condition_2 = np.column_stack([condition_2, np.zeros(len(condition_2))])
+
+    vectorized = perform_anovas_vectorized(condition_1, condition_2, list('abcde'))
+
+    assert list(vectorized.index) == ['Class_a', 'Class_b', 'Class_c', 'Class_d']
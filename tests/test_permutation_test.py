@@ -0,0 +1,73 @@
+import numpy as np
+
+from smfmodel.instrumentation import RunStats
+from smfmodel.stats import permutation_test
+
+
+def _proportions(n, shift, seed):
+    rng = np.random.default_rng(seed)
+    data = rng.dirichlet([4 + shift, 3, 2, 1], size=n)
+    return data
+
+
+def _reference_p_value(condition_1, condition_2, n_permutations, seed):
+    rng = np.random.default_rng(seed)
+    observed = np.linalg.norm(condition_1.mean(axis=0) - condition_2.mean(axis=0))
+    combined = np.vstack([condition_1, condition_2])
+    n_1 = len(condition_1)
+    hits = 0
+    for _ in range(n_permutations):
+        permuted = combined[rng.permutation(len(combined))]
+        hits += np.linalg.norm(permuted[:n_1].mean(axis=0) - permuted[n_1:].mean(axis=0)) >= observed
+    return hits / n_permutations
+
+
+def test_observed_distance_is_the_centroid_distance():
+    condition_1 = _proportions(40, 0, 0)
+    condition_2 = _proportions(50, 2, 1)
+
+    observed_distance, _ = permutation_test(condition_1, condition_2, n_permutations=10, seed=0)
+
+    assert np.isclose(observed_distance, np.linalg.norm(condition_1.mean(axis=0) - condition_2.mean(axis=0)))
+
+
+def test_p_value_agrees_with_a_loop_over_permutations():
+    condition_1 = _proportions(30, 0, 2)
+    condition_2 = _proportions(30, 0.5, 3)
+
+    _, p_value = permutation_test(condition_1, condition_2, n_permutations=4000, seed=0)
+    reference = _reference_p_value(condition_1, condition_2, 4000, seed=1)
+
+    # Two independent Monte Carlo estimates of the same p-value
+    assert abs(p_value - reference) < 4 * np.sqrt(reference * (1 - reference) / 2000) + 1e-3
+
+
+def test_p_value_does_not_depend_on_block_size():
+    condition_1 = _proportions(20, 0, 4)
+    condition_2 = _proportions(25, 1, 5)
+
+    results = [permutation_test(condition_1, condition_2, n_permutations=500, block_size=block_size, seed=3) for block_size in (1, 37, 500)]
+
+    # Every block draws its keys from the same stream, so only the block boundaries move
+    assert len(set(results)) == 1
+
+
+def test_separated_conditions_are_significant():
+    condition_1 = _proportions(50, 0, 6)
+    condition_2 = _proportions(50, 10, 7)
+
+    _, p_value = permutation_test(condition_1, condition_2, apply_clr_transform=True, n_permutations=500, seed=0)
+
+    assert p_value == 0
+
+
+def test_early_stopping_fires_with_the_default_block_size():
+    condition_1 = _proportions(50, 0, 8)
+    condition_2 = _proportions(50, 0, 9)
+    stats = RunStats()
+
+    _, p_value = permutation_test(condition_1, condition_2, n_permutations=100_000, early_stop_hits=10, seed=0, instrument=stats)
+
+    assert stats.counters['early_stopped'] == 1
+    assert stats.counters['permutations'] <= 1000
+    assert p_value == stats.counters['hits'] / stats.counters['permutations']
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from smfmodel.stats import permutation_test, permutation_test_contrasts
+
+
+def _data(seed=0):
+    rng = np.random.default_rng(seed)
+    shifts = {'WT': 0, 'A': 0, 'B': 6}
+    labels = np.repeat(list(shifts), 40)
+    data = np.vstack([rng.dirichlet([4 + shift, 3, 2, 1], size=40) for shift in shifts.values()])
+    return data, labels
+
+
+def test_observed_distances_match_permutation_test():
+    data, labels = _data()
+    contrasts = [('WT', 'A'), ('WT', 'B')]
+
+    results = permutation_test_contrasts(data, labels, contrasts, apply_clr_transform=True, n_permutations=200, seed=0)
+
+    for row, (condition_1, condition_2) in zip(results.itertuples(), contrasts):
+        observed, _ = permutation_test(data[labels == condition_1], data[labels == condition_2], apply_clr_transform=True, n_permutations=1, seed=0)
+        assert np.isclose(row.observed_distance, observed)
+
+
+def test_p_values_separate_null_and_shifted_contrasts():
+    data, labels = _data(1)
+
+    results = permutation_test_contrasts(data, labels, [('WT', 'A'), ('WT', 'B')], n_permutations=500, seed=0)
+
+    assert results.loc[0, 'p_value'] > 0.01
+    assert results.loc[1, 'p_value'] == 0
+    assert np.all(results['p_adj'] >= results['p_value'])
+
+
+def test_per_feature_results_and_anndata_input():
+    import anndata as ad
+    import pandas as pd
+
+    data, labels = _data(2)
+    adata = ad.AnnData(data, obs=pd.DataFrame({'condition': labels}, index=np.arange(len(labels)).astype(str)))
+
+    results, feature_results = permutation_test_contrasts(adata, 'condition', [('WT', 'B')], n_permutations=100, per_feature=True, seed=0)
+
+    assert len(results) == 1
+    assert len(feature_results) == 4
+    np.testing.assert_allclose(feature_results['observed_difference'], np.abs(data[labels == 'WT'].mean(axis=0) - data[labels == 'B'].mean(axis=0)))
+
+
+def test_empty_condition_raises():
+    data, labels = _data()
+
+    with pytest.raises(ValueError):
+        permutation_test_contrasts(data, labels, [('WT', 'missing')], n_permutations=10)
+
+
+def test_sparse_adata_matches_dense():
+    import anndata as ad
+    import pandas as pd
+    from scipy.sparse import csr_matrix
+
+    data, labels = _data(2)
+    obs = pd.DataFrame({'condition': labels}, index=[str(i) for i in range(len(labels))])
+    contrasts = [('WT', 'A'), ('WT', 'B')]
+
+    sparse = permutation_test_contrasts(ad.AnnData(csr_matrix(data), obs=obs), 'condition', contrasts, n_permutations=200, seed=0)
+    dense = permutation_test_contrasts(ad.AnnData(data, obs=obs), 'condition', contrasts, n_permutations=200, seed=0)
+
+    pd.testing.assert_frame_equal(sparse, dense)
@@ -0,0 +1,84 @@
+import numpy as np
+from scipy.linalg import expm
+
+from smfmodel.markov_models import (
+    mean_first_passage_times_batch,
+    propagate_distribution_batch,
+    random_transition_matrix,
+    rate_eigendecomposition_batch,
+    rate_matrix_batch,
+    relaxation_spectrum_batch,
+    solve_steady_state_batch,
+)
+
+
+def _rate_matrices(n_matrices=20, seed=0):
+    Ts = random_transition_matrix(4, allow_self_transitions=True, constrain_transitions_to_adjacent=False, n_matrices=n_matrices, rng=np.random.default_rng(seed))
+    return Ts, rate_matrix_batch(Ts, dt=0.5)
+
+
+def test_rate_matrices_keep_the_steady_state():
+    Ts, Qs = _rate_matrices()
+
+    decomposition = rate_eigendecomposition_batch(Qs)
+
+    np.testing.assert_allclose(Qs.sum(axis=-1), 0, atol=1e-12)
+    np.testing.assert_allclose(Ts, np.eye(4) + 0.5 * Qs)
+    assert not decomposition['ill_conditioned'].any()
+    np.testing.assert_allclose(decomposition['steady_states'], solve_steady_state_batch(Ts)[0], atol=1e-10)
+    np.testing.assert_allclose(decomposition['eigenvalues'][:, 0], 0, atol=1e-10)
+
+
+def test_propagation_matches_expm():
+    _, Qs = _rate_matrices()
+    initial = np.random.default_rng(1).dirichlet(np.ones(4), size=len(Qs))
+    times = np.array([0, 0.1, 1, 5, 50])
+
+    distributions = propagate_distribution_batch(Qs, initial, times)
+
+    expected = np.array([[p @ expm(Q * t) for t in times] for Q, p in zip(Qs, initial)])
+    np.testing.assert_allclose(distributions, expected, atol=1e-10)
+    # Reusing the decomposition and a shared initial distribution
+    shared = propagate_distribution_batch(rate_eigendecomposition_batch(Qs), initial[0], times)
+    np.testing.assert_allclose(shared[3], [initial[0] @ expm(Qs[3] * t) for t in times], atol=1e-10)
+
+
+def test_mean_first_passage_times_match_a_direct_solve():
+    _, Qs = _rate_matrices()
+
+    mfpt = mean_first_passage_times_batch(Qs)
+
+    for Q, m in zip(Qs, mfpt):
+        for j in range(4):
+            others = [i for i in range(4) if i != j]
+            # Times to reach j solve Q restricted to the other states: Q_oo m_o = -1
+            expected = np.linalg.solve(Q[np.ix_(others, others)], -np.ones(3))
+            np.testing.assert_allclose(m[others, j], expected, rtol=1e-8)
+        np.testing.assert_allclose(np.diagonal(m), 0, atol=1e-8)
+
+
+def test_relaxation_spectrum():
+    _, Qs = _rate_matrices()
+
+    spectrum = relaxation_spectrum_batch(Qs)
+
+    eigenvalues = np.linalg.eigvals(Qs)
+    rates = np.sort(-eigenvalues.real, axis=1)[:, 1:]
+    np.testing.assert_allclose(spectrum['spectral_gap'], rates[:, 0], atol=1e-10)
+    np.testing.assert_allclose(np.sort(spectrum['relaxation_times'], axis=1), np.sort(1 / rates, axis=1), rtol=1e-8)
+    assert np.all(np.diff(spectrum['relaxation_times'], axis=1) <= 1e-12)
+    assert np.all(spectrum['frequencies'] >= 0)
+
+
+def test_reversible_chains_do_not_oscillate():
+    # A symmetric rate matrix is in detailed balance with the uniform distribution
+    rates = np.random.default_rng(2).random((5, 4, 4))
+    Qs = rates + np.swapaxes(rates, -1, -2)
+    Qs[:, np.arange(4), np.arange(4)] = 0
+    Qs[:, np.arange(4), np.arange(4)] = -Qs.sum(axis=-1)
+
+    spectrum = relaxation_spectrum_batch(Qs)
+
+    np.testing.assert_allclose(spectrum['frequencies'], 0, atol=1e-10)
+    np.testing.assert_allclose(rate_eigendecomposition_batch(Qs)['steady_states'], 0.25)
+    assert mean_first_passage_times_batch(Qs).shape == (5, 4, 4)
@@ -0,0 +1,103 @@
+import gzip
+import os
+import shutil
+
+import anndata as ad
+import numpy as np
+import pytest
+
+from smfmodel.markov_models import (
+    convert_h5ad_to_transition_parameters,
+    load_transition_parameters,
+    load_transitions_into_adata,
+    random_transition_matrix,
+    save_transition_parameters,
+    transition_mask,
+)
+from smfmodel.markov_models.transition_logits import _logit_layout
+
+NAMES = [f'{i}_{j}' for i in range(4) for j in range(4)]
+ARCHIVE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'notebooks', 'markov_models', 'mm_test_self_transitions_1k.h5ad.gz')
+
+
+def _stacks():
+    mask = transition_mask(4, True, True)
+    rng = np.random.default_rng(0)
+    return mask, [random_transition_matrix(n_matrices=300, rng=rng, mask=mask), random_transition_matrix(n_matrices=200, rng=rng, mask=mask)]
+
+
+@pytest.mark.parametrize('dtype, tolerance', [('float64', 1e-15), ('float32', 2e-7), ('uint16', 3 / 131070), ('uint8', 3 / 510)])
+def test_round_trip(tmp_path, dtype, tolerance):
+    mask, stacks = _stacks()
+
+    save_transition_parameters(str(tmp_path / 'store'), stacks, NAMES, ['WT', 'KO'], mask=mask, dtype=dtype, chunk_size=64)
+    loaded = load_transition_parameters(str(tmp_path / 'store'))
+
+    expected = np.concatenate(stacks)
+    assert loaded.shape == (500, 4, 4)
+    assert np.abs(loaded - expected).max() <= tolerance
+    np.testing.assert_allclose(loaded.sum(axis=-1), 1)
+    assert np.all(loaded[:, ~mask] == 0)
+    assert np.load(tmp_path / 'store' / 'parameters.npy', mmap_mode='r').shape == (500, mask.sum() - 4)
+
+
+def test_rows_conditions_and_adata(tmp_path):
+    mask, stacks = _stacks()
+    path = save_transition_parameters(str(tmp_path / 'store'), stacks, NAMES, ['WT', 'KO'], dtype='float64')
+
+    np.testing.assert_allclose(load_transition_parameters(path, indices=slice(10, 20)), stacks[0][10:20])
+    np.testing.assert_allclose(load_transition_parameters(path, condition='KO'), stacks[1])
+    np.testing.assert_allclose(load_transition_parameters(path, indices=np.arange(250, 350), condition='KO'), stacks[1][:50])
+
+    adata = load_transition_parameters(path, condition='KO', return_adata=True, dtype='float32')
+    reference = load_transitions_into_adata(stacks, NAMES, ['WT', 'KO'])
+    assert adata.shape == (200, 16) and adata.X.dtype == np.float32
+    assert list(adata.var_names) == NAMES
+    assert list(adata.obs['condition'].cat.categories) == ['WT', 'KO']
+    assert (adata.obs['condition'] == 'KO').all()
+    np.testing.assert_allclose(adata.X, reference.X[300:], atol=1e-7)
+
+
+def test_entries_outside_the_mask_are_rejected(tmp_path):
+    _, stacks = _stacks()
+
+    with pytest.raises(ValueError, match='outside the mask'):
+        save_transition_parameters(str(tmp_path / 'store'), stacks[0], NAMES, 'WT', mask=transition_mask(4, False, True))
+
+
+def test_convert_plain_and_gzip_h5ad(tmp_path):
+    mask, stacks = _stacks()
+    h5ad_path = str(tmp_path / 'transitions.h5ad')
+    load_transitions_into_adata(stacks, NAMES, ['WT', 'KO']).write_h5ad(h5ad_path)
+    gzip_path = h5ad_path + '.gz'
+    with open(h5ad_path, 'rb') as source, gzip.open(gzip_path, 'wb') as target:
+        shutil.copyfileobj(source, target)
+
+    plain = convert_h5ad_to_transition_parameters(h5ad_path, str(tmp_path / 'plain'), dtype='float64', chunk_size=128)
+    compressed = convert_h5ad_to_transition_parameters(gzip_path, str(tmp_path / 'compressed'), mask=mask, dtype='float64', chunk_size=128)
+
+    for path in [plain, compressed]:
+        np.testing.assert_allclose(load_transition_parameters(path), np.concatenate(stacks))
+        np.testing.assert_allclose(load_transition_parameters(path, condition='KO'), stacks[1])
+    # The decompressed copy is removed
+    assert sorted(os.listdir(compressed)) == ['condition.npy', 'meta.json', 'parameters.npy']
+
+
+@pytest.mark.skipif(not os.path.exists(ARCHIVE), reason='the notebook archives are not part of this checkout')
+def test_convert_shipped_archive(tmp_path):
+    # The notebook archives are HDF5 files with internal compression despite their .gz suffix
+    with open(ARCHIVE, 'rb') as f:
+        assert f.read(4) == b'\x89HDF'
+
+    path = convert_h5ad_to_transition_parameters(ARCHIVE, str(tmp_path / 'store'), dtype='float32')
+
+    adata = ad.read_h5ad(ARCHIVE)
+    loaded = load_transition_parameters(path, return_adata=True)
+    assert loaded.shape == adata.shape
+    errors = np.abs(loaded.X - np.asarray(adata.X)).reshape(-1, 4, 4)
+    rows, cols, reference = _logit_layout(np.asarray(adata.X).reshape(-1, 4, 4).any(axis=0))
+    # Free entries are within float32 rounding, the reference entry of a row adds up their two errors
+    assert errors[:, rows, cols].max() <= 2 ** -25
+    assert errors[:, np.arange(4), reference].max() <= 2 * 2 ** -25
+    assert list(loaded.var_names) == list(adata.var_names)
+    np.testing.assert_array_equal(loaded.obs['condition'].astype(str), adata.obs['condition'].astype(str))
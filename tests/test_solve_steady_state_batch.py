@@ -0,0 +1,56 @@
+import numpy as np
+
+from smfmodel.markov_models import random_transition_matrix, solve_steady_state, solve_steady_state_batch
+
+
+def _lstsq_steady_state(T):
+    n = T.shape[0]
+    A = np.vstack((T.T - np.eye(n), np.ones(n)))
+    b = np.zeros(n + 1)
+    b[-1] = 1
+    return np.linalg.lstsq(A, b, rcond=None)[0]
+
+
+def test_matches_least_squares():
+    Ts = random_transition_matrix(5, allow_self_transitions=True, constrain_transitions_to_adjacent=False, n_matrices=200, rng=np.random.default_rng(0))
+
+    steady_states, ill_conditioned = solve_steady_state_batch(Ts)
+
+    assert steady_states.shape == (200, 5)
+    assert not ill_conditioned.any()
+    np.testing.assert_allclose(steady_states, [_lstsq_steady_state(T) for T in Ts], atol=1e-12)
+
+
+def test_steady_states_are_stationary():
+    Ts = random_transition_matrix(4, n_matrices=100, rng=np.random.default_rng(1))
+
+    steady_states, _ = solve_steady_state_batch(Ts)
+
+    np.testing.assert_allclose(np.einsum('ni,nij->nj', steady_states, Ts), steady_states, atol=1e-12)
+    np.testing.assert_allclose(steady_states.sum(axis=1), 1)
+
+
+def test_two_state_closed_form():
+    Ts = random_transition_matrix(2, allow_self_transitions=True, constrain_transitions_to_adjacent=False, n_matrices=50, rng=np.random.default_rng(2))
+
+    steady_states, ill_conditioned = solve_steady_state_batch(Ts)
+
+    assert not ill_conditioned.any()
+    np.testing.assert_allclose(steady_states, [_lstsq_steady_state(T) for T in Ts], atol=1e-12)
+
+
+def test_reducible_chain_falls_back_to_least_squares():
+    reducible = np.eye(3)
+    Ts = np.stack([reducible, random_transition_matrix(3, rng=np.random.default_rng(3))])
+
+    steady_states, ill_conditioned = solve_steady_state_batch(Ts)
+
+    np.testing.assert_array_equal(ill_conditioned, [True, False])
+    np.testing.assert_allclose(steady_states[0], _lstsq_steady_state(reducible))
+
+
+def test_solve_steady_state_dispatches_stacks():
+    Ts = random_transition_matrix(4, n_matrices=10, rng=np.random.default_rng(4))
+
+    np.testing.assert_allclose(solve_steady_state(Ts), solve_steady_state_batch(Ts)[0])
+    np.testing.assert_allclose(solve_steady_state(Ts[0]), solve_steady_state_batch(Ts)[0][0], atol=1e-12)
@@ -0,0 +1,56 @@
+import numpy as np
+
+from smfmodel.markov_models import (
+    check_detailed_balance,
+    check_detailed_balance_batch,
+    energy_dissipation,
+    entropy_production_batch,
+    net_flux_batch,
+    random_transition_matrix,
+    solve_steady_state_batch,
+    transition_mask,
+)
+
+
+def _reversible_matrices(n_matrices, size, seed):
+    # T_ij = S_ij / sum_k S_ik with a symmetric S satisfies detailed balance
+    rng = np.random.default_rng(seed)
+    S = rng.random((n_matrices, size, size)) * transition_mask(size, constrain_transitions_to_adjacent=False)
+    S = S + np.swapaxes(S, -1, -2)
+    return S / S.sum(axis=-1, keepdims=True)
+
+
+def test_net_fluxes_are_antisymmetric_and_balanced():
+    Ts = random_transition_matrix(5, constrain_transitions_to_adjacent=False, n_matrices=50, rng=np.random.default_rng(0))
+
+    J = net_flux_batch(Ts)
+
+    np.testing.assert_allclose(J, -np.swapaxes(J, -1, -2))
+    # Stationarity: the net flux out of every state vanishes
+    np.testing.assert_allclose(J.sum(axis=-1), 0, atol=1e-12)
+
+
+def test_reversible_matrices_satisfy_detailed_balance():
+    reversible = _reversible_matrices(20, 4, 1)
+    driven = random_transition_matrix(4, n_matrices=20, rng=np.random.default_rng(2))
+    Ts = np.concatenate([reversible, driven])
+
+    detailed_balance = check_detailed_balance_batch(Ts, 1e-10)
+
+    np.testing.assert_array_equal(detailed_balance, np.repeat([True, False], 20))
+    assert check_detailed_balance(Ts[0], 1e-10) and not check_detailed_balance(Ts[-1], 1e-10)
+    np.testing.assert_allclose(entropy_production_batch(reversible), 0, atol=1e-12)
+    assert np.all(entropy_production_batch(driven) > 0)
+
+
+def test_entropy_production_matches_energy_dissipation_on_a_ring():
+    Ts = random_transition_matrix(4, n_matrices=20, rng=np.random.default_rng(3))
+    steady_states = solve_steady_state_batch(Ts)[0]
+
+    np.testing.assert_allclose(entropy_production_batch(Ts, steady_states), [energy_dissipation(T) for T in Ts])
+
+
+def test_missing_reverse_transition_gives_infinite_entropy_production():
+    T = np.array([[0, 1, 0], [0, 0, 1], [1, 0, 0]], dtype=float)
+
+    assert np.isinf(entropy_production_batch(T[np.newaxis])[0])
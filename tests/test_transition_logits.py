@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from smfmodel.markov_models import random_transition_matrix, transition_logits, transition_mask, transition_matrices_from_logits
+
+
+@pytest.mark.parametrize('allow_self_transitions, constrain_transitions_to_adjacent', [(False, True), (True, True), (True, False)])
+def test_round_trip(allow_self_transitions, constrain_transitions_to_adjacent):
+    mask = transition_mask(4, allow_self_transitions, constrain_transitions_to_adjacent)
+    Ts = random_transition_matrix(n_matrices=100, rng=np.random.default_rng(0), mask=mask)
+
+    logits = transition_logits(Ts, mask)
+
+    assert logits.shape == (100, mask.sum() - 4)
+    np.testing.assert_allclose(transition_matrices_from_logits(logits, mask), Ts, atol=1e-12)
+    np.testing.assert_array_equal(transition_logits(Ts), logits)
+
+
+def test_any_logits_give_stochastic_matrices_on_the_mask():
+    mask = transition_mask(4, True, True)
+    logits = np.random.default_rng(1).normal(scale=20, size=(50, mask.sum() - 4))
+
+    Ts = transition_matrices_from_logits(logits, mask)
+
+    np.testing.assert_allclose(Ts.sum(axis=-1), 1)
+    assert np.all(Ts[:, ~mask] == 0)
+    assert np.all(np.isfinite(Ts))
+
+
+def test_rows_without_transitions_are_rejected():
+    mask = np.eye(3, dtype=bool)
+    mask[1, 1] = False
+    with pytest.raises(ValueError, match='at least one allowed transition'):
+        transition_logits(np.eye(3)[None], mask)
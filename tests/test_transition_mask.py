@@ -0,0 +1,53 @@
+import networkx as nx
+import numpy as np
+
+from smfmodel.markov_models import generate_transition_matrix_solutions, random_transition_matrix, transition_mask
+
+
+def test_default_ring():
+    mask = transition_mask(4)
+
+    expected = np.array([
+        [0, 1, 0, 1],
+        [1, 0, 1, 0],
+        [0, 1, 0, 1],
+        [1, 0, 1, 0]
+    ], dtype=bool)
+    np.testing.assert_array_equal(mask, expected)
+    np.testing.assert_array_equal(transition_mask(4, allow_self_transitions=True), expected | np.eye(4, dtype=bool))
+
+
+def test_unconstrained_mask():
+    np.testing.assert_array_equal(transition_mask(3, constrain_transitions_to_adjacent=False), ~np.eye(3, dtype=bool))
+
+
+def test_graph_self_loops_are_kept():
+    graph = nx.cycle_graph(4)
+    graph.add_edges_from((node, node) for node in graph.nodes)
+
+    mask = transition_mask(graph=graph)
+
+    assert np.all(np.diagonal(mask))
+    np.testing.assert_array_equal(mask, transition_mask(4, allow_self_transitions=True))
+
+
+def test_directed_graph_allows_only_its_edges():
+    graph = nx.DiGraph([(0, 1), (1, 2), (2, 0)])
+
+    mask = transition_mask(graph=graph)
+
+    np.testing.assert_array_equal(np.argwhere(mask), [[0, 1], [1, 2], [2, 0]])
+
+
+def test_generators_respect_a_graph_mask():
+    graph = nx.path_graph(4)
+    graph.add_edges_from((node, node) for node in graph.nodes)
+    mask = transition_mask(graph=graph)
+
+    Ts = random_transition_matrix(n_matrices=50, rng=np.random.default_rng(0), mask=graph)
+    solutions = generate_transition_matrix_solutions(np.full(4, 0.25), np.full(4, 0.15), 'test', {'mask': graph, 'total_matrices': 20, 'seed': 0, 'return_array': True})
+
+    for stack in (Ts, solutions):
+        assert np.all(stack[:, ~mask] == 0)
+        assert np.all(np.diagonal(stack, axis1=-2, axis2=-1) > 0)
+        np.testing.assert_allclose(stack.sum(axis=-1), 1)
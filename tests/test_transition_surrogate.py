@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from smfmodel.neural_networks import load_transition_surrogate, sample_transition_surrogate, save_transition_surrogate, train_transition_surrogate
+
+OBSERVED = np.array([0.4, 0.3, 0.2, 0.1])
+THRESHOLD = np.full(4, 0.1)
+SAMPLE_PARAMS = {'total_matrices': 200, 'batch_size': 512, 'max_batches': 50, 'seed': 0, 'return_array': True}
+
+
+@pytest.fixture(scope='module')
+def surrogate():
+    return train_transition_surrogate({'n_train': 4000, 'epochs': 3, 'n_components': 2, 'hidden_sizes': [16], 'batch_size': 256, 'seed': 0, 'dirichlet_alpha': np.ones((4, 4))})
+
+
+def test_training_records_the_losses(surrogate):
+    history = surrogate['history']
+
+    assert len(history['train_nll']) == 3 and len(history['validation_nll']) == 3
+    assert np.all(np.isfinite(history['train_nll']))
+    assert history['train_nll'][-1] < history['train_nll'][0]
+
+
+def test_samples_are_inside_the_threshold(surrogate):
+    from smfmodel.markov_models import solve_steady_state_batch
+
+    Ts, report = sample_transition_surrogate(surrogate, OBSERVED, THRESHOLD, 'test', SAMPLE_PARAMS)
+
+    assert Ts.shape == (200, 4, 4)
+    assert report['accepted'] == 200 and report['candidates'] >= 200
+    steady_states, ill_conditioned = solve_steady_state_batch(Ts)
+    assert not ill_conditioned.any()
+    assert np.all(np.abs(steady_states - OBSERVED) < THRESHOLD)
+    np.testing.assert_allclose(Ts.sum(axis=-1), 1)
+
+
+def test_save_and_load_give_identical_samples(surrogate, tmp_path):
+    path = save_transition_surrogate(surrogate, str(tmp_path / 'surrogate.pt'))
+
+    loaded = load_transition_surrogate(path)
+
+    assert loaded['config'] == surrogate['config']
+    original, _ = sample_transition_surrogate(surrogate, OBSERVED, THRESHOLD, 'test', SAMPLE_PARAMS)
+    restored, _ = sample_transition_surrogate(loaded, OBSERVED, THRESHOLD, 'test', SAMPLE_PARAMS)
+    np.testing.assert_array_equal(original, restored)
+
+
+def test_running_out_of_batches_warns(surrogate):
+    params = dict(SAMPLE_PARAMS, total_matrices=10_000, batch_size=64, max_batches=2)
+
+    with pytest.warns(RuntimeWarning, match='found only'):
+        Ts, report = sample_transition_surrogate(surrogate, OBSERVED, THRESHOLD, 'test', params)
+
+    assert len(Ts) == report['accepted'] < 10_000
+    assert report['candidates'] == 128